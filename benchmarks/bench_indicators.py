@@ -0,0 +1,289 @@
+"""
+Micro-benchmarks de los nucleos de indicadores y senales.
+
+Mide wma, wma_many, detect_cross_up, last_cross_up, all_cross_up, tail_cross_up y
+el motor matricial (scan_cross_up, scan_cross_up_history) sobre un universo sintetico (benchmarks/synthetic.py) y compara la
+implementacion actual con la de referencia (benchmarks/reference.py) o
+con cualquier otra pasada por --baseline/--candidate.
+
+Uso (desde la raiz del proyecto, sin red):
+    python benchmarks/bench_indicators.py
+    python benchmarks/bench_indicators.py --bars 6500 --symbols 50 --pairs 50:200,20:100
+    python benchmarks/bench_indicators.py --baseline reference:wma --candidate wma_cross_alerts.indicators.wma:wma
+    python benchmarks/bench_indicators.py --json bench_output.json
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_PATH = PROJECT_ROOT / "src"
+
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
+
+from harness import BenchResult, Comparison, bench, compare, format_bytes
+from synthetic import synthetic_universe
+
+import reference
+from wma_cross_alerts.indicators.wma import wma, wma_many
+from wma_cross_alerts.signals.golden_cross_matrix import (
+    CloseMatrix,
+    scan_cross_up,
+    scan_cross_up_history,
+)
+from wma_cross_alerts.signals.golden_cross_wma import (
+    all_cross_up,
+    detect_cross_up,
+    last_cross_up,
+    tail_cross_up,
+)
+
+
+# Paridad de la WMA con la referencia en periodos cortos, ademas de los de --pairs
+PARITY_PERIODS = (1, 2, 3, 5, 10, 30)
+PARITY_SYMBOLS = 3
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de WMA y Golden Cross")
+    parser.add_argument("--bars", type=int, default=5000, help="Sesiones de historico por simbolo")
+    parser.add_argument("--symbols", type=int, default=20, help="Numero de simbolos sinteticos")
+    parser.add_argument("--pairs", default="50:200", help="Pares corto:largo separados por comas")
+    parser.add_argument("--repeat", type=int, default=5, help="Pasadas medidas por caso")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-reference",
+        action="store_true",
+        help="No medir las implementaciones de referencia (rolling().apply es lenta)",
+    )
+    parser.add_argument(
+        "--baseline",
+        default="reference:wma",
+        help="WMA de referencia para la comparacion numerica (modulo:funcion)",
+    )
+    parser.add_argument(
+        "--candidate",
+        default="wma_cross_alerts.indicators.wma:wma",
+        help="WMA a comparar con --baseline (modulo:funcion)",
+    )
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    parser.add_argument("--json", help="Guardar resultados en este fichero JSON")
+    return parser.parse_args()
+
+
+def parse_pairs(value: str) -> list[tuple[int, int]]:
+    pairs = []
+    for item in value.split(","):
+        short, long = item.strip().split(":")
+        pairs.append((int(short), int(long)))
+    return pairs
+
+
+def load_callable(spec: str):
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Formato esperado modulo:funcion, recibido {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def run(args: argparse.Namespace) -> tuple[list[BenchResult], list[Comparison]]:
+    universe = synthetic_universe(args.symbols, args.bars, seed=args.seed)
+    closes = list(universe.values())
+    matrix = CloseMatrix.from_series(universe)
+
+    n = len(closes)
+    total_bars = n * args.bars
+
+    baseline_wma = load_callable(args.baseline)
+    candidate_wma = load_callable(args.candidate)
+
+    results: list[BenchResult] = []
+    comparisons: list[Comparison] = []
+
+    for short_period, long_period in parse_pairs(args.pairs):
+        tag = f"{short_period}/{long_period}"
+
+        # WMA precalculadas para medir solo las senales
+        shorts = [wma(c, short_period) for c in closes]
+        longs = [wma(c, long_period) for c in closes]
+        pairs = list(zip(shorts, longs))
+
+        results.append(bench(
+            f"wma[{tag}]",
+            lambda: [(wma(c, short_period), wma(c, long_period)) for c in closes],
+            calls=2 * n, bars=2 * total_bars, repeat=args.repeat,
+        ))
+        results.append(bench(
+            f"wma_many[{tag}]",
+            lambda: [wma_many(c, (short_period, long_period)) for c in closes],
+            calls=n, bars=2 * total_bars, repeat=args.repeat,
+        ))
+        results.append(bench(
+            f"detect_cross_up[{tag}]",
+            lambda: [detect_cross_up(s, l) for s, l in pairs],
+            calls=n, bars=total_bars, repeat=args.repeat,
+        ))
+        results.append(bench(
+            f"last_cross_up[{tag}]",
+            lambda: [last_cross_up(s, l) for s, l in pairs],
+            calls=n, bars=total_bars, repeat=args.repeat,
+        ))
+        results.append(bench(
+            f"all_cross_up[{tag}]",
+            lambda: [all_cross_up(s, l) for s, l in pairs],
+            calls=n, bars=total_bars, repeat=args.repeat,
+        ))
+        results.append(bench(
+            f"tail_cross_up[{tag}]",
+            lambda: [tail_cross_up(c, short_period, long_period) for c in closes],
+            calls=n, bars=total_bars, repeat=args.repeat,
+        ))
+
+        results.append(bench(
+            f"scan_cross_up[{tag}]",
+            lambda: scan_cross_up(matrix, short_period, long_period, matrix.dates[-1]),
+            calls=1, bars=total_bars, repeat=args.repeat,
+        ))
+        results.append(bench(
+            f"scan_cross_up_history[{tag}]",
+            lambda: scan_cross_up_history(matrix, short_period, long_period),
+            calls=1, bars=total_bars, repeat=args.repeat,
+        ))
+
+        if not args.no_reference:
+            results.append(bench(
+                f"reference.wma[{tag}]",
+                lambda: [(reference.wma(c, short_period), reference.wma(c, long_period)) for c in closes],
+                calls=2 * n, bars=2 * total_bars, repeat=min(args.repeat, 2),
+            ))
+            results.append(bench(
+                f"reference.last_cross_up[{tag}]",
+                lambda: [reference.last_cross_up(s, l) for s, l in pairs],
+                calls=n, bars=total_bars, repeat=args.repeat,
+            ))
+
+        # Igualdad numerica
+        for period in sorted({short_period, long_period}):
+            comparisons.append(compare(
+                f"{args.candidate} vs {args.baseline} (period={period})",
+                [baseline_wma(c, period) for c in closes],
+                [candidate_wma(c, period) for c in closes],
+                rtol=args.rtol,
+            ))
+
+        many = [wma_many(c, (short_period, long_period)) for c in closes]
+        comparisons.append(compare(
+            f"wma_many vs wma [{tag}]",
+            [(s, l) for s, l in pairs],
+            [(m[short_period], m[long_period]) for m in many],
+            rtol=args.rtol,
+        ))
+
+        comparisons.append(compare(
+            f"detect_cross_up vs reference [{tag}]",
+            [reference.detect_cross_up(s, l) for s, l in pairs],
+            [detect_cross_up(s, l) for s, l in pairs],
+        ))
+        comparisons.append(compare(
+            f"last_cross_up vs reference [{tag}]",
+            [reference.last_cross_up(s, l) for s, l in pairs],
+            [last_cross_up(s, l) for s, l in pairs],
+        ))
+
+        # tail_cross_up sobre la ultima barra debe coincidir con el historico completo
+        tails = [tail_cross_up(c, short_period, long_period) for c in closes]
+        comparisons.append(compare(
+            f"tail_cross_up vs last_cross_up [{tag}]",
+            [last_cross_up(s, l) for s, l in pairs],
+            [t[0] for t in tails],
+        ))
+        comparisons.append(compare(
+            f"tail_cross_up WMA vs wma()[-1] [{tag}]",
+            [(s.iloc[-1], l.iloc[-1]) for s, l in pairs],
+            [(t[1], t[2]) for t in tails],
+            rtol=args.rtol,
+        ))
+
+        # El motor matricial debe dar los mismos cruces y WMA que el calculo por simbolo
+        tail = scan_cross_up(matrix, short_period, long_period, matrix.dates[-1])
+        comparisons.append(compare(
+            f"scan_cross_up vs tail_cross_up [{tag}]",
+            [t[0] for t in tails],
+            list(tail.is_cross),
+        ))
+        comparisons.append(compare(
+            f"scan_cross_up WMA vs tail_cross_up [{tag}]",
+            [(t[1], t[2]) for t in tails],
+            list(zip(tail.wma_short, tail.wma_long)),
+            rtol=args.rtol,
+        ))
+        history = scan_cross_up_history(matrix, short_period, long_period)
+        comparisons.append(compare(
+            f"scan_cross_up_history vs detect_cross_up [{tag}]",
+            [detect_cross_up(s, l).to_numpy() for s, l in pairs],
+            list(history.cross.T),
+        ))
+
+    # np.convolve suma cada ventana en otro orden que el producto escalar de
+    # la referencia: los resultados coinciden dentro de --rtol, no bit a bit.
+    # Un NaN a mitad de serie cubre las ventanas que lo contienen.
+    sample = [c.copy() for c in closes[:PARITY_SYMBOLS]]
+    for c in sample:
+        c.iloc[len(c) // 2] = float("nan")
+    for period in PARITY_PERIODS:
+        comparisons.append(compare(
+            f"wma vs reference.wma (period={period}, con NaN)",
+            [reference.wma(c, period) for c in sample],
+            [wma(c, period) for c in sample],
+            rtol=args.rtol,
+        ))
+
+    return results, comparisons
+
+
+def print_report(args: argparse.Namespace, results: list[BenchResult], comparisons: list[Comparison]) -> None:
+    print(f"Universo sintetico: {args.symbols} simbolos x {args.bars} sesiones (seed={args.seed})")
+    print()
+    print(f"{'caso':<38} {'us/llamada':>12} {'barras/s':>14} {'mejor (s)':>10} {'pico mem':>11}")
+    for r in results:
+        print(
+            f"{r.name:<38} {r.secs_per_call * 1e6:>12.1f} {r.bars_per_sec:>14,.0f} "
+            f"{r.best_secs:>10.4f} {format_bytes(r.peak_mem_bytes):>11}"
+        )
+
+    print()
+    print(f"{'comparacion':<70} {'igual':>6} {'exacta':>7} {'max |diff|':>11}")
+    for c in comparisons:
+        print(f"{c.name:<70} {str(c.equal):>6} {str(c.exact):>7} {c.max_abs_diff:>11.3g}")
+
+
+def main() -> None:
+    args = parse_args()
+
+    # Los kernels registran una linea INFO por llamada: silenciarlos para no medir el logging
+    for name in ("wma_indicator", "golden_cross_signal"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    results, comparisons = run(args)
+    print_report(args, results, comparisons)
+
+    if args.json:
+        payload = {
+            "config": vars(args),
+            "results": [r.to_dict() for r in results],
+            "comparisons": [c.to_dict() for c in comparisons],
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+
+    if not all(c.equal for c in comparisons):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Benchmark de extremo a extremo del escaneo diario sin red.
+
+Ejecuta main.main() completo (universo, descarga, WMA, deteccion de
+cruces, save_event, plot_golden_cross y correo) sobre un universo
+sintetico de varios miles de simbolos:
+
+- el universo se resuelve desde una lista manual (data/universes/manual),
+- yfinance se sustituye por benchmarks/stubs.SyntheticYahoo,
+- el correo sale por la bandeja de salida con EMAIL_TRANSPORT=file.
+
+Todo se ejecuta en un directorio de trabajo temporal. Informa de simbolos
+por segundo, desglose de tiempo por etapa y bytes escritos en disco.
+
+Uso (desde la raiz del proyecto):
+    python benchmarks/bench_scan.py
+    python benchmarks/bench_scan.py --symbols 5000 --workers 8 --json bench_output.json
+"""
+
+import argparse
+import functools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_PATH = PROJECT_ROOT / "src"
+
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
+
+from harness import format_bytes
+from stubs import SyntheticYahoo, install_yfinance_stub
+from synthetic import synthetic_symbols
+
+
+MARKET_NAME = "synthetic"
+
+BENCH_ENV = {
+    "EMAIL_ENABLED": "true",
+    "EMAIL_TRANSPORT": "file",
+    "SMTP_HOST": "localhost",
+    "SMTP_USER": "bench",
+    "SMTP_PASSWORD": "bench",
+    "EMAIL_FROM": "bench@localhost",
+    "EMAIL_TO_ALERTS": "alerts@localhost",
+    "EMAIL_TO_ERRORS": "errors@localhost",
+    "PRICE_STORE_ENABLED": "true",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark offline de extremo a extremo de main.main()")
+    parser.add_argument("--symbols", type=int, default=3000, help="Simbolos del universo sintetico")
+    parser.add_argument("--bars", type=int, default=2600, help="Sesiones de historico por simbolo")
+    parser.add_argument("--date", default="2025-12-31", help="Fecha de ejecucion (dia habil, YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--engine", choices=["symbol", "matrix"], default="symbol")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="Procesos para la etapa de calculo (main.py --processes)",
+    )
+    parser.add_argument(
+        "--pairs",
+        default="",
+        help="Pares WMA adicionales corto:largo separados por comas (signals.golden_cross_wma.pairs)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Directorio de trabajo (por defecto uno temporal)")
+    parser.add_argument("--keep", action="store_true", help="No borrar el directorio de trabajo temporal")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar el log de la ejecucion")
+    parser.add_argument("--json", help="Guardar resultados en este fichero JSON")
+    return parser.parse_args()
+
+
+class StageTimer:
+    """
+    Acumula tiempo y numero de llamadas por etapa envolviendo funciones.
+    Las etapas que corren en los workers suman el tiempo de todos los hilos.
+    """
+
+    def __init__(self) -> None:
+        self.totals: dict[str, float] = defaultdict(float)
+        self.counts: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def patch(self, module, attr: str, stage: str) -> None:
+        fn = getattr(module, attr)
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - t0)
+
+        setattr(module, attr, timed)
+
+    def add(self, stage: str, secs: float) -> None:
+        with self._lock:
+            self.totals[stage] += secs
+            self.counts[stage] += 1
+
+
+def prepare_workdir(workdir: Path, symbols: list[str], pairs: str = "") -> None:
+    with open(PROJECT_ROOT / "config" / "config.yaml", "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    config["markets"] = [{"name": MARKET_NAME, "mode": "all"}]
+    config["blacklist"] = {"symbols": []}
+    if pairs:
+        config["signals"]["golden_cross_wma"]["pairs"] = [
+            [int(p) for p in item.split(":")] for item in pairs.split(",")
+        ]
+
+    (workdir / "config").mkdir(parents=True, exist_ok=True)
+    with open(workdir / "config" / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+    manual_dir = workdir / "data" / "universes" / "manual"
+    manual_dir.mkdir(parents=True, exist_ok=True)
+    (manual_dir / f"{MARKET_NAME}.txt").write_text("\n".join(symbols) + "\n", encoding="utf-8")
+
+
+def disk_usage(workdir: Path) -> dict[str, int]:
+    """
+    Bytes en disco por subdirectorio de data/ (y logs/), sin contar la
+    configuracion ni la lista manual preparadas por el benchmark.
+    """
+
+    usage: dict[str, int] = defaultdict(int)
+    for path in workdir.rglob("*"):
+        if not path.is_file():
+            continue
+        rel = path.relative_to(workdir).parts
+        if rel[0] == "config" or rel[:3] == ("data", "universes", "manual"):
+            continue
+        key = "/".join(rel[:2]) if rel[0] == "data" and len(rel) > 2 else rel[0]
+        usage[key] += path.stat().st_size
+    return dict(sorted(usage.items()))
+
+
+def run(args: argparse.Namespace, workdir: Path) -> dict:
+    symbols = synthetic_symbols(args.symbols)
+    prepare_workdir(workdir, symbols, args.pairs)
+
+    os.environ.update(BENCH_ENV)
+    if not args.verbose:
+        # Se lee al importar utils.logger: tiene que fijarse antes de importar main
+        os.environ["LOG_CONSOLE"] = "false"
+    os.chdir(workdir)
+
+    source = SyntheticYahoo(symbols, n_bars=args.bars, end=args.date, seed=args.seed)
+    install_yfinance_stub(source)
+
+    timer = StageTimer()
+
+    t0 = time.perf_counter()
+    from wma_cross_alerts import main as app
+    from wma_cross_alerts.core import scan
+    timer.add("import_main", time.perf_counter() - t0)
+
+    # plotter (matplotlib) se importa de forma diferida con el primer cruce;
+    # aqui se importa antes para poder envolverlo y se contabiliza aparte
+    t0 = time.perf_counter()
+    from wma_cross_alerts.reporting import plotter
+    timer.add("import_plotter", time.perf_counter() - t0)
+
+    timer.patch(scan, "get_universes", "universe")
+    timer.patch(scan, "fetch_daily_close_many", "fetch")
+    # Los motores viven en core.scan. La etapa de calculo depende del motor: evaluate_symbol (symbol) o
+    # evaluate_batch_matrix (matrix) en los hilos, o evaluate_market_processes
+    # (--processes) en el hilo principal mientras reparte el mercado
+    timer.patch(scan, "evaluate_symbol", "evaluate")
+    timer.patch(scan, "evaluate_batch_matrix", "evaluate")
+    timer.patch(scan, "evaluate_market_processes", "evaluate_procs")
+    timer.patch(app, "save_event", "save_event")
+    timer.patch(plotter, "plot_golden_cross", "plot")
+    timer.patch(app, "send_notifications", "notify")
+    timer.patch(app, "drain_outbox", "outbox_drain")
+
+    sys.argv = [
+        "main",
+        "--date", args.date,
+        "--workers", str(args.workers),
+        "--batch-size", str(args.batch_size),
+        "--engine", args.engine,
+        "--processes", str(args.processes),
+    ]
+
+    t0 = time.perf_counter()
+    app.main()
+    wall = time.perf_counter() - t0
+
+    events = [p for p in (workdir / "data" / "events").rglob("*.json")]
+    charts = list((workdir / "data" / "charts").rglob("*.png"))
+    emails = list((workdir / "data" / "outbox" / "sink").glob("*.eml"))
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("workdir", "json")},
+        "wall_secs": wall,
+        "symbols_per_sec": args.symbols / wall if wall > 0 else float("inf"),
+        "stages": {
+            stage: {"secs": timer.totals[stage], "calls": timer.counts[stage]}
+            for stage in timer.totals
+        },
+        "download_calls": source.calls,
+        "tickers_requested": source.tickers_requested,
+        "events": len(events),
+        "charts": len(charts),
+        "emails": len(emails),
+        "bytes_written": disk_usage(workdir),
+    }
+
+
+def print_report(result: dict) -> None:
+    cfg = result["config"]
+    engine = f"matrix en {cfg['processes']} proceso(s)" if cfg["processes"] else cfg["engine"]
+    print(
+        f"Universo sintetico: {cfg['symbols']} simbolos x {cfg['bars']} sesiones, "
+        f"fecha {cfg['date']}, {cfg['workers']} worker(s), lotes de {cfg['batch_size']}, motor {engine}"
+    )
+    print()
+    print(f"Tiempo total main():  {result['wall_secs']:.2f} s")
+    print(f"Throughput:           {result['symbols_per_sec']:,.0f} simbolos/s")
+    print(f"Descargas (stub):     {result['download_calls']} llamadas, {result['tickers_requested']} tickers")
+    print(f"Cruces registrados:   {result['events']} eventos, {result['charts']} graficas, {result['emails']} correos")
+    print()
+    print(f"{'etapa':<16} {'segundos':>10} {'llamadas':>9}")
+    for stage, data in result["stages"].items():
+        print(f"{stage:<16} {data['secs']:>10.3f} {data['calls']:>9}")
+    print("(fetch y evaluate corren en los workers: suman el tiempo de todos los hilos;")
+    print(" evaluate_procs es el tiempo real de la etapa de calculo en procesos, por mercado)")
+    print()
+    print(f"{'bytes escritos':<24} {'tamano':>12}")
+    for key, size in result["bytes_written"].items():
+        print(f"{key:<24} {format_bytes(size):>12}")
+    print(f"{'total':<24} {format_bytes(sum(result['bytes_written'].values())):>12}")
+
+
+def main() -> None:
+    args = parse_args()
+
+    json_path = Path(args.json).resolve() if args.json else None
+
+    if args.workdir:
+        workdir = Path(args.workdir).resolve()
+        workdir.mkdir(parents=True, exist_ok=True)
+        cleanup = False
+    else:
+        workdir = Path(tempfile.mkdtemp(prefix="wma_bench_scan_"))
+        cleanup = not args.keep
+
+    try:
+        result = run(args, workdir)
+    finally:
+        os.chdir(PROJECT_ROOT)
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            print(f"Directorio de trabajo: {workdir}")
+
+    print_report(result)
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Utilidades comunes de medicion: tiempo por llamada, throughput, pico de
+memoria y comparacion numerica entre dos implementaciones.
+"""
+
+import gc
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class BenchResult:
+    name: str
+    calls: int              # llamadas al kernel por pasada (p.ej. una por simbolo)
+    repeat: int
+    best_secs: float        # mejor pasada completa
+    median_secs: float
+    peak_mem_bytes: int     # pico de memoria de una pasada (tracemalloc)
+    bars: int               # barras procesadas por pasada
+
+    @property
+    def secs_per_call(self) -> float:
+        return self.best_secs / self.calls if self.calls else float("nan")
+
+    @property
+    def bars_per_sec(self) -> float:
+        return self.bars / self.best_secs if self.best_secs > 0 else float("inf")
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["secs_per_call"] = self.secs_per_call
+        data["bars_per_sec"] = self.bars_per_sec
+        return data
+
+
+@dataclass
+class Comparison:
+    name: str
+    equal: bool
+    exact: bool
+    max_abs_diff: float
+    mismatches: int         # posiciones distintas (incluye NaN en un solo lado)
+    size: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def bench(
+    name: str,
+    fn: Callable[[], Any],
+    *,
+    calls: int,
+    bars: int,
+    repeat: int = 5,
+) -> BenchResult:
+    """
+    Ejecuta fn() repeat veces midiendo el tiempo de cada pasada y, aparte,
+    una pasada bajo tracemalloc para el pico de memoria (tracemalloc
+    ralentiza, por eso no se mezcla con la medicion de tiempos).
+    """
+
+    fn()  # calentamiento (caches, imports diferidos)
+
+    timings = []
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchResult(
+        name=name,
+        calls=calls,
+        repeat=len(timings),
+        best_secs=min(timings),
+        median_secs=float(np.median(timings)),
+        peak_mem_bytes=peak,
+        bars=bars,
+    )
+
+
+def compare(
+    name: str,
+    expected: Any,
+    actual: Any,
+    *,
+    rtol: float = 1e-9,
+    atol: float = 1e-12,
+) -> Comparison:
+    """
+    Compara dos resultados (escalares, ndarray o Series/listas de ellos).
+    Los NaN cuentan como iguales si aparecen en la misma posicion.
+    """
+
+    a = _as_array(expected)
+    b = _as_array(actual)
+
+    if a.shape != b.shape:
+        return Comparison(name, False, False, float("inf"), max(a.size, b.size), max(a.size, b.size))
+
+    if a.dtype == bool or b.dtype == bool:
+        mismatches = int(np.count_nonzero(a != b))
+        return Comparison(name, mismatches == 0, mismatches == 0, float(mismatches > 0), mismatches, a.size)
+
+    a = a.astype("float64")
+    b = b.astype("float64")
+
+    both_nan = np.isnan(a) & np.isnan(b)
+    close = np.isclose(a, b, rtol=rtol, atol=atol) | both_nan
+    exact = bool(np.all((a == b) | both_nan))
+
+    diff = np.abs(a - b)[~np.isnan(a) & ~np.isnan(b)]
+    max_abs = float(diff.max()) if diff.size else 0.0
+
+    mismatches = int(np.count_nonzero(~close))
+    return Comparison(name, mismatches == 0, exact, max_abs, mismatches, a.size)
+
+
+def _as_array(value: Any) -> np.ndarray:
+    if isinstance(value, (list, tuple)):
+        parts = [_as_array(v).reshape(-1) for v in value]
+        return np.concatenate(parts) if parts else np.array([])
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return value.to_numpy()
+    return np.asarray(value)
+
+
+def format_bytes(n: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(n) < 1024 or unit == "GiB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+    return f"{n:.1f} GiB"
@@ -0,0 +1,45 @@
+"""
+Implementaciones de referencia (las originales del proyecto) para medir
+la linea base y comprobar la igualdad numerica de las reescrituras.
+
+No se usan en produccion.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def wma(series: pd.Series, period: int) -> pd.Series:
+    """
+    WMA original: rolling().apply con un producto escalar por ventana.
+    """
+
+    weights = np.arange(1, period + 1, dtype=float)
+    weight_sum = weights.sum()
+
+    def _calc(prices: np.ndarray) -> float:
+        return float(np.dot(prices, weights) / weight_sum)
+
+    out = series.rolling(window=period, min_periods=period).apply(_calc, raw=True)
+    out.name = f"WMA{period}"
+    return out
+
+
+def detect_cross_up(wma_short: pd.Series, wma_long: pd.Series) -> pd.Series:
+    prev_condition = wma_short.shift(1) <= wma_long.shift(1)
+    curr_condition = wma_short > wma_long
+    return prev_condition & curr_condition
+
+
+def last_cross_up(wma_short: pd.Series, wma_long: pd.Series) -> bool:
+    """
+    last_cross_up original: construye la Series booleana de todo el
+    historico para leer solo la ultima posicion.
+    """
+
+    cross_up = detect_cross_up(wma_short, wma_long)
+
+    if cross_up.empty:
+        return False
+
+    return bool(cross_up.iloc[-1])
@@ -0,0 +1,85 @@
+"""
+Sustitutos locales de los servicios externos para los benchmarks de
+extremo a extremo: un modulo `yfinance` que sirve cierres sinteticos.
+
+El correo no necesita stub: con EMAIL_TRANSPORT=file la bandeja de salida
+escribe cada mensaje en data/outbox/sink/ en lugar de enviarlo por SMTP.
+"""
+
+import sys
+import threading
+import types
+
+import pandas as pd
+
+from synthetic import random_walk_close, symbol_seed
+
+
+class SyntheticYahoo:
+    """
+    Fuente de datos con la misma firma que yf.download que la usada por
+    data_sources.yahoo. Cada simbolo es un paseo aleatorio determinista de
+    n_bars sesiones que termina en end.
+    """
+
+    def __init__(self, symbols: list[str], *, n_bars: int, end: str, seed: int = 0) -> None:
+        self.symbols = set(symbols)
+        self.n_bars = n_bars
+        self.end = end
+        self.seed = seed
+        self.calls = 0
+        self.tickers_requested = 0
+        self._cache: dict[str, pd.Series] = {}
+        self._lock = threading.Lock()
+
+    def close(self, symbol: str) -> pd.Series | None:
+        if symbol not in self.symbols:
+            return None
+        with self._lock:
+            series = self._cache.get(symbol)
+        if series is None:
+            series = random_walk_close(self.n_bars, seed=symbol_seed(symbol, self.seed), end=self.end)
+            with self._lock:
+                self._cache[symbol] = series
+        return series
+
+    def download(self, tickers, start=None, end=None, **kwargs) -> pd.DataFrame:
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+
+        with self._lock:
+            self.calls += 1
+            self.tickers_requested += len(tickers)
+
+        columns = {}
+        for ticker in tickers:
+            series = self.close(ticker)
+            if series is None:
+                continue
+            if start:
+                series = series[series.index >= pd.Timestamp(start)]
+            if end:
+                series = series[series.index < pd.Timestamp(end)]
+            columns[ticker] = series
+
+        if not columns:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(columns)
+        if len(tickers) == 1 and kwargs.get("multi_level_index") is False:
+            return pd.DataFrame({"Close": df[tickers[0]]})
+
+        df.columns = pd.MultiIndex.from_product([["Close"], df.columns], names=["Price", "Ticker"])
+        return df
+
+
+def install_yfinance_stub(source: SyntheticYahoo) -> types.ModuleType:
+    """
+    Registra un modulo `yfinance` falso en sys.modules. data_sources.yahoo
+    importa yfinance de forma diferida, asi que basta con hacerlo antes de
+    la primera descarga.
+    """
+
+    module = types.ModuleType("yfinance")
+    module.download = source.download
+    sys.modules["yfinance"] = module
+    return module
@@ -0,0 +1,79 @@
+"""
+Generador de precios sinteticos para los benchmarks.
+
+Paseos aleatorios geometricos en dias habiles, deterministas por
+(seed, simbolo): la misma configuracion produce siempre las mismas series,
+asi que los resultados de dos ejecuciones (antes/despues de un cambio) son
+comparables.
+"""
+
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_START = "2000-01-03"
+
+
+def random_walk_close(
+    n_bars: int,
+    *,
+    seed: int = 0,
+    start: str = DEFAULT_START,
+    end: str | None = None,
+    start_price: float = 100.0,
+    drift: float = 0.0003,
+    volatility: float = 0.02,
+) -> pd.Series:
+    """
+    Serie de cierres de n_bars sesiones (dias habiles desde start, o hasta
+    end si se indica) siguiendo un paseo aleatorio geometrico. Mismo formato
+    que fetch_daily_close.
+    """
+
+    rng = np.random.default_rng(seed)
+    log_returns = rng.normal(drift, volatility, n_bars)
+    close = start_price * np.exp(np.cumsum(log_returns))
+
+    index = business_days(n_bars, start=start, end=end)
+    return pd.Series(close, index=index, name="Close")
+
+
+@lru_cache(maxsize=32)
+def business_days(n_bars: int, *, start: str = DEFAULT_START, end: str | None = None) -> pd.DatetimeIndex:
+    # bdate_range(end=...) genera las fechas en Python: se calcula una vez
+    # por configuracion (un DatetimeIndex es inmutable y se puede compartir)
+    if end is not None:
+        return pd.bdate_range(end=end, periods=n_bars, name="Date")
+    return pd.bdate_range(start=start, periods=n_bars, name="Date")
+
+
+def symbol_seed(symbol: str, seed: int = 0) -> int:
+    # crc32 y no hash(): hash() de str cambia entre procesos
+    return zlib.crc32(symbol.encode("utf-8")) ^ seed
+
+
+def synthetic_symbols(n_symbols: int, prefix: str = "SYN") -> list[str]:
+    width = len(str(max(n_symbols - 1, 0)))
+    return [f"{prefix}{i:0{width}d}" for i in range(n_symbols)]
+
+
+def synthetic_universe(
+    n_symbols: int,
+    n_bars: int,
+    *,
+    seed: int = 0,
+    prefix: str = "SYN",
+    start: str = DEFAULT_START,
+    end: str | None = None,
+) -> dict[str, pd.Series]:
+    """
+    Devuelve {simbolo: cierres} para n_symbols simbolos de n_bars sesiones.
+    """
+
+    return {
+        symbol: random_walk_close(n_bars, seed=symbol_seed(symbol, seed), start=start, end=end)
+        for symbol in synthetic_symbols(n_symbols, prefix)
+    }
@@ -0,0 +1,105 @@
+from pathlib import Path
+import sys
+import argparse
+
+# ---------------------------------------------------------
+# Ajuste de path para permitir ejecutar el script directamente
+# ---------------------------------------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_PATH = PROJECT_ROOT / "src"
+
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
+
+# ---------------------------------------------------------
+# Imports del proyecto
+# ---------------------------------------------------------
+from wma_cross_alerts.utils.logger import get_logger
+from wma_cross_alerts.core.settings import load_config
+from wma_cross_alerts.data_sources.price_archive import ARCHIVE_DTYPES, build_archive
+from wma_cross_alerts.data_sources.price_store import load_close
+from wma_cross_alerts.data_sources.yahoo import fetch_daily_close_many
+from wma_cross_alerts.core.scan import resolve_symbols
+
+
+logger = get_logger("build_price_archive")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Construye el archivo compacto de cierres (data/archive/<mercado>/)"
+    )
+    parser.add_argument(
+        "--market",
+        action="append",
+        help="Mercado de config.yaml (repetible; por defecto todos)",
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=ARCHIVE_DTYPES,
+        default="float32",
+        help="Precision de los cierres en el archivo",
+    )
+    parser.add_argument(
+        "--start",
+        type=str,
+        default="2000-01-01",
+        help="Fecha inicio YYYY-MM-DD (al descargar)",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Usar solo el historico local (data/prices), sin descargar lo que falte",
+    )
+    parser.add_argument("--batch-size", type=int, default=100, help="Simbolos por descarga")
+    return parser.parse_args()
+
+
+def run(market: dict, *, dtype: str, start: str, offline: bool, batch_size: int) -> None:
+    market_name = market["name"]
+    symbols = resolve_symbols(market)
+
+    if offline:
+        closes = {}
+        for symbol in symbols:
+            stored = load_close(symbol)
+            if stored is not None:
+                closes[symbol] = stored.close
+    else:
+        closes = fetch_daily_close_many(symbols, start=start, batch_size=batch_size)
+
+    closes = {symbol: close for symbol, close in closes.items() if not close.empty}
+    missing = len(symbols) - len(closes)
+    if missing:
+        logger.warning(f"{market_name}: {missing} simbolo(s) sin cierres quedan fuera del archivo")
+
+    if not closes:
+        logger.error(f"{market_name}: no hay cierres con los que construir el archivo")
+        return
+
+    build_archive(market_name, closes, dtype=dtype)
+
+
+def main() -> None:
+    args = parse_args()
+    config = load_config()
+
+    markets = [
+        m for m in config["markets"]
+        if not args.market or m["name"] in args.market
+    ]
+    if not markets:
+        raise SystemExit(f"Mercado no encontrado en config.yaml: {args.market}")
+
+    for market in markets:
+        run(
+            market,
+            dtype=args.dtype,
+            start=args.start,
+            offline=args.offline,
+            batch_size=args.batch_size,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Mide el coste de arranque de wma_cross_alerts.main con `python -X importtime`
+y falla si supera el presupuesto o si al importar se cargan dependencias
+pesadas que solo deben cargarse bajo demanda (matplotlib, yfinance, ...).
+
+Uso:
+    ./venv/bin/python scripts/check_import_time.py [--budget-ms 800] [--top 15]
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger("check_import_time")
+
+MODULE = "wma_cross_alerts.main"
+
+# Modulos que no deben cargarse solo por importar main
+LAZY_MODULES = ["matplotlib", "yfinance", "requests", "smtplib", "ssl"]
+
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "800"))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importacion de wma_cross_alerts.main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Presupuesto en milisegundos")
+    parser.add_argument("--top", type=int, default=15, help="Numero de modulos mas lentos a mostrar")
+    return parser.parse_args()
+
+
+def measure(env: dict) -> tuple[list[tuple[int, int, str]], list[str]]:
+    """
+    Importa MODULE en un proceso limpio (y en un directorio temporal, para
+    comprobar de paso que importar no crea ficheros). Devuelve las filas de
+    importtime (self_us, cumulative_us, modulo) y los modulos perezosos cargados.
+    """
+
+    code = (
+        f"import sys, {MODULE}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        created = sorted(p.name for p in Path(cwd).iterdir())
+
+    if proc.returncode != 0:
+        logger.error(proc.stderr)
+        sys.exit(proc.returncode)
+
+    if created:
+        logger.error(f"Importar {MODULE} ha creado ficheros/directorios: {created}")
+        sys.exit(1)
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return rows, loaded
+
+
+def main():
+    args = parse_args()
+
+    env = os.environ.copy()
+    src_path = Path(__file__).resolve().parents[1] / "src"
+    env["PYTHONPATH"] = str(src_path) + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+
+    rows, loaded = measure(env)
+
+    total_ms = next(cum for _, cum, name in rows if name.strip() == MODULE) / 1000
+
+    # Nivel de anidamiento = espacios iniciales: 1 para el modulo raiz, +2 por nivel
+    top_level = [r for r in rows if len(r[2]) - len(r[2].lstrip()) <= 3]
+
+    logger.info("Modulos mas lentos (acumulado):")
+    for _, cum, name in sorted(top_level, reverse=True, key=lambda r: r[1])[:args.top]:
+        logger.info(f"  {cum / 1000:8.1f} ms  {name.strip()}")
+
+    failed = False
+
+    if loaded:
+        logger.error(f"Dependencias pesadas cargadas al importar: {loaded}")
+        failed = True
+
+    if total_ms > args.budget_ms:
+        logger.error(f"Importar {MODULE}: {total_ms:.0f} ms (presupuesto {args.budget_ms:.0f} ms)")
+        failed = True
+    else:
+        logger.info(f"Importar {MODULE}: {total_ms:.0f} ms (presupuesto {args.budget_ms:.0f} ms)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
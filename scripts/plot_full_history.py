@@ -15,6 +15,7 @@ if str(SRC_PATH) not in sys.path:
 # Imports del proyecto
 # ---------------------------------------------------------
 from wma_cross_alerts.utils.logger import get_logger
+from wma_cross_alerts.data_sources.price_archive import open_archive
 from wma_cross_alerts.data_sources.yahoo import fetch_daily_close
 from wma_cross_alerts.indicators.wma import wma
 from wma_cross_alerts.signals.golden_cross_wma import detect_cross_up
@@ -40,6 +41,12 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Fecha fin YYYY-MM-DD",
     )
+    parser.add_argument(
+        "--archive",
+        type=str,
+        default=None,
+        help="Leer los cierres del archivo compacto de este mercado (data/archive) en vez de descargarlos",
+    )
     return parser.parse_args()
 
 
@@ -47,10 +54,21 @@ def run(
     symbol: str,
     start: str,
     end: str | None,
+    archive: str | None = None,
 ) -> None:
-    logger.info(f"Descargando historico completo para {symbol}")
-
-    close = fetch_daily_close(symbol, start=start, end=end)
+    if archive is not None:
+        prices = open_archive(archive)
+        if prices is None:
+            raise RuntimeError(f"No existe el archivo de precios de {archive}")
+
+        logger.info(f"Leyendo historico completo de {symbol} del archivo de {archive}")
+        # end es exclusivo, como en fetch_daily_close
+        close = prices.close(symbol, start=start, end=end)
+        if end is not None:
+            close = close[close.index < end]
+    else:
+        logger.info(f"Descargando historico completo para {symbol}")
+        close = fetch_daily_close(symbol, start=start, end=end)
 
     if close.empty:
         raise RuntimeError("No se han obtenido datos")
@@ -94,6 +112,7 @@ def main() -> None:
         symbol=args.symbol,
         start=args.start,
         end=args.end,
+        archive=args.archive,
     )
 
 
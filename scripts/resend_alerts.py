@@ -25,8 +25,10 @@ if str(SRC_PATH) not in sys.path:
     sys.path.insert(0, str(SRC_PATH))
 
 from wma_cross_alerts.utils.logger import get_logger
-from wma_cross_alerts.persistence.storage import load_events
-from wma_cross_alerts.notifiers.email import send_cross_alert_email
+from wma_cross_alerts.core.settings import load_config, wma_pairs
+from wma_cross_alerts.persistence.event_index import query_events
+from wma_cross_alerts.notifiers.email import close_mailer, send_cross_alert_email
+from wma_cross_alerts.notifiers.outbox import drain as drain_outbox
 
 logger = get_logger("resend_alerts")
 
@@ -40,6 +42,16 @@ def find_chart(market: str, symbol: str, date: str) -> str | None:
     return str(chart_path) if chart_path.exists() else None
 
 
+def event_periods(event: dict, configured: dict[str, tuple[int, int]]) -> tuple[int, int]:
+    """
+    Periodos (corta, larga) del cruce. Los eventos anteriores a los pares
+    multiples no los guardan: se usan los configurados para su senal.
+    """
+    if "period_short" in event and "period_long" in event:
+        return int(event["period_short"]), int(event["period_long"])
+    return configured[event["signal"]]
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Re-enviar email de alertas Golden Cross para una fecha"
@@ -64,57 +76,50 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
-
-    # Validar formato de fecha
-    try:
-        datetime.strptime(args.date, "%Y-%m-%d")
-    except ValueError:
-        print(f"Error: fecha '{args.date}' no tiene el formato YYYY-MM-DD")
-        sys.exit(1)
-
-    logger.info("=" * 60)
-    logger.info(f"CONSULTA DE CRUCES PARA FECHA: {args.date}")
-    if args.market:
-        logger.info(f"Filtrando por mercado: {args.market}")
-    if args.dry_run:
-        logger.info("MODO DRY-RUN: no se enviará email")
-    logger.info("=" * 60)
-
-    # Cargar todos los eventos del signal (filtrando por market si se indicó)
-    events = load_events(
-        signal=SIGNAL_NAME,
-        market=args.market,
-    )
+def resend_for_date(
+    date: str,
+    events: list[dict],
+    *,
+    dry_run: bool = False,
+) -> int:
+    """
+    Muestra y re-envia los cruces de events registrados en date.
+    Devuelve el numero de cruces encontrados.
+    """
 
     # Filtrar por la fecha pedida
-    day_events = [e for e in events if e.get("date") == args.date]
+    day_events = [e for e in events if e.get("date") == date]
 
     if not day_events:
-        logger.info(f"No se encontraron cruces registrados para {args.date}")
-        print(f"\n⚠️  No hay cruces guardados para {args.date}")
-        return
+        logger.info(f"No se encontraron cruces registrados para {date}")
+        print(f"\n⚠️  No hay cruces guardados para {date}")
+        return 0
 
     logger.info(f"Cruces encontrados: {len(day_events)}")
 
+    configured = {pair.signal: pair.periods for pair in wma_pairs(load_config())}
+
     # Construir la lista de cruces con la ruta del chart si existe
     crosses = []
     for e in day_events:
         chart_path = find_chart(e["market"], e["symbol"], e["date"])
+        period_short, period_long = event_periods(e, configured)
         crosses.append({
             "symbol": e["symbol"],
             "market": e["market"],
+            "signal": e["signal"],
             "date": e["date"],
             "difference": e.get("difference", 0.0),
             "wma_short": e.get("wma_short", 0.0),
             "wma_long": e.get("wma_long", 0.0),
+            "period_short": period_short,
+            "period_long": period_long,
             "chart_path": chart_path,
         })
 
     # Mostrar resumen en consola siempre
     print(f"\n{'='*60}")
-    print(f"  Golden Crosses registrados para {args.date}")
+    print(f"  Golden Crosses registrados para {date}")
     print(f"{'='*60}")
     for i, c in enumerate(crosses, 1):
         chart_status = "✅ chart" if c["chart_path"] else "❌ sin chart"
@@ -123,20 +128,60 @@ def main() -> None:
     print(f"  Total: {len(crosses)} cruces")
     print(f"{'='*60}\n")
 
-    if args.dry_run:
+    if dry_run:
         logger.info("Dry-run completado. Sin envío de email.")
-        return
+        return len(crosses)
 
-    # Re-enviar email
+    # Re-enviar email (la sesion SMTP se comparte entre fechas)
     logger.info("Enviando email de re-notificación...")
-    send_cross_alert_email(
-        exec_date=args.date,
+    # force: un reenvio pedido a mano no se descarta aunque ya se enviara
+    # el mismo correo (clave de idempotencia de la bandeja de salida)
+    queued = send_cross_alert_email(
+        exec_date=date,
         golden_crosses=crosses,
         invalid_symbols=[],
         processing_errors=[],
         mode="resend",
+        force=True,
     )
-    logger.info("Email de re-notificación enviado correctamente.")
+    if queued:
+        logger.info("Email de re-notificación encolado correctamente.")
+    else:
+        logger.warning("Email de re-notificación NO encolado (ver avisos anteriores).")
+    return len(crosses)
+
+
+def main() -> None:
+    args = parse_args()
+
+    # Validar formato de fecha
+    try:
+        datetime.strptime(args.date, "%Y-%m-%d")
+    except ValueError:
+        print(f"Error: fecha '{args.date}' no tiene el formato YYYY-MM-DD")
+        sys.exit(1)
+
+    logger.info("=" * 60)
+    logger.info(f"CONSULTA DE CRUCES PARA FECHA: {args.date}")
+    if args.market:
+        logger.info(f"Filtrando por mercado: {args.market}")
+    if args.dry_run:
+        logger.info("MODO DRY-RUN: no se enviará email")
+    logger.info("=" * 60)
+
+    # Solo los eventos de la fecha (filtrados en el indice, sin recorrer los JSON)
+    events = query_events(
+        signal=SIGNAL_NAME,
+        market=args.market,
+        date_from=args.date,
+        date_to=args.date,
+    )
+
+    try:
+        resend_for_date(args.date, events, dry_run=args.dry_run)
+    finally:
+        drain_outbox()
+        close_mailer()
 
 
 if __name__ == "__main__":
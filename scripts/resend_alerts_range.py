@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 import argparse
-import subprocess
 import sys
 import logging
-import os
 from datetime import datetime, timedelta
-from pathlib import Path
+
+from resend_alerts import SIGNAL_NAME, resend_for_date
+from wma_cross_alerts.persistence.event_index import query_events
+from wma_cross_alerts.notifiers.email import close_mailer
+from wma_cross_alerts.notifiers.outbox import drain as drain_outbox
+from wma_cross_alerts.utils.profiling import PROFILE_MODES, profiled
 
 # Configurar logging
 logging.basicConfig(
@@ -21,6 +24,11 @@ def parse_args():
     parser.add_argument("--end", required=True, help="Fecha de fin (YYYY-MM-DD)")
     parser.add_argument("--market", help="Filtrar por mercado (opcional)")
     parser.add_argument("--dry-run", action="store_true", help="Modo prueba sin enviar emails")
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        help="Perfilar el reenvio (cProfile o tracemalloc); resultados en logs/",
+    )
     return parser.parse_args()
 
 def date_range(start_date, end_date):
@@ -43,14 +51,6 @@ def main():
         logger.error("Fecha inicio > fecha fin")
         sys.exit(1)
 
-    # Localizar scripts/resend_alerts.py en el mismo directorio que este script
-    script_path = Path(__file__).resolve().parent / "resend_alerts.py"
-    if not script_path.exists():
-        logger.error(f"No se encuentra el script: {script_path}")
-        sys.exit(1)
-
-    env = os.environ.copy()
-    
     logger.info(f"Iniciando REENVIO por lotes: {start_date} -> {end_date}")
     if args.dry_run: logger.info("MODO DRY-RUN ACTIVADO")
     if args.market: logger.info(f"Mercado filtrado: {args.market}")
@@ -58,28 +58,30 @@ def main():
     success_count = 0
     fail_count = 0
 
-    for single_date in date_range(start_date, end_date):
-        date_str = single_date.strftime("%Y-%m-%d")
-        logger.info(f"=== Procesando fecha: {date_str} ===")
-        
-        cmd = [sys.executable, str(script_path), "--date", date_str]
-        
-        if args.market:
-            cmd.extend(["--market", args.market])
-            
-        if args.dry_run:
-            cmd.append("--dry-run")
-        
+    with profiled(args.profile, "resend_alerts_range"):
+        # Todo el rango en este proceso: los eventos del rango se consultan una
+        # vez en el indice y todas las fechas comparten la misma sesion SMTP.
+        events = query_events(
+            signal=SIGNAL_NAME,
+            market=args.market,
+            date_from=start_date.isoformat(),
+            date_to=end_date.isoformat(),
+        )
+
         try:
-            result = subprocess.run(cmd, check=False, env=env)
-            if result.returncode == 0:
-                success_count += 1
-            else:
-                logger.error(f"❌ Fallo al procesar {date_str} (exit code {result.returncode})")
-                fail_count += 1
-        except Exception as e:
-            logger.error(f"❌ Error inesperado en {date_str}: {e}")
-            fail_count += 1
+            for single_date in date_range(start_date, end_date):
+                date_str = single_date.strftime("%Y-%m-%d")
+                logger.info(f"=== Procesando fecha: {date_str} ===")
+
+                try:
+                    resend_for_date(date_str, events, dry_run=args.dry_run)
+                    success_count += 1
+                except Exception as e:
+                    logger.error(f"❌ Error inesperado en {date_str}: {e}")
+                    fail_count += 1
+        finally:
+            drain_outbox()
+            close_mailer()
             
     logger.info("=" * 50)
     logger.info(f"Resumen de reenvio por lotes:")
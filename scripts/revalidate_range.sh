@@ -2,33 +2,37 @@
 
 # Usage:
 # ./revalidate_range.sh 2026-02-13 2026-02-18
+# ./revalidate_range.sh 2026-02-13 2026-02-18 cpu    # perfilado (cpu|memory), resultados en logs/
 
 START_DATE="$1"
 END_DATE="$2"
+PROFILE="$3"
 
 if [ -z "$START_DATE" ] || [ -z "$END_DATE" ]; then
-  echo "Uso: ./revalidate_range.sh YYYY-MM-DD YYYY-MM-DD"
+  echo "Uso: ./revalidate_range.sh YYYY-MM-DD YYYY-MM-DD [cpu|memory]"
   exit 1
 fi
 
+PROFILE_ARGS=()
+if [ -n "$PROFILE" ]; then
+  PROFILE_ARGS=(--profile "$PROFILE")
+fi
+
 PROJECT_DIR="/opt/wma-cross-alerts"
 PYTHON_BIN="$PROJECT_DIR/venv/bin/python"
 LOG_FILE="$PROJECT_DIR/logs/app.log"
 
-current="$START_DATE"
-
-while [ "$current" != "$(date -d "$END_DATE + 1 day" +%Y-%m-%d)" ]; do
-  echo "Revalidando fecha: $current"
-
-  cd "$PROJECT_DIR" || exit 1
+echo "Revalidando rango: $START_DATE -> $END_DATE"
 
-  "$PYTHON_BIN" -m wma_cross_alerts.main \
-    --date "$current" \
-    --mode revalidation \
-    >> "$LOG_FILE" 2>&1
+cd "$PROJECT_DIR" || exit 1
 
-  current=$(date -d "$current + 1 day" +%Y-%m-%d)
-done
+# Un unico proceso para todo el rango (modo backfill)
+"$PYTHON_BIN" -m wma_cross_alerts.main \
+  --start "$START_DATE" \
+  --end "$END_DATE" \
+  --mode revalidation \
+  "${PROFILE_ARGS[@]}" \
+  >> "$LOG_FILE" 2>&1
 
 echo "Revalidacion completada desde $START_DATE hasta $END_DATE"
 
@@ -3,7 +3,7 @@ import subprocess
 import sys
 import logging
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -19,15 +19,13 @@ def parse_args():
     parser = argparse.ArgumentParser(description="Ejecutar WMA Cross Alerts para un rango de fechas.")
     parser.add_argument("--start", required=True, help="Fecha de inicio (YYYY-MM-DD)")
     parser.add_argument("--end", required=True, help="Fecha de fin (YYYY-MM-DD)")
+    parser.add_argument(
+        "--profile",
+        choices=["cpu", "memory"],
+        help="Perfilar el backfill (cProfile o tracemalloc); resultados en logs/",
+    )
     return parser.parse_args()
 
-def date_range(start_date, end_date):
-    """Generador de fechas desde start_date hasta end_date (inclusive)."""
-    current_date = start_date
-    while current_date <= end_date:
-        yield current_date
-        current_date += timedelta(days=1)
-
 def main():
     # Cargar variables de entorno (necesario si no se ejecuta desde el script .sh)
     load_dotenv()
@@ -56,37 +54,25 @@ def main():
     else:
         env["PYTHONPATH"] = str(src_path)
 
-    logger.info(f"Iniciando ejecucion por lotes desde {start_date} hasta {end_date}")
+    logger.info(f"Iniciando backfill desde {start_date} hasta {end_date}")
     logger.debug(f"PYTHONPATH configurado: {env['PYTHONPATH']}")
-    
-    success_count = 0
-    fail_count = 0
 
-    for single_date in date_range(start_date, end_date):
-        date_str = single_date.strftime("%Y-%m-%d")
-        logger.info(f"=== Procesando fecha: {date_str} ===")
-        
-        # Construir el comando para invocar al modulo principal
-        cmd = [sys.executable, "-m", "wma_cross_alerts.main", "--date", date_str]
-        
-        try:
-            # Ejecutar el subproceso con el entorno modificado
-            subprocess.run(cmd, check=True, env=env)
-            logger.info(f"✅ Ejecucion exitosa para {date_str}")
-            success_count += 1
-        except subprocess.CalledProcessError:
-            logger.error(f"❌ Fallo la ejecucion para {date_str}")
-            fail_count += 1
-        except Exception as e:
-            logger.error(f"❌ Error inesperado para {date_str}: {e}")
-            fail_count += 1
+    # Un unico proceso para todo el rango: cada simbolo se descarga y se
+    # calcula una sola vez (modo backfill de wma_cross_alerts.main)
+    cmd = [
+        sys.executable, "-m", "wma_cross_alerts.main",
+        "--start", start_date.strftime("%Y-%m-%d"),
+        "--end", end_date.strftime("%Y-%m-%d"),
+    ]
+    if args.profile:
+        cmd += ["--profile", args.profile]
 
-    logger.info("=" * 50)
-    logger.info(f"Resumen de ejecucion por lotes:")
-    logger.info(f"Total dias: {success_count + fail_count}")
-    logger.info(f"Exitosos:   {success_count}")
-    logger.info(f"Fallidos:   {fail_count}")
-    logger.info("=" * 50)
+    try:
+        subprocess.run(cmd, check=True, env=env)
+        logger.info(f"✅ Backfill completado: {start_date} -> {end_date}")
+    except subprocess.CalledProcessError as e:
+        logger.error(f"❌ Fallo el backfill {start_date} -> {end_date} (exit code {e.returncode})")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,194 @@
+"""
+Etapa de calculo en procesos (main.py --processes N).
+
+Los hilos del escaneo solo descargan; los cierres de cada mercado se alinean
+una vez en una matriz fechas x simbolos escrita en un .npy mapeado en
+memoria (en /dev/shm, es decir en RAM, si existe) y en orden por columnas.
+Cada tarea del pool recibe la ruta del fichero y un rango de columnas
+[lo, hi): el worker lo abre con mmap_mode="r" y calcula sobre una vista sin
+copia de esas columnas. Los cierres nunca se serializan hacia los procesos
+ni se duplican por worker (todos comparten las mismas paginas) y de vuelta
+solo viajan los resultados por simbolo.
+
+Variables de entorno:
+    PROCESS_COLUMNS_PER_TASK  columnas (simbolos) por tarea (por defecto 256)
+    PROCESS_MATRIX_DIR        directorio de las matrices (por defecto /dev/shm
+                              si existe, si no el temporal del sistema)
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from wma_cross_alerts.signals.golden_cross_matrix import (
+    CloseMatrix,
+    TailScan,
+    scan_cross_up_history_pairs,
+    scan_cross_up_pairs,
+)
+from wma_cross_alerts.utils.logger import get_logger
+
+
+logger = get_logger("process_pool")
+
+COLUMNS_PER_TASK = int(os.getenv("PROCESS_COLUMNS_PER_TASK", "256"))
+
+MATRIX_DIR = os.getenv("PROCESS_MATRIX_DIR", "").strip() or (
+    "/dev/shm" if Path("/dev/shm").is_dir() else None
+)
+
+
+@dataclass(frozen=True)
+class SharedMatrixSpec:
+    """
+    Lo unico que viaja a los workers para localizar la matriz compartida.
+    """
+
+    path: str
+    dates: np.ndarray
+    symbols: tuple[str, ...]
+
+    def open(self, lo: int, hi: int) -> CloseMatrix:
+        """
+        Vista de solo lectura (sin copia) de las columnas [lo, hi).
+        """
+
+        values = np.load(self.path, mmap_mode="r")
+        return CloseMatrix(
+            dates=pd.DatetimeIndex(self.dates),
+            symbols=list(self.symbols[lo:hi]),
+            values=values[:, lo:hi],
+        )
+
+
+class SharedCloseMatrix:
+    """
+    Alinea los cierres de un mercado en un .npy mapeado al construirse; como
+    context manager devuelve el SharedMatrixSpec para los workers y borra el
+    fichero al salir.
+    """
+
+    def __init__(self, closes: Mapping[str, pd.Series]) -> None:
+        self._dir = tempfile.mkdtemp(prefix="wma_matrix_", dir=MATRIX_DIR)
+        path = os.path.join(self._dir, "close.npy")
+
+        try:
+            # Orden por columnas: el rango de cada tarea es un bloque contiguo
+            matrix = CloseMatrix.from_series(
+                closes,
+                alloc=lambda shape: np.lib.format.open_memmap(
+                    path, mode="w+", dtype="float64", shape=shape, fortran_order=True
+                ),
+            )
+            matrix.values.flush()
+        except Exception:
+            self.close()
+            raise
+
+        self.spec = SharedMatrixSpec(
+            path=path,
+            dates=matrix.dates.values,
+            symbols=tuple(matrix.symbols),
+        )
+
+    def close(self) -> None:
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+    def __enter__(self) -> SharedMatrixSpec:
+        return self.spec
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def create_pool(processes: int) -> ProcessPoolExecutor:
+    # spawn y no fork: el proceso principal ya tiene hilos (escaneo, outbox,
+    # logging) y un fork podria heredar sus locks tomados
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def column_ranges(n_columns: int, size: int = COLUMNS_PER_TASK) -> list[tuple[int, int]]:
+    size = max(1, size)
+    return [(lo, min(lo + size, n_columns)) for lo in range(0, n_columns, size)]
+
+
+def scan_tail_columns(
+    spec: SharedMatrixSpec,
+    lo: int,
+    hi: int,
+    pairs: list[tuple[int, int]],
+    date: str,
+) -> dict[tuple[int, int], TailScan]:
+    """
+    Worker: scan_cross_up_pairs sobre las columnas [lo, hi).
+    """
+
+    return scan_cross_up_pairs(spec.open(lo, hi), pairs, date)
+
+
+def scan_history_columns(
+    spec: SharedMatrixSpec,
+    lo: int,
+    hi: int,
+    pairs: list[tuple[int, int]],
+    date_from: str,
+    date_to: str,
+) -> list[tuple[str, tuple[int, int], str, float, float]]:
+    """
+    Worker: scan_cross_up_history_pairs sobre las columnas [lo, hi).
+
+    Las matrices de WMA del historico no vuelven al proceso principal: solo
+    (simbolo, par, fecha, wma_corta, wma_larga) de cada cruce en el rango.
+    """
+
+    matrix = spec.open(lo, hi)
+    scans = scan_cross_up_history_pairs(matrix, pairs)
+
+    out = []
+    for pair, scan in scans.items():
+        rows, cols = scan.cross_positions(date_from, date_to)
+        for row, col in zip(rows, cols):
+            out.append((
+                matrix.symbols[col],
+                pair,
+                matrix.dates[row].strftime("%Y-%m-%d"),
+                float(scan.wma_short[row, col]),
+                float(scan.wma_long[row, col]),
+            ))
+
+    return out
+
+
+def merge_tail_scans(parts: Iterable[dict[tuple[int, int], TailScan]]) -> dict[tuple[int, int], TailScan]:
+    """
+    Une los TailScan de varios rangos de columnas (en orden) en uno por par.
+    """
+
+    parts = list(parts)
+    merged = {}
+    for pair in parts[0]:
+        scans = [part[pair] for part in parts]
+        merged[pair] = TailScan(
+            date=scans[0].date,
+            symbols=[s for scan in scans for s in scan.symbols],
+            bars=np.concatenate([scan.bars for scan in scans]),
+            last_date=pd.DatetimeIndex(np.concatenate([scan.last_date.values for scan in scans])),
+            wma_short=np.concatenate([scan.wma_short for scan in scans]),
+            wma_long=np.concatenate([scan.wma_long for scan in scans]),
+            is_cross=np.concatenate([scan.is_cross for scan in scans]),
+        )
+
+    return merged
@@ -0,0 +1,703 @@
+"""
+Motores de escaneo: descarga por lotes en un pool de hilos y evaluacion del
+Golden Cross de cada simbolo (motor symbol), de cada lote (motor matrix) o
+de cada mercado completo en un pool de procesos (--processes).
+
+main.py solo elige el motor (select_engine) y consume los resultados de
+scan_markets, en orden de envio, para registrar y notificar.
+
+Todas las variantes devuelven un dict por simbolo con "status":
+    evaluacion diaria (exec_date): "invalid", "stale", "no_cross" o "cross"
+    backfill (dates):              "invalid" o "crosses"
+y "error" si fallo la descarga o la evaluacion.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterable, Iterator
+
+import pandas as pd
+
+from wma_cross_alerts.utils.logger import DETAIL, get_logger
+from wma_cross_alerts.utils.run_metrics import incr, stage
+from wma_cross_alerts.core.settings import WmaPair
+from wma_cross_alerts.core.universe import get_universe, get_universes
+from wma_cross_alerts.core.process_pool import (
+    SharedCloseMatrix,
+    column_ranges,
+    create_pool,
+    merge_tail_scans,
+    scan_history_columns,
+    scan_tail_columns,
+)
+from wma_cross_alerts.data_sources.yahoo import fetch_daily_close_many
+from wma_cross_alerts.indicators.wma import wma_many
+from wma_cross_alerts.indicators.wma_state import advance
+from wma_cross_alerts.signals.golden_cross_wma import all_cross_up, is_cross_up, tail_cross_up_many
+from wma_cross_alerts.signals.golden_cross_matrix import (
+    CloseMatrix,
+    TailScan,
+    scan_cross_up_history_pairs,
+    scan_cross_up_pairs,
+)
+from wma_cross_alerts.persistence.indicator_state import load_wma_states, save_wma_states
+
+
+logger = get_logger("scan")
+
+ENGINES = ("symbol", "matrix")
+
+# Inicio del historico descargado (el almacen local solo pide lo que falta)
+HISTORY_START = "2000-01-01"
+
+
+def resolve_symbols(market: dict, universes: dict[str, list[str]] | None = None) -> list[str]:
+    market_name = market["name"]
+    mode = market.get("mode", "list")
+
+    if mode == "all":
+        logger.info(f"Resolviendo universo COMPLETO para mercado {market_name}")
+        if universes is not None and market_name in universes:
+            return universes[market_name]
+        return get_universe(market_name)
+
+    symbols = market.get("symbols", [])
+    logger.info(f"Usando lista explicita de simbolos para {market_name}: {symbols}")
+    return symbols
+
+
+def _cross(result: dict, pair: WmaPair, date: str, wma_short: float, wma_long: float, close: pd.Series) -> dict:
+    return {
+        **result,
+        "status": "cross",
+        "signal": pair.signal,
+        "short_period": pair.short_period,
+        "long_period": pair.long_period,
+        "date": date,
+        "wma_short": float(wma_short),
+        "wma_long": float(wma_long),
+        "difference": float(wma_short - wma_long),
+        # Se reutiliza para la grafica sin volver a descargar
+        "close": close,
+    }
+
+
+def _min_bars(pairs: list[WmaPair]) -> int:
+    # Un simbolo es invalido solo si no alcanza para ningun par
+    return min(pair.long_period for pair in pairs) + 1
+
+
+def _invalid(result: dict) -> dict:
+    logger.warning(f"Datos insuficientes para {result['symbol']}")
+    return {**result, "status": "invalid", "reason": "Datos insuficientes"}
+
+
+def evaluate_symbol(
+    symbol: str,
+    market_name: str,
+    close: pd.Series,
+    *,
+    exec_date: str,
+    pairs: list[WmaPair],
+    mode: str,
+) -> dict:
+    """
+    Evalua el Golden Cross de un simbolo, para cada par de periodos, sobre
+    sus cierres ya descargados.
+
+    No registra eventos ni genera graficas: devuelve un dict con "status"
+    ("invalid", "stale", "no_cross" o "cross") que el hilo principal procesa;
+    con "cross", "crosses" tiene un cruce por cada par que cruza.
+    """
+
+    logger.log(DETAIL, "-" * 70)
+    logger.log(DETAIL, f"MERCADO: {market_name} | EMPRESA: {symbol}")
+    logger.log(DETAIL, "-" * 70)
+
+    result = {"symbol": symbol, "market": market_name}
+
+    if close.empty or len(close) < _min_bars(pairs):
+        return _invalid(result)
+
+    event_date = close.index[-1].strftime("%Y-%m-%d")
+    values: dict[tuple[int, int], tuple[bool, float, float]] = {}
+
+    if mode == "revalidation":
+        # Fechas pasadas: solo las ultimas max(periodos) + 1 barras
+        # (WMA de todos los pares y comprobacion del cruce van juntas)
+        with stage("wma", symbol):
+            values = tail_cross_up_many(close, [pair.periods for pair in pairs])
+    else:
+        # Estado incremental: solo se procesan las barras nuevas, una vez
+        # por periodo aunque aparezca en varios pares
+        periods = sorted({p for pair in pairs for p in pair.periods if len(close) >= p + 1})
+
+        with stage("wma", symbol):
+            states = load_wma_states(symbol)
+            stored_date = max((st.last_date for st in states.values()), default="")
+
+            wmas = {}
+            for period in periods:
+                prev, curr, states[period] = advance(states.get(period), close, period)
+                wmas[period] = (prev, curr)
+
+        with stage("cross_check", symbol):
+            for pair in pairs:
+                if pair.long_period not in wmas or pair.short_period not in wmas:
+                    continue
+                prev_short, wma_short = wmas[pair.short_period]
+                prev_long, wma_long = wmas[pair.long_period]
+                values[pair.periods] = (
+                    is_cross_up(prev_short, prev_long, wma_short, wma_long),
+                    wma_short,
+                    wma_long,
+                )
+
+        # No retroceder el estado al ejecutar fechas pasadas
+        if event_date > stored_date:
+            with stage("state_save", symbol):
+                save_wma_states(symbol, {p: states[p] for p in periods})
+
+    if event_date != exec_date:
+        logger.log(
+            DETAIL,
+            f"Ultimo cierre disponible ({event_date}) no coincide con fecha objetivo ({exec_date})"
+        )
+        return {**result, "status": "stale"}
+
+    crosses = [
+        _cross(result, pair, event_date, values[pair.periods][1], values[pair.periods][2], close)
+        for pair in pairs
+        if pair.periods in values and values[pair.periods][0]
+    ]
+
+    if not crosses:
+        logger.log(DETAIL, f"No hay Golden Cross en el cierre {event_date} para {symbol}")
+        return {**result, "status": "no_cross"}
+
+    return {**result, "status": "cross", "crosses": crosses}
+
+
+def evaluate_symbol_range(
+    symbol: str,
+    market_name: str,
+    close: pd.Series,
+    *,
+    dates: list[str],
+    pairs: list[WmaPair],
+) -> dict:
+    """
+    Backfill: calcula las WMA de todos los periodos una sola vez sobre todo
+    el historico (sumas acumuladas compartidas) y detecta de forma
+    vectorizada todos los cruces de cada par dentro de dates.
+
+    Devuelve un dict con status "invalid" o "crosses"; cada cruce tiene la
+    misma forma que los de evaluate_symbol.
+    """
+
+    logger.log(DETAIL, "-" * 70)
+    logger.log(DETAIL, f"MERCADO: {market_name} | EMPRESA: {symbol}")
+    logger.log(DETAIL, "-" * 70)
+
+    result = {"symbol": symbol, "market": market_name}
+
+    if close.empty or len(close) < _min_bars(pairs):
+        return _invalid(result)
+
+    with stage("wma", symbol):
+        wmas = wma_many(close, {p for pair in pairs for p in pair.periods})
+
+    crosses = []
+    for pair in pairs:
+        wma_short = wmas[pair.short_period]
+        wma_long = wmas[pair.long_period]
+
+        with stage("cross_check", symbol):
+            diffs = all_cross_up(wma_short, wma_long)
+        diffs = diffs[(diffs.index >= pd.Timestamp(dates[0])) & (diffs.index <= pd.Timestamp(dates[-1]))]
+
+        for ts in diffs.index:
+            crosses.append({
+                **_cross(result, pair, ts.strftime("%Y-%m-%d"), wma_short.loc[ts], wma_long.loc[ts], close),
+                "wma_short_series": wma_short,
+                "wma_long_series": wma_long,
+            })
+
+    logger.log(DETAIL, f"Golden Cross en el rango para {symbol}: {len(crosses)}")
+    return {**result, "status": "crosses", "crosses": crosses}
+
+
+def evaluate_batch_matrix(
+    batch: list[str],
+    market_name: str,
+    prices: dict[str, pd.Series],
+    *,
+    exec_date: str,
+    pairs: list[WmaPair],
+    mode: str,
+) -> list[dict]:
+    """
+    Equivalente matricial de evaluate_symbol para un lote completo: alinea
+    los cierres en una matriz fechas x simbolos y evalua todas las columnas
+    y todos los pares a la vez. No usa el estado incremental de las WMA
+    (solo lee las ultimas max(periodos) + 1 barras de cada simbolo), asi que
+    mode no cambia nada.
+    """
+
+    with stage("align", batch):
+        matrix = CloseMatrix.from_series({symbol: prices[symbol] for symbol in batch})
+
+    logger.log(DETAIL, f"MERCADO: {market_name} | LOTE MATRICIAL: {len(batch)} simbolos x {len(matrix.dates)} fechas")
+
+    with stage("wma", batch):
+        scans = scan_cross_up_pairs(matrix, [pair.periods for pair in pairs], exec_date)
+
+    return _tail_results(batch, market_name, prices, scans, exec_date=exec_date, pairs=pairs)
+
+
+def _tail_results(
+    batch: list[str],
+    market_name: str,
+    prices: dict[str, pd.Series],
+    scans: dict[tuple[int, int], TailScan],
+    *,
+    exec_date: str,
+    pairs: list[WmaPair],
+) -> list[dict]:
+    """
+    Resultados por simbolo (como los de evaluate_symbol) a partir de los
+    TailScan de cada par; batch va en el orden de las columnas.
+    """
+
+    bars = scans[pairs[0].periods].bars
+    on_date = scans[pairs[0].periods].on_date
+
+    results = []
+    for j, symbol in enumerate(batch):
+        result = {"symbol": symbol, "market": market_name}
+
+        if bars[j] < _min_bars(pairs):
+            results.append(_invalid(result))
+            continue
+
+        if not on_date[j]:
+            results.append({**result, "status": "stale"})
+            continue
+
+        crosses = []
+        for pair in pairs:
+            scan = scans[pair.periods]
+            if scan.is_cross[j]:
+                crosses.append(_cross(result, pair, exec_date, scan.wma_short[j], scan.wma_long[j], prices[symbol]))
+
+        if crosses:
+            results.append({**result, "status": "cross", "crosses": crosses})
+        else:
+            results.append({**result, "status": "no_cross"})
+
+    return results
+
+
+def evaluate_batch_matrix_range(
+    batch: list[str],
+    market_name: str,
+    prices: dict[str, pd.Series],
+    *,
+    dates: list[str],
+    pairs: list[WmaPair],
+) -> list[dict]:
+    """
+    Equivalente matricial de evaluate_symbol_range para un lote completo:
+    las WMA y las mascaras de cruces de todo el historico se calculan para
+    todas las columnas y todos los pares en una sola pasada.
+    """
+
+    with stage("align", batch):
+        matrix = CloseMatrix.from_series({symbol: prices[symbol] for symbol in batch})
+
+    logger.log(DETAIL, f"MERCADO: {market_name} | LOTE MATRICIAL: {len(batch)} simbolos x {len(matrix.dates)} fechas")
+
+    with stage("wma", batch):
+        scans = scan_cross_up_history_pairs(matrix, [pair.periods for pair in pairs])
+
+    hits_by_symbol: dict[str, list] = {}
+    for pair in pairs:
+        for symbol, ts in scans[pair.periods].crosses(dates[0], dates[-1]):
+            hits_by_symbol.setdefault(symbol, []).append((pair, ts))
+
+    crosses_by_symbol: dict[str, list[dict]] = {}
+    for j, symbol in enumerate(batch):
+        close = prices[symbol]
+        result = {"symbol": symbol, "market": market_name}
+        series: dict[int, pd.Series] = {}
+        crosses = []
+
+        for pair, ts in hits_by_symbol.get(symbol, []):
+            scan = scans[pair.periods]
+
+            # Series solo para los simbolos con cruce (las reutiliza la grafica)
+            for period, values in ((pair.short_period, scan.wma_short), (pair.long_period, scan.wma_long)):
+                if period not in series:
+                    series[period] = pd.Series(
+                        values[:, j], index=matrix.dates, name=f"WMA{period}"
+                    ).reindex(close.index)
+
+            wma_short = series[pair.short_period]
+            wma_long = series[pair.long_period]
+            crosses.append({
+                **_cross(result, pair, ts.strftime("%Y-%m-%d"), wma_short.loc[ts], wma_long.loc[ts], close),
+                "wma_short_series": wma_short,
+                "wma_long_series": wma_long,
+            })
+
+        crosses_by_symbol[symbol] = crosses
+
+    return _range_results(batch, market_name, prices, crosses_by_symbol, pairs=pairs)
+
+
+def _range_results(
+    batch: list[str],
+    market_name: str,
+    prices: dict[str, pd.Series],
+    crosses_by_symbol: dict[str, list[dict]],
+    *,
+    pairs: list[WmaPair],
+) -> list[dict]:
+    """
+    Resultados por simbolo (como los de evaluate_symbol_range) a partir de
+    los cruces ya construidos de cada simbolo.
+    """
+
+    results = []
+    for symbol in batch:
+        result = {"symbol": symbol, "market": market_name}
+        close = prices[symbol]
+
+        if close.empty or len(close) < _min_bars(pairs):
+            results.append(_invalid(result))
+            continue
+
+        results.append({**result, "status": "crosses", "crosses": crosses_by_symbol.get(symbol, [])})
+
+    return results
+
+
+def scan_batch(
+    batch: list[str],
+    market_name: str,
+    *,
+    start_date: str,
+    end_date: str,
+    batch_size: int,
+    evaluate=evaluate_symbol,
+    evaluate_batch=None,
+    **eval_kwargs,
+) -> list[dict]:
+    """
+    Descarga un lote de simbolos y evalua cada uno (o el lote completo con
+    evaluate_batch). Se ejecuta en el pool; devuelve un resultado por
+    simbolo en el mismo orden que batch.
+    """
+
+    try:
+        # fetch (por simbolo) incluye el historico local; la descarga en si
+        # se mide ademas por llamada como etapa "download"
+        with stage("fetch", batch):
+            prices = fetch_daily_close_many(
+                batch,
+                start=start_date,
+                end=end_date,
+                batch_size=batch_size,
+            )
+    except Exception as e:
+        logger.error(f"Error descargando lote de {market_name}: {str(e)}", exc_info=True)
+        incr("errors_download", len(batch))
+        return [
+            {"symbol": symbol, "market": market_name, "status": "error", "error": str(e)}
+            for symbol in batch
+        ]
+
+    if evaluate_batch is not None:
+        try:
+            return evaluate_batch(batch, market_name, prices, **eval_kwargs)
+        except Exception as e:
+            logger.error(f"Error evaluando lote de {market_name}: {str(e)}", exc_info=True)
+            incr("errors_evaluate", len(batch))
+            return [
+                {"symbol": symbol, "market": market_name, "status": "error", "error": str(e)}
+                for symbol in batch
+            ]
+
+    results = []
+    for symbol in batch:
+        try:
+            results.append(evaluate(symbol, market_name, prices[symbol], **eval_kwargs))
+        except Exception as e:
+            logger.error(f"Error procesando {symbol}: {str(e)}", exc_info=True)
+            incr("errors_evaluate")
+            results.append({"symbol": symbol, "market": market_name, "status": "error", "error": str(e)})
+
+    return results
+
+
+def submit_scan(
+    pool: ThreadPoolExecutor,
+    config: dict,
+    blacklist: set[str],
+    market_stats: dict[str, dict[str, int]],
+    *,
+    batch_size: int,
+    **scan_kwargs,
+) -> list:
+    """
+    Resuelve los simbolos de cada mercado y encola un scan_batch por lote.
+    Los futures se devuelven en orden de envio para consumirlos en ese orden
+    y que la agregacion (registro, graficas y resumen) sea determinista.
+    """
+
+    futures = []
+
+    # Los universos completos se refrescan en paralelo antes de encolar nada
+    with stage("universe"):
+        universes = get_universes([
+            m["name"] for m in config["markets"] if m.get("mode", "list") == "all"
+        ])
+
+    for market in config["markets"]:
+        market_name = market["name"]
+        symbols = resolve_symbols(market, universes)
+        market_stats[market_name] = {"scanned": len(symbols), "found": 0}
+
+        skipped = [s for s in symbols if s in blacklist]
+        for symbol in skipped:
+            logger.info(f"⏭️  Simbolo ignorado por blacklist: {symbol}")
+        pending = [s for s in symbols if s not in blacklist]
+
+        for i in range(0, len(pending), batch_size):
+            futures.append(pool.submit(
+                scan_batch,
+                pending[i:i + batch_size],
+                market_name,
+                batch_size=batch_size,
+                **scan_kwargs,
+            ))
+
+    return futures
+
+
+def collect_prices(
+    batch: list[str],
+    market_name: str,
+    prices: dict[str, pd.Series],
+    **_,
+) -> list[dict]:
+    """
+    evaluate_batch de --processes: los hilos solo descargan y el calculo se
+    hace despues, por mercado, en el pool de procesos.
+    """
+
+    return [
+        {"symbol": symbol, "market": market_name, "status": "fetched", "close": prices[symbol]}
+        for symbol in batch
+    ]
+
+
+def evaluate_market_processes(
+    processes: ProcessPoolExecutor,
+    market_name: str,
+    prices: dict[str, pd.Series],
+    *,
+    exec_date: str,
+    pairs: list[WmaPair],
+    mode: str,
+) -> list[dict]:
+    """
+    evaluate_batch_matrix para un mercado completo repartido por rangos de
+    columnas entre los procesos. mode no cambia nada (ver evaluate_batch_matrix).
+    """
+
+    symbols = list(prices)
+
+    with stage("align", symbols):
+        shared = SharedCloseMatrix(prices)
+
+    with shared as spec:
+        ranges = column_ranges(len(symbols))
+        logger.info(
+            f"MERCADO: {market_name} | {len(symbols)} simbolos x {len(spec.dates)} fechas "
+            f"en {len(ranges)} tarea(s) de proceso"
+        )
+
+        with stage("wma", symbols):
+            futures = [
+                processes.submit(scan_tail_columns, spec, lo, hi, [pair.periods for pair in pairs], exec_date)
+                for lo, hi in ranges
+            ]
+            scans = merge_tail_scans(future.result() for future in futures)
+
+    return _tail_results(symbols, market_name, prices, scans, exec_date=exec_date, pairs=pairs)
+
+
+def evaluate_market_processes_range(
+    processes: ProcessPoolExecutor,
+    market_name: str,
+    prices: dict[str, pd.Series],
+    *,
+    dates: list[str],
+    pairs: list[WmaPair],
+) -> list[dict]:
+    """
+    evaluate_batch_matrix_range para un mercado completo repartido por
+    rangos de columnas entre los procesos. Los workers solo devuelven los
+    cruces, sin las series de WMA: la grafica las recalcula.
+    """
+
+    symbols = list(prices)
+    by_periods = {pair.periods: pair for pair in pairs}
+
+    with stage("align", symbols):
+        shared = SharedCloseMatrix(prices)
+
+    with shared as spec:
+        ranges = column_ranges(len(symbols))
+        logger.info(
+            f"MERCADO: {market_name} | {len(symbols)} simbolos x {len(spec.dates)} fechas "
+            f"en {len(ranges)} tarea(s) de proceso"
+        )
+
+        with stage("wma", symbols):
+            futures = [
+                processes.submit(
+                    scan_history_columns, spec, lo, hi, list(by_periods), dates[0], dates[-1]
+                )
+                for lo, hi in ranges
+            ]
+            found = [cross for future in futures for cross in future.result()]
+
+    crosses_by_symbol: dict[str, list[dict]] = {}
+    for symbol, periods, date, wma_short, wma_long in found:
+        result = {"symbol": symbol, "market": market_name}
+        crosses_by_symbol.setdefault(symbol, []).append(
+            _cross(result, by_periods[periods], date, wma_short, wma_long, prices[symbol])
+        )
+
+    return _range_results(symbols, market_name, prices, crosses_by_symbol, pairs=pairs)
+
+
+def evaluate_in_processes(
+    futures: list,
+    processes: ProcessPoolExecutor,
+    evaluate_market: Callable[..., list[dict]],
+    **eval_kwargs,
+) -> Iterator[dict]:
+    """
+    Consume los lotes descargados (collect_prices) en orden y, al completar
+    cada mercado, lo evalua con evaluate_market en el pool de procesos. Los
+    errores de descarga se devuelven tal cual.
+    """
+
+    market_name = None
+    prices: dict[str, pd.Series] = {}
+
+    def _evaluate() -> list[dict]:
+        try:
+            return evaluate_market(processes, market_name, prices, **eval_kwargs)
+        except Exception as e:
+            logger.error(f"Error evaluando {market_name} en procesos: {str(e)}", exc_info=True)
+            incr("errors_evaluate", len(prices))
+            return [
+                {"symbol": symbol, "market": market_name, "status": "error", "error": str(e)}
+                for symbol in prices
+            ]
+
+    for future in futures:
+        for result in future.result():
+            if result["status"] != "fetched":
+                yield result
+                continue
+
+            if result["market"] != market_name and prices:
+                yield from _evaluate()
+                prices = {}
+
+            market_name = result["market"]
+            prices[result["symbol"]] = result["close"]
+
+    if prices:
+        yield from _evaluate()
+
+
+def scan_results(
+    futures: list,
+    processes: ProcessPoolExecutor | None,
+    evaluate_market: Callable[..., list[dict]],
+    **eval_kwargs,
+) -> Iterable[dict]:
+    """
+    Resultados por simbolo en orden de envio: directamente de los lotes o,
+    con --processes, tras la etapa de calculo en procesos.
+    """
+
+    if processes is None:
+        return (result for future in futures for result in future.result())
+    return evaluate_in_processes(futures, processes, evaluate_market, **eval_kwargs)
+
+
+def select_engine(engine: str, processes: int, *, backfill: bool) -> dict:
+    """
+    Argumentos de scan_batch para el motor elegido: evaluate (por simbolo)
+    o evaluate_batch (por lote). Con processes > 0 los hilos solo descargan
+    (collect_prices) y el calculo lo hace evaluate_market_processes[_range].
+    """
+
+    if engine not in ENGINES:
+        raise ValueError(f"Motor desconocido: {engine}")
+
+    if processes:
+        return {"evaluate_batch": collect_prices}
+    if engine == "matrix":
+        return {"evaluate_batch": evaluate_batch_matrix_range if backfill else evaluate_batch_matrix}
+    return {"evaluate": evaluate_symbol_range if backfill else evaluate_symbol}
+
+
+@contextmanager
+def scan_markets(
+    config: dict,
+    blacklist: set[str],
+    market_stats: dict[str, dict[str, int]],
+    *,
+    engine: str,
+    workers: int,
+    processes: int,
+    batch_size: int,
+    end_date: str,
+    **eval_kwargs,
+) -> Iterator[Iterable[dict]]:
+    """
+    Escanea todos los mercados de config con el motor elegido y entrega los
+    resultados por simbolo en orden de envio. eval_kwargs son los de la
+    evaluacion: exec_date, pairs y mode para la diaria, o dates y pairs para
+    el backfill. Los pools de hilos y de procesos viven lo que dure el with.
+    """
+
+    backfill = "dates" in eval_kwargs
+    evaluator = select_engine(engine, processes, backfill=backfill)
+    evaluate_market = evaluate_market_processes_range if backfill else evaluate_market_processes
+
+    # Con processes 0 no se crea ningun proceso
+    process_pool = create_pool(processes) if processes else nullcontext()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, process_pool as procs:
+        futures = submit_scan(
+            pool,
+            config,
+            blacklist,
+            market_stats,
+            batch_size=batch_size,
+            start_date=HISTORY_START,
+            end_date=end_date,
+            **evaluator,
+            **eval_kwargs,
+        )
+
+        yield scan_results(futures, procs, evaluate_market, **eval_kwargs)
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from pathlib import Path
 import yaml
 
@@ -9,6 +10,28 @@ logger = get_logger("settings")
 
 CONFIG_PATH = Path("config") / "config.yaml"
 
+SIGNAL_NAME = "golden_cross_wma"
+
+
+@dataclass(frozen=True)
+class WmaPair:
+    """
+    Par de periodos (corta, larga) del Golden Cross y la senal con la que
+    se registran sus eventos.
+    """
+
+    short_period: int
+    long_period: int
+    signal: str
+
+    @property
+    def periods(self) -> tuple[int, int]:
+        return self.short_period, self.long_period
+
+    @property
+    def tag(self) -> str:
+        return f"{self.short_period}/{self.long_period}"
+
 
 def load_config() -> dict:
     if not CONFIG_PATH.exists():
@@ -36,4 +59,37 @@ def _validate_config(config: dict) -> None:
     if "golden_cross_wma" not in config["signals"]:
         raise ValueError("No está definida la señal golden_cross_wma")
 
+    wma_pairs(config)
+
     logger.info("Configuración validada")
+
+
+def wma_pairs(config: dict) -> list[WmaPair]:
+    """
+    Pares (corta, larga) de signals.golden_cross_wma.
+
+    El par principal (short_period / long_period) conserva la senal
+    golden_cross_wma. Cada par adicional de la lista opcional "pairs" se
+    registra como golden_cross_wma_<corta>_<larga>, de modo que sus eventos,
+    graficas y entradas del indice no se mezclan con los del principal.
+    """
+
+    signal_cfg = config["signals"][SIGNAL_NAME]
+
+    pairs = [WmaPair(int(signal_cfg["short_period"]), int(signal_cfg["long_period"]), SIGNAL_NAME)]
+
+    for item in signal_cfg.get("pairs") or []:
+        if not isinstance(item, (list, tuple)) or len(item) != 2:
+            raise ValueError(f"Par WMA no valido en signals.{SIGNAL_NAME}.pairs: {item!r}")
+        short_period, long_period = int(item[0]), int(item[1])
+        pairs.append(WmaPair(short_period, long_period, f"{SIGNAL_NAME}_{short_period}_{long_period}"))
+
+    seen = set()
+    for pair in pairs:
+        if not 0 < pair.short_period < pair.long_period:
+            raise ValueError(f"Par WMA no valido (se requiere 0 < corta < larga): {pair.tag}")
+        if pair.periods in seen:
+            raise ValueError(f"Par WMA duplicado: {pair.tag}")
+        seen.add(pair.periods)
+
+    return pairs
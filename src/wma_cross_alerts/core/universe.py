@@ -1,12 +1,14 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 import json
 import os
 import re
 from typing import Any
-import requests
+from wma_cross_alerts.utils.atomic import atomic_open
 from wma_cross_alerts.utils.logger import get_logger
+from wma_cross_alerts.utils.run_metrics import incr
 
 logger = get_logger("universe")
 
@@ -17,11 +19,16 @@ except Exception:
     pass
 
 CACHE_DIR = Path("data") / "universes"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
-DEFAULT_TTL_DAYS = int(os.getenv("UNIVERSE_TTL_DAYS", "0"))
+# Pasado el TTL la cache se revalida con una peticion condicional
+# (If-None-Match / If-Modified-Since); un 304 solo renueva fetched_at_utc.
+# Medio dia por defecto: cada ejecucion diaria revalida (como antes, con TTL
+# 0 siempre se descargaba) y solo las repeticiones del mismo dia reutilizan
+# la cache sin red. 0 revalida en cada ejecucion; admite fracciones de dia.
+DEFAULT_TTL_DAYS = float(os.getenv("UNIVERSE_TTL_DAYS", "0.5"))
 HTTP_TIMEOUT_SECS = float(os.getenv("UNIVERSE_HTTP_TIMEOUT", "20"))
 USER_AGENT = os.getenv("UNIVERSE_USER_AGENT", "wma-cross-alerts/1.0")
+REFRESH_WORKERS = int(os.getenv("UNIVERSE_REFRESH_WORKERS", "4"))
 
 YFIUA_BASE = "https://yfiua.github.io/index-constituents"
 YFIUA_URLS = {
@@ -44,23 +51,46 @@ def get_universe(market: str, *, force_refresh: bool = False) -> list[str]:
     cache_path = _cache_path(market)
     cached = _read_cache(cache_path)
 
-    if not force_refresh and cached is not None and _is_fresh(cached):
+    # El TTL solo aplica a las fuentes online: el fichero manual se relee siempre
+    if (
+        not force_refresh
+        and market in YFIUA_URLS
+        and cached is not None
+        and _is_fresh(cached)
+    ):
+        incr("universe_cache_hit")
         return list(cached["symbols"])
 
     try:
+        validators: dict[str, str] = {}
+
         # Intenta primero fuentes online conocidas
         if market in YFIUA_URLS:
-            symbols, source = _fetch_universe(market)
+            symbols, source, validators = _fetch_universe(
+                market, cached=None if force_refresh else cached
+            )
+            if symbols is None:
+                # 304: el universo no ha cambiado, solo se renueva la marca de tiempo
+                logger.info(f"Universo sin cambios para {market} (HTTP 304); se reutiliza la cache")
+                incr("universe_not_modified")
+                payload = dict(cached)
+                payload["fetched_at_utc"] = datetime.now(timezone.utc).isoformat()
+                payload.update(validators)
+                _write_cache(cache_path, payload)
+                return list(cached["symbols"])
         else:
             # Fallback: Intenta fichero manual local [NUEVO]
             symbols, source = _fetch_from_local_file(market)
 
+        incr("universe_downloaded" if market in YFIUA_URLS else "universe_local")
+
         payload = {
             "market": market,
             "source": source,
             "fetched_at_utc": datetime.now(timezone.utc).isoformat(),
             "count": len(symbols),
             "symbols": symbols,
+            **validators,
         }
         _write_cache(cache_path, payload)
         return symbols
@@ -74,6 +104,25 @@ def get_universe(market: str, *, force_refresh: bool = False) -> list[str]:
         raise
 
 
+def get_universes(markets: list[str], *, force_refresh: bool = False) -> dict[str, list[str]]:
+    """
+    Resuelve varios universos en paralelo (las peticiones HTTP son
+    independientes). Devuelve un dict mercado -> simbolos en el orden
+    recibido; si algun mercado falla sin cache se propaga su excepcion.
+    """
+
+    if not markets:
+        return {}
+
+    workers = max(1, min(REFRESH_WORKERS, len(markets)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="universe") as pool:
+        futures = {
+            market: pool.submit(get_universe, market, force_refresh=force_refresh)
+            for market in markets
+        }
+        return {market: future.result() for market, future in futures.items()}
+
+
 def _fetch_from_local_file(market: str) -> tuple[list[str], str]: # [NUEVO]
     # Busca en data/universes/manual/{market}.txt o .csv
     manual_dir = CACHE_DIR.parent / "universes" / "manual"
@@ -106,22 +155,56 @@ def _fetch_from_local_file(market: str) -> tuple[list[str], str]: # [NUEVO]
     return symbols, f"local/{path.name}"
 
 
-def _fetch_universe(market: str) -> tuple[list[str], str]:
+def _fetch_universe(
+    market: str,
+    *,
+    cached: dict[str, Any] | None = None,
+) -> tuple[list[str] | None, str, dict[str, str]]:
+    """
+    Devuelve (simbolos, source, validadores HTTP). simbolos es None si el
+    servidor responde 304 a la peticion condicional construida con la cache.
+    """
+
     if market not in YFIUA_URLS:
         raise ValueError(f"Mercado no soportado en universe.py: {market}")
-    
-    symbols = _fetch_from_yfiua_json(market)
+
+    symbols, validators = _fetch_from_yfiua_json(market, cached)
+    if symbols is None:
+        return None, cached.get("source", "yfiua/index-constituents"), validators
+
     symbols = _normalize_symbols(symbols)
     _validate_symbols(market, symbols)
     
-    return symbols, "yfiua/index-constituents"
+    return symbols, "yfiua/index-constituents", validators
+
 
+def _fetch_from_yfiua_json(
+    market: str,
+    cached: dict[str, Any] | None = None,
+) -> tuple[list[str] | None, dict[str, str]]:
+    # Import diferido: solo se paga cuando la cache ha caducado
+    import requests
 
-def _fetch_from_yfiua_json(market: str) -> list[str]:
     url = YFIUA_URLS[market]
     headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-    
+
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
     resp = requests.get(url, headers=headers, timeout=HTTP_TIMEOUT_SECS)
+
+    validators = {}
+    if resp.headers.get("ETag"):
+        validators["etag"] = resp.headers["ETag"]
+    if resp.headers.get("Last-Modified"):
+        validators["last_modified"] = resp.headers["Last-Modified"]
+
+    if resp.status_code == 304 and cached is not None:
+        return None, validators
+
     resp.raise_for_status()
     
     data: Any = resp.json()
@@ -138,7 +221,7 @@ def _fetch_from_yfiua_json(market: str) -> list[str]:
     if not out:
         raise ValueError(f"No se extrajeron simbolos del JSON ({market})")
         
-    return out
+    return out, validators
 
 
 def _normalize_symbols(symbols: list[str]) -> list[str]:
@@ -207,11 +290,10 @@ def _read_cache(path: Path) -> dict[str, Any] | None:
 
 
 def _write_cache(path: Path, payload: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(".tmp")
-    with open(tmp, "w", encoding="utf-8") as f:
+    # Temporal unico por escritura: dos procesos refrescando el mismo
+    # mercado ya no comparten <mercado>.tmp
+    with atomic_open(path) as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
-    tmp.replace(path)
     logger.info(f"Universo cacheado: {path} (source={payload.get('source')}, count={payload.get('count')})")
 
 
@@ -0,0 +1,198 @@
+"""
+Archivo compacto de cierres por mercado para analisis de historico completo.
+
+Un mercado se guarda en data/archive/<mercado>/ como:
+
+    dates.npy    eje de sesiones comun (datetime64[D])
+    close.npy    matriz sesiones x simbolos en orden por columnas, float32
+                 por defecto (float64 opcional), NaN donde no hay barra
+    meta.json    simbolos (en orden de columna), dtype y fecha de construccion
+
+Los ficheros se abren mapeados en memoria: solo se leen del disco las
+paginas de los simbolos y fechas que se consultan, y view() devuelve vistas
+sin copia. Con float32 los ~6500 dias x 3000 simbolos de un mercado grande
+ocupan unos 80 MB.
+
+El archivo es una copia de solo lectura que se reconstruye a partir de
+data/prices (scripts/build_price_archive.py); el escaneo diario no lo usa.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from wma_cross_alerts.signals.golden_cross_matrix import CloseMatrix
+from wma_cross_alerts.utils.logger import get_logger
+
+
+logger = get_logger("price_archive")
+
+ARCHIVE_DIR = Path("data") / "archive"
+
+ARCHIVE_DTYPES = ("float32", "float64")
+
+
+class PriceArchive:
+    """
+    Archivo de un mercado abierto en modo lectura (mmap).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.symbols: list[str] = meta["symbols"]
+        self.dtype = np.dtype(meta["dtype"])
+        self.built_at: str = meta.get("built_at", "")
+
+        self.dates = pd.DatetimeIndex(np.load(path / "dates.npy").astype("datetime64[ns]"), name="Date")
+        self.values: np.ndarray = np.load(path / "close.npy", mmap_mode="r")
+
+        if self.values.shape != (len(self.dates), len(self.symbols)):
+            raise ValueError(f"Archivo de precios inconsistente en {path}: {self.values.shape}")
+
+        self._columns = {symbol: j for j, symbol in enumerate(self.symbols)}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._columns
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def rows(self, start: str | None = None, end: str | None = None) -> slice:
+        """
+        Filas del eje de sesiones con fecha en [start, end] (ambas incluidas).
+        """
+
+        lo = 0 if start is None else int(self.dates.searchsorted(pd.Timestamp(start), side="left"))
+        hi = len(self.dates) if end is None else int(self.dates.searchsorted(pd.Timestamp(end), side="right"))
+        return slice(lo, hi)
+
+    def view(self, symbol: str, start: str | None = None, end: str | None = None) -> tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        (fechas, cierres) de un simbolo en [start, end] sin copiar: los
+        cierres son una vista de solo lectura del fichero mapeado, en el
+        dtype del archivo y con NaN en las sesiones sin barra.
+        """
+
+        if symbol not in self._columns:
+            raise KeyError(f"{symbol} no esta en el archivo de {self.path.name}")
+
+        rows = self.rows(start, end)
+        return self.dates[rows], self.values[rows, self._columns[symbol]]
+
+    def close(self, symbol: str, start: str | None = None, end: str | None = None) -> pd.Series:
+        """
+        Cierres de un simbolo en [start, end] como Series float64 (sin las
+        sesiones en las que no cotiza), igual que fetch_daily_close.
+        """
+
+        dates, values = self.view(symbol, start, end)
+        values = values.astype("float64")
+        mask = ~np.isnan(values)
+        return pd.Series(values[mask], index=dates[mask], name="Close")
+
+    def matrix(
+        self,
+        start: str | None = None,
+        end: str | None = None,
+        symbols: list[str] | None = None,
+    ) -> CloseMatrix:
+        """
+        CloseMatrix del rango [start, end] en el dtype del archivo. Sin
+        symbols es una vista del fichero mapeado; con symbols se copian solo
+        esas columnas.
+        """
+
+        rows = self.rows(start, end)
+        if symbols is None:
+            return CloseMatrix(dates=self.dates[rows], symbols=list(self.symbols), values=self.values[rows])
+
+        cols = [self._columns[s] for s in symbols]
+        return CloseMatrix(dates=self.dates[rows], symbols=list(symbols), values=self.values[rows][:, cols])
+
+
+def archive_path(market: str) -> Path:
+    return ARCHIVE_DIR / market
+
+
+def open_archive(market: str, path: Path | None = None) -> PriceArchive | None:
+    """
+    Abre el archivo de un mercado. Devuelve None si no existe.
+    """
+
+    path = path or archive_path(market)
+    if not (path / "meta.json").exists():
+        return None
+    return PriceArchive(path)
+
+
+def build_archive(
+    market: str,
+    closes: Mapping[str, pd.Series],
+    *,
+    dtype: str = "float32",
+    path: Path | None = None,
+) -> Path:
+    """
+    Construye (o sustituye) el archivo de un mercado a partir de los cierres
+    por simbolo. Se escribe en un directorio temporal y se publica con
+    renames, asi que un lector nunca ve un archivo a medio escribir.
+    """
+
+    if dtype not in ARCHIVE_DTYPES:
+        raise ValueError(f"dtype no soportado para el archivo de precios: {dtype}")
+
+    path = path or archive_path(market)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_dir = Path(tempfile.mkdtemp(dir=path.parent, prefix=f".{path.name}."))
+    try:
+        matrix = CloseMatrix.from_series(
+            closes,
+            alloc=lambda shape: np.lib.format.open_memmap(
+                tmp_dir / "close.npy", mode="w+", dtype=dtype, shape=shape, fortran_order=True
+            ),
+        )
+        matrix.values.flush()
+
+        np.save(tmp_dir / "dates.npy", matrix.dates.values.astype("datetime64[D]"))
+        (tmp_dir / "meta.json").write_text(json.dumps({
+            "market": market,
+            "symbols": matrix.symbols,
+            "dtype": dtype,
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }, ensure_ascii=False), encoding="utf-8")
+
+        _publish(tmp_dir, path)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    logger.info(
+        f"Archivo de precios de {market}: {len(matrix.symbols)} simbolos x "
+        f"{len(matrix.dates)} sesiones ({dtype}) en {path}"
+    )
+    return path
+
+
+def _publish(tmp_dir: Path, path: Path) -> None:
+    # Un directorio no se puede sustituir con un solo rename: el anterior se
+    # aparta primero. Los lectores que ya lo tengan mapeado siguen leyendo
+    # sus ficheros hasta cerrarlos.
+    old = None
+    if path.exists():
+        old = Path(tempfile.mkdtemp(dir=path.parent, prefix=f".{path.name}.old."))
+        os.replace(path, old / path.name)
+
+    os.replace(tmp_dir, path)
+
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+import os
+
+import numpy as np
+import pandas as pd
+
+from wma_cross_alerts.utils.atomic import atomic_open
+from wma_cross_alerts.utils.logger import get_logger
+
+
+logger = get_logger("price_store")
+
+PRICES_DIR = Path("data") / "prices"
+
+PRICE_STORE_ENABLED = os.getenv("PRICE_STORE_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+
+
+@dataclass
+class StoredClose:
+    """
+    Historico de cierres guardado en disco para un simbolo.
+
+    - close:        Series de cierres indexada por fecha (DatetimeIndex).
+    - covered_from: fecha de inicio solicitada en la descarga completa original.
+    - fetched_on:   fecha (UTC) de la ultima descarga; la barra de ese dia
+                    puede ser provisional si se descargo con el mercado abierto.
+    """
+
+    close: pd.Series
+    covered_from: str
+    fetched_on: date
+
+    @property
+    def last_date(self) -> pd.Timestamp:
+        return self.close.index[-1]
+
+    @property
+    def last_is_provisional(self) -> bool:
+        return self.last_date.date() >= self.fetched_on
+
+    @property
+    def last_final_date(self) -> pd.Timestamp | None:
+        """
+        Ultima barra definitiva: la ultima, o la anterior si la ultima es
+        provisional. None si solo hay una barra y es provisional.
+        """
+
+        if not self.last_is_provisional:
+            return self.last_date
+        return self.close.index[-2] if len(self.close) > 1 else None
+
+
+def load_close(symbol: str) -> StoredClose | None:
+    """
+    Lee el historico de cierres guardado para un simbolo.
+    Devuelve None si no existe o no se puede leer.
+    """
+
+    path = _price_path(symbol)
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            dates = data["dates"]
+            values = data["close"]
+            covered_from = str(data["covered_from"])
+            fetched_on = date.fromisoformat(str(data["fetched_on"]))
+    except Exception as e:
+        logger.warning(f"Historico local ilegible para {symbol} ({path}): {e}")
+        return None
+
+    if len(dates) == 0:
+        return None
+
+    index = pd.DatetimeIndex(dates.astype("datetime64[ns]"), name="Date")
+    close = pd.Series(values, index=index, name="Close")
+    return StoredClose(close=close, covered_from=covered_from, fetched_on=fetched_on)
+
+
+def save_close(symbol: str, close: pd.Series, covered_from: str) -> Path:
+    """
+    Guarda el historico de cierres de un simbolo en:
+    data/prices/<symbol>.npz
+
+    La escritura es atomica (fichero temporal + rename).
+    """
+
+    path = _price_path(symbol)
+
+    dates = close.index.values.astype("datetime64[ns]")
+    values = close.to_numpy(dtype="float64")
+    fetched_on = datetime.now(timezone.utc).date().isoformat()
+
+    with atomic_open(path, "wb") as f:
+        np.savez(
+            f,
+            dates=dates,
+            close=values,
+            covered_from=np.array(covered_from),
+            fetched_on=np.array(fetched_on),
+        )
+
+    return path
+
+
+def _price_path(symbol: str) -> Path:
+    return PRICES_DIR / f"{symbol}.npz"
@@ -1,48 +1,307 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
 
-from wma_cross_alerts.utils.logger import get_logger
+from wma_cross_alerts.data_sources.price_store import (
+    PRICE_STORE_ENABLED,
+    StoredClose,
+    load_close,
+    save_close,
+)
+from wma_cross_alerts.utils.logger import DETAIL, get_logger
+from wma_cross_alerts.utils.rate_limit import RateLimiter
+from wma_cross_alerts.utils.run_metrics import incr, stage
 
 
 logger = get_logger("yahoo_data_source")
 
+# Limite de peticiones a Yahoo compartido por todos los hilos: cada llamada
+# real a yf.download consume un turno; lo servido del historico local, ninguno
+_limiter = RateLimiter(0)
+
+
+def set_rate_limit(rate_per_sec: float) -> None:
+    """
+    Maximo de descargas por segundo a Yahoo en este proceso (0 = sin limite).
+    """
+
+    global _limiter
+    _limiter = RateLimiter(rate_per_sec)
+
 
 def fetch_daily_close(
     symbol: str,
     start: str = "2000-01-01",
     end: Optional[str] = None,
+    *,
+    use_store: bool = True,
 ) -> pd.Series:
-    logger.info(f"Descargando datos diarios para {symbol}")
+    """
+    Devuelve los cierres diarios de [start, end) para un simbolo.
+
+    Si el historico local (data/prices) esta activo, se consulta primero y
+    solo se descarga el tramo que falta desde la ultima barra guardada.
+    """
 
     if end is None:
         end = datetime.utcnow().strftime("%Y-%m-%d")
 
-    try:
-        df = yf.download(
-            tickers=[symbol],
-            start=start,
-            end=end,
-            interval="1d",
-            progress=False,
-            auto_adjust=False,
-            multi_level_index=False,
-        )
-    except TypeError:
+    if not (use_store and PRICE_STORE_ENABLED):
+        return _download_close(symbol, start=start, end=end)
+
+    close = _refresh_stored_close(symbol, start=start, end=end)
+    return _slice_close(close, start=start, end=end)
+
+
+def fetch_daily_close_many(
+    symbols: list[str],
+    start: str = "2000-01-01",
+    end: Optional[str] = None,
+    *,
+    batch_size: int = 100,
+    use_store: bool = True,
+) -> dict[str, pd.Series]:
+    """
+    Version por lotes de fetch_daily_close.
+
+    Agrupa los simbolos que necesitan descarga por fecha de inicio (tramo
+    pendiente o historico completo) y los descarga en bloques de batch_size
+    tickers por llamada a Yahoo. Devuelve un dict simbolo -> Series de
+    cierres de [start, end); los simbolos sin datos tienen una Series vacia.
+    """
+
+    if batch_size <= 0:
+        raise ValueError("batch_size debe ser mayor que 0")
+
+    if end is None:
+        end = datetime.utcnow().strftime("%Y-%m-%d")
+
+    symbols = list(dict.fromkeys(symbols))
+    use_store = use_store and PRICE_STORE_ENABLED
+
+    stored: dict[str, StoredClose | None] = {}
+    pending: dict[str, list[str]] = {}
+    out: dict[str, pd.Series] = {}
+
+    for symbol in symbols:
+        stored[symbol] = load_close(symbol) if use_store else None
+        fetch_start = _pending_start(stored[symbol], start, end) if use_store else start
+        if fetch_start is None:
+            incr("price_cache_hit")
+            out[symbol] = stored[symbol].close
+        else:
+            incr("price_cache_miss" if fetch_start == start else "price_cache_tail")
+            pending.setdefault(fetch_start, []).append(symbol)
+
+    for fetch_start, group in pending.items():
+        for i in range(0, len(group), batch_size):
+            chunk = group[i:i + batch_size]
+            downloaded = _download_close_many(chunk, start=fetch_start, end=end)
+
+            for symbol in chunk:
+                close = downloaded.get(symbol, _empty_close())
+                if use_store:
+                    close = _merge_download(symbol, stored[symbol], close, start=start, end=end)
+                out[symbol] = close
+
+    return {symbol: _slice_close(out[symbol], start=start, end=end) for symbol in symbols}
+
+
+def _refresh_stored_close(symbol: str, start: str, end: str) -> pd.Series:
+    stored = load_close(symbol)
+    fetch_start = _pending_start(stored, start, end)
+
+    if fetch_start is None:
+        logger.log(DETAIL, f"Historico local al dia para {symbol} (ultima barra {stored.last_date.date()})")
+        return stored.close
+
+    downloaded = _download_close(symbol, start=fetch_start, end=end)
+    return _merge_download(symbol, stored, downloaded, start=start, end=end)
+
+
+def _pending_start(stored: StoredClose | None, start: str, end: str) -> str | None:
+    """
+    Fecha desde la que hay que descargar, o None si el historico local
+    ya cubre [start, end).
+
+    Se vuelve a pedir desde la ultima barra definitiva guardada, para
+    detectar ajustes (splits) comparandola con la de Yahoo y para sustituir
+    la ultima barra si era provisional. La ejecucion diaria corre el mismo
+    dia UTC del cierre, asi que la ultima barra suele ser provisional: la
+    comparacion se hace entonces con la anterior.
+    """
+
+    if stored is None or stored.covered_from > start:
+        return start
+
+    if not _needs_tail(stored, end):
+        return None
+
+    anchor = stored.last_final_date or stored.last_date
+    return anchor.strftime("%Y-%m-%d")
+
+
+def _merge_download(
+    symbol: str,
+    stored: StoredClose | None,
+    downloaded: pd.Series,
+    start: str,
+    end: str,
+) -> pd.Series:
+    if stored is None or stored.covered_from > start:
+        if not downloaded.empty:
+            save_close(symbol, downloaded, covered_from=start)
+        return downloaded
+
+    if downloaded.empty:
+        return stored.close
+
+    if not _overlap_matches(stored, downloaded):
+        logger.warning(f"Historico local de {symbol} no coincide con Yahoo (posible split); se descarga completo")
+        return _download_full(symbol, start=stored.covered_from, end=end)
+
+    head = stored.close[stored.close.index < downloaded.index[0]]
+    close = pd.concat([head, downloaded])
+    close.name = "Close"
+
+    save_close(symbol, close, covered_from=stored.covered_from)
+    logger.log(DETAIL, f"Historico local de {symbol} actualizado hasta {close.index[-1].date()}")
+    return close
+
+
+def _download_full(symbol: str, start: str, end: str) -> pd.Series:
+    close = _download_close(symbol, start=start, end=end)
+    if not close.empty:
+        save_close(symbol, close, covered_from=start)
+    return close
+
+
+def _needs_tail(stored: StoredClose, end: str) -> bool:
+    last_needed = pd.Timestamp(end) - timedelta(days=1)
+    if stored.last_date < last_needed:
+        return True
+    return stored.last_is_provisional and stored.last_date <= last_needed
+
+
+def _overlap_matches(stored: StoredClose, tail: pd.Series) -> bool:
+    # Una barra provisional puede cambiar sin que haya ajuste: se compara
+    # la ultima definitiva
+    anchor = stored.last_final_date
+    if anchor is None or anchor not in tail.index:
+        return True
+    return bool(np.isclose(tail.loc[anchor], stored.close.loc[anchor], rtol=1e-6))
+
+
+def _slice_close(close: pd.Series, start: str, end: str) -> pd.Series:
+    mask = (close.index >= pd.Timestamp(start)) & (close.index < pd.Timestamp(end))
+    return close[mask]
+
+
+def _empty_close() -> pd.Series:
+    return pd.Series(dtype="float64", name="Close")
+
+
+def _count_download(df: pd.DataFrame | None) -> None:
+    # yfinance no expone los bytes de red: se cuenta el tamano en memoria
+    # de lo recibido, que escala igual con filas y tickers
+    incr("download_calls")
+    if df is None or df.empty:
+        return
+    incr("download_rows", len(df))
+    incr("download_bytes", int(df.memory_usage(index=True, deep=False).sum()))
+
+
+def _download_close_many(
+    symbols: list[str],
+    start: str,
+    end: str,
+) -> dict[str, pd.Series]:
+    # Import diferido: yfinance solo se carga si de verdad hay que descargar
+    import yfinance as yf
+
+    logger.info(f"Descargando datos diarios por lote: {len(symbols)} simbolos desde {start}")
+
+    _limiter.wait()
+    with stage("download"):
         df = yf.download(
-            tickers=[symbol],
+            tickers=symbols,
             start=start,
             end=end,
             interval="1d",
             progress=False,
             auto_adjust=False,
+            group_by="column",
         )
+    _count_download(df)
+
+    if df is None or df.empty:
+        logger.warning(f"No se han recibido datos para el lote ({len(symbols)} simbolos)")
+        return {}
+
+    if isinstance(df.columns, pd.MultiIndex):
+        if "Close" not in df.columns.get_level_values(0):
+            raise ValueError("Columna Close no encontrada")
+        closes = df.xs("Close", axis=1, level=0)
+    else:
+        # Un unico ticker sin MultiIndex
+        if "Close" not in df.columns:
+            raise ValueError("Columna Close no encontrada")
+        closes = df[["Close"]].set_axis(symbols[:1], axis=1)
+
+    out: dict[str, pd.Series] = {}
+    for symbol in symbols:
+        if symbol not in closes.columns:
+            continue
+        close = closes[symbol].dropna()
+        close.name = "Close"
+        out[symbol] = close
+
+    missing = [s for s in symbols if out.get(s) is None or out[s].empty]
+    if missing:
+        logger.warning(f"No se han recibido datos para {len(missing)} simbolos del lote: {missing[:10]}")
+
+    return out
+
+
+def _download_close(
+    symbol: str,
+    start: str,
+    end: str,
+) -> pd.Series:
+    import yfinance as yf
+
+    logger.log(DETAIL, f"Descargando datos diarios para {symbol}")
+
+    # El reintento por TypeError (yfinance antiguo) falla antes de llegar a
+    # la red: la descarga paga un solo turno
+    _limiter.wait()
+    with stage("download"):
+        try:
+            df = yf.download(
+                tickers=[symbol],
+                start=start,
+                end=end,
+                interval="1d",
+                progress=False,
+                auto_adjust=False,
+                multi_level_index=False,
+            )
+        except TypeError:
+            df = yf.download(
+                tickers=[symbol],
+                start=start,
+                end=end,
+                interval="1d",
+                progress=False,
+                auto_adjust=False,
+            )
+    _count_download(df)
 
     if df is None or df.empty:
         logger.warning(f"No se han recibido datos para {symbol}")
-        return pd.Series(dtype="float64", name="Close")
+        return _empty_close()
 
     if isinstance(df.columns, pd.MultiIndex):
         if "Close" not in df.columns.get_level_values(0):
@@ -59,7 +318,12 @@ def fetch_daily_close(
     close = close.dropna()
     close.name = "Close"
 
-    logger.info(
+    if close.empty:
+        logger.warning(f"No se han recibido datos para {symbol}")
+        return close
+
+    logger.log(
+        DETAIL,
         f"Datos descargados para {symbol}: {len(close)} filas desde {close.index.min().date()} hasta {close.index.max().date()}"
     )
 
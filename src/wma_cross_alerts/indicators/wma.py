@@ -1,13 +1,26 @@
+from typing import Iterable
+
 import numpy as np
 import pandas as pd
 
-from wma_cross_alerts.utils.logger import get_logger
+from wma_cross_alerts.utils.logger import DETAIL, get_logger
 
 
 logger = get_logger("wma_indicator")
 
+# Filas por tramo de las sumas acumuladas de wma_many_values
+SEGMENT_ROWS = 1024
+
+
+def wma(series, period: int, *, raw: bool = False) -> pd.Series | np.ndarray:
+    """
+    WMA con pesos lineales 1..period (el cierre mas reciente pesa period).
+
+    Las primeras period-1 posiciones, y cualquier ventana que contenga un
+    NaN, valen NaN (mismo comportamiento que rolling(min_periods=period)).
+    Con raw=True devuelve un ndarray en lugar de una Series.
+    """
 
-def wma(series, period: int) -> pd.Series:
     if period <= 0:
         raise ValueError("El periodo de la WMA debe ser mayor que 0")
 
@@ -22,17 +35,186 @@ def wma(series, period: int) -> pd.Series:
         elif series.ndim != 1:
             raise TypeError("Si series es ndarray, debe ser 1D o (n,1)/(1,n)")
 
-    if not isinstance(series, pd.Series):
+    if not isinstance(series, (pd.Series, np.ndarray)):
         series = pd.Series(series)
 
-    logger.info(f"Calculando WMA(period={period})")
+    logger.log(DETAIL, f"Calculando WMA(period={period})")
+
+    values = np.asarray(series, dtype="float64")
+    out = wma_values(values, period)
+
+    if raw:
+        return out
+
+    index = series.index if isinstance(series, pd.Series) else None
+    return pd.Series(out, index=index, name=f"WMA{period}")
+
+
+def wma_values(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Nucleo vectorizado de la WMA sobre un ndarray 1D de float64.
+
+    np.convolve recorre cada ventana en C, sin llamadas Python por fila. Suma
+    en otro orden que el producto escalar ventana a ventana, asi que el
+    resultado coincide con el dentro de la tolerancia de coma flotante (no bit
+    a bit); benchmarks/bench_indicators.py comprueba la paridad.
+    """
 
     weights = np.arange(1, period + 1, dtype=float)
     weight_sum = weights.sum()
 
-    def _calc(prices: np.ndarray) -> float:
-        return float(np.dot(prices, weights) / weight_sum)
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+
+    # convolve invierte el kernel: se pasan los pesos de mayor a menor
+    out[period - 1:] = np.convolve(values, weights[::-1], mode="valid") / weight_sum
+    return out
+
+
+def wma_many(
+    series,
+    periods: Iterable[int],
+    *,
+    raw: bool = False,
+) -> dict[int, pd.Series | np.ndarray]:
+    """
+    Varias WMA de la misma serie en una sola pasada (ver wma_many_values).
+
+    Devuelve {periodo: WMA} con la misma forma que wma() para cada periodo.
+    """
+
+    if isinstance(series, pd.DataFrame):
+        if series.shape[1] != 1:
+            raise TypeError("Si series es DataFrame, debe tener exactamente 1 columna")
+        series = series.squeeze("columns")
+
+    if not isinstance(series, (pd.Series, np.ndarray)):
+        series = pd.Series(series)
+
+    periods = sorted(set(periods))
+    logger.log(DETAIL, f"Calculando WMA(periods={periods})")
+
+    values = np.asarray(series, dtype="float64").reshape(-1)
+    out = wma_many_values(values, periods)
+
+    if raw:
+        return out
+
+    index = series.index if isinstance(series, pd.Series) else None
+    return {p: pd.Series(v, index=index, name=f"WMA{p}") for p, v in out.items()}
+
+
+def wma_many_values(values: np.ndarray, periods: Iterable[int]) -> dict[int, np.ndarray]:
+    """
+    Varias WMA a partir de sumas acumuladas compartidas, sobre un ndarray 1D
+    o por columnas sobre una matriz 2D (fechas x simbolos).
+
+    S1 = cumsum(x) y S2 = cumsum(i * x) se calculan una sola vez; cada
+    periodo n cuesta despues unas pocas operaciones vectoriales:
+
+        numerador(t) = (S2[t] - S2[t-n]) - (t - n) * (S1[t] - S1[t-n])
+
+    Misma semantica que wma_values: NaN en las primeras n-1 filas y en
+    cualquier ventana con un NaN. El resultado no es identico al de
+    wma_values ni al de WmaState (motor symbol): la diferencia de redondeo
+    es del orden de 1e-10 respecto al mayor cierre del tramo, unos 2.6e-10
+    en relativo en historicos tipicos y algo mas si el precio cae mucho
+    dentro del tramo. Un cruce cuya diferencia entre WMA sea menor que eso
+    puede decidirse distinto segun el motor. tests/test_wma.py comprueba
+    la paridad con esa tolerancia.
+    """
+
+    periods = sorted(set(periods))
+    if not periods:
+        return {}
+    if periods[0] <= 0:
+        raise ValueError("El periodo de la WMA debe ser mayor que 0")
+
+    values = np.asarray(values, dtype="float64")
+    if values.ndim not in (1, 2):
+        raise TypeError("values debe ser 1D o una matriz 2D (fechas x simbolos)")
+
+    out = {p: np.full(values.shape, np.nan) for p in periods}
+
+    # Las sumas acumuladas se reinician por tramos para que no crezcan con
+    # todo el historico (el error de redondeo crece con su magnitud); cada
+    # tramo arrastra las max_period - 1 filas anteriores que necesita.
+    max_period = periods[-1]
+    segment = max(SEGMENT_ROWS, 4 * max_period)
+
+    for start in range(0, values.shape[0], segment):
+        lo = max(0, start - (max_period - 1))
+        hi = min(values.shape[0], start + segment)
+        _wma_many_segment(values[lo:hi], periods, out, lo=lo, first_row=start - lo)
 
-    out = series.rolling(window=period, min_periods=period).apply(_calc, raw=True)
-    out.name = f"WMA{period}"
     return out
+
+
+def _wma_many_segment(
+    block: np.ndarray,
+    periods: list[int],
+    out: dict[int, np.ndarray],
+    *,
+    lo: int,
+    first_row: int,
+) -> None:
+    n_rows = block.shape[0]
+    tail_shape = block.shape[1:]
+
+    # Se resta el ultimo valor valido de cada columna (WMA(x - c) + c): las
+    # sumas son mas pequenas y un tramo final constante da ese valor exacto
+    nan = np.isnan(block)
+    has_nans = bool(nan.any())
+    anchor = _last_valid(block, nan)
+    x = block - anchor
+    if has_nans:
+        x[nan] = 0.0
+
+    rows = np.arange(n_rows, dtype=float).reshape((-1,) + (1,) * len(tail_shape))
+
+    # Sumas con una fila inicial a cero: la ventana (t-n, t] es S[t+1] - S[t+1-n]
+    s1 = np.zeros((n_rows + 1,) + tail_shape)
+    s2 = np.zeros((n_rows + 1,) + tail_shape)
+    np.cumsum(x, axis=0, out=s1[1:])
+    np.multiply(x, rows, out=x)
+    np.cumsum(x, axis=0, out=s2[1:])
+
+    if has_nans:
+        nans = np.zeros((n_rows + 1,) + tail_shape, dtype=np.int64)
+        np.cumsum(nan, axis=0, out=nans[1:])
+
+    for period in periods:
+        first = max(period - 1, first_row)
+        if first >= n_rows:
+            continue
+
+        upper = slice(first + 1, n_rows + 1)
+        lower = slice(first + 1 - period, n_rows + 1 - period)
+
+        window_s1 = s1[upper] - s1[lower]
+        window_s1 *= rows[first:] - period
+        result = s2[upper] - s2[lower]
+        result -= window_s1
+        result /= period * (period + 1) / 2
+        result += anchor
+
+        if has_nans:
+            result[(nans[upper] - nans[lower]) > 0] = np.nan
+
+        out[period][lo + first:lo + n_rows] = result
+
+
+def _last_valid(values: np.ndarray, nan: np.ndarray) -> np.ndarray | float:
+    """
+    Ultimo valor no NaN (por columna si values es 2D); 0 si no hay ninguno.
+    """
+
+    valid = ~nan
+    if values.ndim == 1:
+        idx = np.flatnonzero(valid)
+        return float(values[idx[-1]]) if idx.size else 0.0
+
+    last = values.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    anchor = values[last, np.arange(values.shape[1])]
+    return np.where(valid.any(axis=0), anchor, 0.0)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+# Cada cuantas actualizaciones incrementales se recalcula la WMA desde la
+# ventana guardada para acotar la deriva de coma flotante.
+RECOMPUTE_EVERY = 250
+
+# Si faltan mas barras que esto desde el ultimo estado, se reconstruye.
+MAX_CATCH_UP_BARS = 20
+
+
+@dataclass
+class WmaState:
+    """
+    Estado incremental de una WMA(period) en la barra last_date.
+
+    - numerator:  sum(peso_i * cierre_i) con pesos 1..period (el mas reciente pesa period)
+    - window_sum: suma simple de los cierres de la ventana
+    - window:     ultimos period cierres, del mas antiguo al mas reciente
+    - updates:    actualizaciones incrementales desde el ultimo recalculo completo
+    """
+
+    period: int
+    last_date: str
+    numerator: float
+    window_sum: float
+    window: deque = field(default_factory=deque)
+    updates: int = 0
+
+    @property
+    def value(self) -> float:
+        return self.numerator / _weight_sum(self.period)
+
+    def to_dict(self) -> dict:
+        return {
+            "period": self.period,
+            "last_date": self.last_date,
+            "numerator": self.numerator,
+            "window_sum": self.window_sum,
+            "window": list(self.window),
+            "updates": self.updates,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WmaState":
+        period = int(data["period"])
+        window = deque((float(v) for v in data["window"]), maxlen=period)
+        if len(window) != period:
+            raise ValueError(f"Ventana WMA{period} incompleta ({len(window)} valores)")
+        return cls(
+            period=period,
+            last_date=str(data["last_date"]),
+            numerator=float(data["numerator"]),
+            window_sum=float(data["window_sum"]),
+            window=window,
+            updates=int(data.get("updates", 0)),
+        )
+
+
+def init_state(close: pd.Series, period: int) -> WmaState:
+    """
+    Construye el estado a partir de las ultimas period barras de close.
+    El valor inicial coincide exactamente con wma() en esa barra.
+    """
+
+    if len(close) < period:
+        raise ValueError(f"Se necesitan al menos {period} cierres para iniciar WMA{period}")
+
+    window = close.iloc[-period:].to_numpy(dtype="float64")
+    state = WmaState(
+        period=period,
+        last_date=close.index[-1].strftime("%Y-%m-%d"),
+        numerator=0.0,
+        window_sum=0.0,
+        window=deque(window.tolist(), maxlen=period),
+    )
+    _recompute(state)
+    return state
+
+
+def update(state: WmaState, new_close: float, date: str | None = None) -> float:
+    """
+    Avanza el estado una barra en O(1) y devuelve la nueva WMA:
+
+        numerator'  = numerator + period * nuevo - window_sum
+        window_sum' = window_sum + nuevo - saliente
+    """
+
+    new_close = float(new_close)
+    outgoing = state.window[0]
+
+    state.numerator = state.numerator + state.period * new_close - state.window_sum
+    state.window_sum = state.window_sum + new_close - outgoing
+    state.window.append(new_close)
+    state.updates += 1
+
+    if date is not None:
+        state.last_date = date
+
+    if state.updates >= RECOMPUTE_EVERY:
+        _recompute(state)
+
+    return state.value
+
+
+def advance(
+    state: WmaState | None,
+    close: pd.Series,
+    period: int,
+) -> tuple[float, float, WmaState]:
+    """
+    Lleva el estado hasta la ultima barra de close.
+
+    Devuelve (WMA penultima barra, WMA ultima barra, estado en la ultima barra).
+    Si el estado no encaja con el historico (no existe, es de otra fecha,
+    el cierre guardado no coincide o faltan demasiadas barras) se reconstruye
+    desde las ultimas period + 1 barras.
+    """
+
+    if len(close) < period + 1:
+        raise ValueError(f"Se necesitan al menos {period + 1} cierres para WMA{period}")
+
+    last_pos = len(close) - 1
+    pos = _synced_position(state, close, period)
+
+    if pos is None or pos >= last_pos or last_pos - 1 - pos > MAX_CATCH_UP_BARS:
+        state = init_state(close.iloc[:-1], period)
+    else:
+        for i in range(pos + 1, last_pos):
+            update(state, close.iloc[i], close.index[i].strftime("%Y-%m-%d"))
+
+    prev_value = state.value
+    curr_value = update(state, close.iloc[-1], close.index[-1].strftime("%Y-%m-%d"))
+    return prev_value, curr_value, state
+
+
+def _synced_position(state: WmaState | None, close: pd.Series, period: int) -> int | None:
+    if state is None or state.period != period:
+        return None
+
+    ts = pd.Timestamp(state.last_date)
+    if ts not in close.index:
+        return None
+
+    pos = close.index.get_loc(ts)
+    if not isinstance(pos, int):
+        return None
+
+    if close.iloc[pos] != state.window[-1]:
+        return None
+
+    return pos
+
+
+def _recompute(state: WmaState) -> None:
+    window = np.fromiter(state.window, dtype="float64", count=len(state.window))
+    weights = np.arange(1, state.period + 1, dtype=float)
+    # Mismo producto que wma_values para que value coincida con wma() en esta barra
+    state.numerator = float(np.convolve(window, weights[::-1], mode="valid")[0])
+    state.window_sum = float(window.sum())
+    state.updates = 0
+
+
+def _weight_sum(period: int) -> float:
+    return period * (period + 1) / 2.0
@@ -15,19 +15,27 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from wma_cross_alerts.utils.logger import get_logger
-from wma_cross_alerts.core.settings import load_config
-from wma_cross_alerts.core.universe import get_universe
-
-from wma_cross_alerts.data_sources.yahoo import fetch_daily_close
-from wma_cross_alerts.indicators.wma import wma
-from wma_cross_alerts.signals.golden_cross_wma import last_cross_up
-from wma_cross_alerts.persistence.storage import save_event
+from wma_cross_alerts.utils.profiling import PROFILE_MODES, profiled
+from wma_cross_alerts.utils.run_metrics import (
+    current_run,
+    finish_run,
+    incr,
+    make_run_id,
+    stage,
+    start_run,
+)
+from wma_cross_alerts.utils.prometheus import export_run
+from wma_cross_alerts.core.settings import WmaPair, load_config, wma_pairs
+from wma_cross_alerts.core.scan import ENGINES, scan_markets
+from wma_cross_alerts.data_sources.yahoo import set_rate_limit
+from wma_cross_alerts.persistence.storage import flush_events, save_event
 from wma_cross_alerts.persistence.state import already_registered
-from wma_cross_alerts.reporting.plotter import plot_golden_cross
+from wma_cross_alerts.notifiers.outbox import drain as drain_outbox, start_worker as start_outbox
 from wma_cross_alerts.notifiers.email import (
     send_cross_alert_email,
     send_error_report_email,
     send_success_execution_email,
+    close_mailer,
 )
 
 logger = get_logger("main")
@@ -40,6 +48,18 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Fecha de ejecucion YYYY-MM-DD (cierre evaluado)",
     )
+    parser.add_argument(
+        "--start",
+        type=str,
+        default=None,
+        help="Backfill: fecha inicio YYYY-MM-DD (requiere --end)",
+    )
+    parser.add_argument(
+        "--end",
+        type=str,
+        default=None,
+        help="Backfill: fecha fin YYYY-MM-DD, inclusive (requiere --start)",
+    )
     parser.add_argument(
         "--mode",
         type=str,
@@ -47,7 +67,66 @@ def parse_args() -> argparse.Namespace:
         default="normal",
         help="Modo de ejecucion: normal o revalidation",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Numero de simbolos por descarga a Yahoo",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Numero de hilos para descargar y evaluar lotes en paralelo",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help=(
+            "Maximo de descargas por segundo a Yahoo entre todos los hilos (0 = sin limite). "
+            "Cuenta cada llamada real; lo servido del historico local no espera"
+        ),
+    )
+    parser.add_argument(
+        "--engine",
+        choices=list(ENGINES),
+        default="symbol",
+        help="Evaluacion simbolo a simbolo (con estado incremental) o matricial por lote",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help=(
+            "Procesos para la etapa de calculo (0 = en los hilos del escaneo). Usa el motor "
+            "matricial por mercado sobre una matriz de cierres compartida entre procesos"
+        ),
+    )
+    parser.add_argument(
+        "--force-email",
+        action="store_true",
+        help=(
+            "Enviar los correos aunque ya se enviara uno identico (repetir a mano una "
+            "ejecucion); sin la opcion la bandeja de salida los omite"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Perfilar la ejecucion (cpu: cProfile, memory: tracemalloc); resultados en logs/",
+    )
+    args = parser.parse_args()
+
+    if (args.start is None) != (args.end is None):
+        parser.error("--start y --end deben usarse juntos")
+    if args.start is not None and args.date is not None:
+        parser.error("--date no se puede combinar con --start/--end")
+    if args.processes < 0:
+        parser.error("--processes no puede ser negativo")
+
+    return args
 
 
 def resolve_execution_dates(date_arg: str | None) -> tuple[str, str]:
@@ -62,27 +141,184 @@ def resolve_execution_dates(date_arg: str | None) -> tuple[str, str]:
     return exec_date_str, end_date
 
 
-def resolve_symbols(market: dict) -> list[str]:
-    market_name = market["name"]
-    mode = market.get("mode", "list")
+def resolve_range_dates(start_arg: str, end_arg: str) -> tuple[list[str], str]:
+    start = datetime.strptime(start_arg, "%Y-%m-%d").date()
+    end = datetime.strptime(end_arg, "%Y-%m-%d").date()
+
+    if start > end:
+        raise ValueError("La fecha de inicio debe ser anterior o igual a la fecha de fin")
+
+    dates = []
+    current = start
+    while current <= end:
+        dates.append(current.strftime("%Y-%m-%d"))
+        current += timedelta(days=1)
+
+    end_date = (end + timedelta(days=1)).strftime("%Y-%m-%d")
+    return dates, end_date
+
+
+def register_cross(
+    cross: dict,
+    *,
+    window_sessions: int,
+    mode: str,
+) -> tuple[str, dict] | None:
+    """
+    Registra un cruce detectado (de cualquier par de periodos; la senal y
+    los periodos van en el propio cruce): comprueba duplicados, guarda el
+    evento y genera la grafica. Devuelve ("new", cruce) o ("confirmed", cruce) para
+    el resumen, o None si ya estaba registrado fuera de revalidacion.
+    """
+
+    symbol = cross["symbol"]
+    market_name = cross["market"]
+    event_date = cross["date"]
+    diff = cross["difference"]
+    signal_name = cross["signal"]
+    short_period = cross["short_period"]
+    long_period = cross["long_period"]
+    pair_tag = f"{short_period}/{long_period}"
+
+    with stage("registry", symbol):
+        registered = already_registered(symbol, signal_name, event_date)
+
+    if registered:
+        logger.info(f"Golden Cross {pair_tag} ya registrado para {symbol} en {event_date}")
+
+        # En modo revalidación, trackear como "confirmado"
+        if mode == "revalidation":
+            return "confirmed", {
+                "symbol": symbol,
+                "market": market_name,
+                "date": event_date,
+                "difference": diff,
+                "wma_short": cross["wma_short"],
+                "wma_long": cross["wma_long"],
+                "signal": signal_name,
+                "period_short": short_period,
+                "period_long": long_period,
+            }
+
+        return None
+
+    event = {
+        "symbol": symbol,
+        "market": market_name,
+        "signal": signal_name,
+        "date": event_date,
+        "wma_short": cross["wma_short"],
+        "wma_long": cross["wma_long"],
+        "difference": diff,
+        "period_short": short_period,
+        "period_long": long_period,
+        "pair": pair_tag,
+    }
+
+    logger.info("----- [!] -----")
+    logger.info(
+        f"GOLDEN CROSS {pair_tag} DETECTADO -> {symbol} {event_date} (diff={diff:.4f})"
+    )
+    logger.info("----- [!] -----")
+
+    with stage("save", symbol):
+        save_event(event)
+
+    with stage("chart", symbol):
+        # Import diferido: matplotlib solo se carga si hay un cruce que dibujar
+        from wma_cross_alerts.reporting.plotter import plot_golden_cross
+
+        chart_path = plot_golden_cross(
+            symbol=symbol,
+            market=market_name,
+            signal_name=signal_name,
+            event_date=event_date,
+            short_period=short_period,
+            long_period=long_period,
+            window_sessions=window_sessions,
+            close=cross["close"],
+            wma_short=cross.get("wma_short_series"),
+            wma_long=cross.get("wma_long_series"),
+        )
 
-    if mode == "all":
-        logger.info(f"Resolviendo universo COMPLETO para mercado {market_name}")
-        return get_universe(market_name)
+    return "new", {
+        "symbol": symbol,
+        "market": market_name,
+        "date": event_date,
+        "difference": diff,
+        "wma_short": cross["wma_short"],
+        "wma_long": cross["wma_long"],
+        "signal": signal_name,
+        "period_short": short_period,
+        "period_long": long_period,
+        "chart_path": chart_path,
+    }
+
+
+def log_summary(market_stats: dict[str, dict[str, int]]) -> None:
+    logger.info("RESUMEN POR MERCADO:")
+    logger.info(f"{'MERCADO':<15} | {'CONSULTADAS':<12} | {'GOLDEN CROSS':<12}")
+    logger.info("-" * 50)
+    for m_name, stats in market_stats.items():
+        logger.info(f"{m_name:<15} | {stats['scanned']:<12} | {stats['found']:<12}")
+    logger.info("-" * 50)
 
-    symbols = market.get("symbols", [])
-    logger.info(f"Usando lista explicita de simbolos para {market_name}: {symbols}")
-    return symbols
 
+def send_notifications(
+    exec_date: str,
+    *,
+    new_crosses: list[dict],
+    confirmed_crosses: list[dict],
+    invalid_symbols: list[tuple],
+    processing_errors: list[tuple],
+    market_stats: dict[str, dict[str, int]],
+    mode: str,
+    force: bool = False,
+) -> None:
+    with stage("email"):
+        if new_crosses:
+            send_cross_alert_email(
+                exec_date=exec_date,
+                golden_crosses=new_crosses,
+                invalid_symbols=invalid_symbols,
+                processing_errors=processing_errors,
+                mode=mode,
+                force=force,
+            )
+        else:
+            logger.info("No se detectaron Golden Cross en esta ejecucion")
+
+        if processing_errors or invalid_symbols:
+            send_error_report_email(
+                exec_date=exec_date,
+                processing_errors=processing_errors,
+                invalid_symbols=invalid_symbols,
+                mode=mode,
+                force=force,
+            )
+
+        # 4. Enviar confirmacion de ejecucion exitosa (si no hubo excepciones fatales)
+        send_success_execution_email(
+            exec_date=exec_date,
+            market_stats=market_stats,
+            golden_crosses_count=len(new_crosses),
+            mode=mode,
+            confirmed_crosses_count=len(confirmed_crosses),
+            force=force,
+        )
 
-def main() -> None:
-    args = parse_args()
-    exec_date, end_date = resolve_execution_dates(args.date)
 
-    logger.info("=" * 70)
-    logger.info("INICIO DE EJECUCION DEL SISTEMA")
-    logger.info(f"FECHA DE EJECUCION (CIERRE EVALUADO): {exec_date}")
-    logger.info("=" * 70)
+def _engine_label(args: argparse.Namespace) -> str:
+    if args.processes:
+        return f"motor matrix en {args.processes} proceso(s)"
+    return f"motor {args.engine}"
+
+
+def _prepare_scan(args: argparse.Namespace) -> tuple[dict, set[str], list[WmaPair]]:
+    """
+    Configuracion comun a la ejecucion diaria y al backfill: config, blacklist
+    y pares WMA, ademas del limite de descargas para todo el escaneo.
+    """
 
     config = load_config()
 
@@ -90,13 +326,79 @@ def main() -> None:
     if blacklist:
         logger.info(f"Blacklist activa ({len(blacklist)}): {sorted(blacklist)}")
 
-    signal_name = "golden_cross_wma"
-    signal_cfg = config["signals"][signal_name]
+    pairs = wma_pairs(config)
+    if len(pairs) > 1:
+        logger.info(f"Pares WMA: {', '.join(pair.tag for pair in pairs)}")
+
+    set_rate_limit(args.rate_limit)
+    logger.info(
+        f"Escaneo con {args.workers} worker(s), lotes de {args.batch_size} simbolos, {_engine_label(args)}"
+    )
+
+    return config, blacklist, pairs
+
 
-    short_period = signal_cfg["short_period"]
-    long_period = signal_cfg["long_period"]
+def _scan_options(args: argparse.Namespace) -> dict:
+    return {
+        "engine": args.engine,
+        "workers": args.workers,
+        "processes": args.processes,
+        "batch_size": args.batch_size,
+    }
 
-    start_date = "2000-01-01"
+
+def main() -> None:
+    args = parse_args()
+
+    with profiled(args.profile, "main"):
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    # Entrega en segundo plano, incluidos los correos pendientes de ejecuciones anteriores
+    start_outbox()
+
+    status = "error"
+    summary: dict = {}
+
+    try:
+        if args.start is not None:
+            summary = run_backfill(args)
+        else:
+            summary = run_daily(args)
+        status = "ok"
+    finally:
+        # Vuelca el journal de eventos al arbol JSON (tambien tras un error:
+        # lo ya confirmado no se pierde, pero conviene dejarlo compactado)
+        try:
+            with stage("event_compact"):
+                flush_events(compact=True)
+        except Exception as e:
+            logger.error(f"Error compactando el journal de eventos: {str(e)}", exc_info=True)
+
+        # Los correos se entregan en segundo plano; se espera un tiempo
+        # acotado y lo que no salga queda en data/outbox para reintentar
+        with stage("email_drain"):
+            drain_outbox()
+        close_mailer()
+
+        # Manifiesto data/runs/<fecha>[_<modo>].json con los tiempos por etapa y
+        # metricas para el textfile collector de node-exporter
+        metrics = current_run()
+        finish_run(status=status, **summary)
+        export_run(metrics, status=status, summary=summary)
+
+
+def run_daily(args: argparse.Namespace) -> dict:
+    exec_date, end_date = resolve_execution_dates(args.date)
+    start_run(make_run_id(exec_date, args.mode), args.mode)
+
+    logger.info("=" * 70)
+    logger.info("INICIO DE EJECUCION DEL SISTEMA")
+    logger.info(f"FECHA DE EJECUCION (CIERRE EVALUADO): {exec_date}")
+    logger.info("=" * 70)
+
+    config, blacklist, pairs = _prepare_scan(args)
 
     new_crosses: list[dict] = []
     confirmed_crosses: list[dict] = []
@@ -104,150 +406,198 @@ def main() -> None:
     processing_errors: list[tuple] = []
     market_stats: dict[str, dict[str, int]] = {}
 
-    for market in config["markets"]:
-        market_name = market["name"]
-        symbols = resolve_symbols(market)
-        market_stats[market_name] = {"scanned": len(symbols), "found": 0}
-
-        for symbol in symbols:
-            if symbol in blacklist:
-                logger.info(f"⏭️  Simbolo ignorado por blacklist: {symbol}")
+    with scan_markets(
+        config,
+        blacklist,
+        market_stats,
+        **_scan_options(args),
+        end_date=end_date,
+        exec_date=exec_date,
+        pairs=pairs,
+        mode=args.mode,
+    ) as results:
+        for result in results:
+            symbol = result["symbol"]
+            market_name = result["market"]
+            status = result["status"]
+
+            if status == "invalid":
+                invalid_symbols.append((symbol, market_name, result["reason"]))
+                incr("errors_invalid_data")
                 continue
 
-            logger.info("-" * 70)
-            logger.info(f"MERCADO: {market_name} | EMPRESA: {symbol}")
-            logger.info("-" * 70)
+            if status == "error":
+                processing_errors.append((symbol, market_name, result["error"]))
+                continue
 
-            try:
-                close = fetch_daily_close(
-                    symbol,
-                    start=start_date,
-                    end=end_date,
-                )
+            if status != "cross":
+                continue
 
-                if close.empty or len(close) < long_period + 1:
-                    logger.warning(f"Datos insuficientes para {symbol}")
-                    invalid_symbols.append((symbol, market_name, "Datos insuficientes"))
+            for cross in result["crosses"]:
+                try:
+                    registered = register_cross(
+                        cross,
+                        window_sessions=config["chart"]["window_sessions"],
+                        mode=args.mode,
+                    )
+                except Exception as e:
+                    logger.error(f"Error procesando {symbol}: {str(e)}", exc_info=True)
+                    processing_errors.append((symbol, market_name, str(e)))
+                    incr("errors_register")
                     continue
 
-                wma_short = wma(close, short_period)
-                wma_long = wma(close, long_period)
+                if registered is None:
+                    continue
 
-                is_cross = last_cross_up(wma_short, wma_long)
-                event_date = close.index[-1].strftime("%Y-%m-%d")
+                kind, entry = registered
+                if kind == "confirmed":
+                    confirmed_crosses.append(entry)
+                else:
+                    new_crosses.append(entry)
+                    market_stats[market_name]["found"] += 1
 
-                if event_date != exec_date:
-                    logger.info(
-                        f"Ultimo cierre disponible ({event_date}) no coincide con fecha objetivo ({exec_date})"
-                    )
-                    continue
+    # Eventos confirmados (journal + indice) antes de notificar
+    with stage("event_flush"):
+        flush_events()
 
-                if not is_cross:
-                    logger.info(f"No hay Golden Cross en el cierre {event_date} para {symbol}")
-                    continue
+    logger.info("=" * 70)
+    logger.info("FIN DE EJECUCION DEL SISTEMA")
+    logger.info("=" * 70)
 
-                if already_registered(symbol, signal_name, event_date):
-                    logger.info(f"Golden Cross ya registrado para {symbol} en {event_date}")
-                    
-                    # En modo revalidación, trackear como "confirmado"
-                    if args.mode == "revalidation":
-                        diff = float(wma_short.iloc[-1] - wma_long.iloc[-1])
-                        confirmed_crosses.append({
-                            "symbol": symbol,
-                            "market": market_name,
-                            "date": event_date,
-                            "difference": diff,
-                            "wma_short": float(wma_short.iloc[-1]),
-                            "wma_long": float(wma_long.iloc[-1]),
-                        })
-                    
-                    continue
+    log_summary(market_stats)
 
-                diff = float(wma_short.iloc[-1] - wma_long.iloc[-1])
-
-                event = {
-                    "symbol": symbol,
-                    "market": market_name,
-                    "signal": signal_name,
-                    "date": event_date,
-                    "wma_short": float(wma_short.iloc[-1]),
-                    "wma_long": float(wma_long.iloc[-1]),
-                    "difference": diff,
-                    "period_short": short_period,
-                    "period_long": long_period,
-                }
-
-                logger.info("----- [!] -----")
-                logger.info(
-                    f"GOLDEN CROSS DETECTADO -> {symbol} {event_date} (diff={diff:.4f})"
-                )
-                logger.info("----- [!] -----")
+    send_notifications(
+        exec_date,
+        new_crosses=new_crosses,
+        confirmed_crosses=confirmed_crosses,
+        invalid_symbols=invalid_symbols,
+        processing_errors=processing_errors,
+        market_stats=market_stats,
+        mode=args.mode,
+        force=args.force_email,
+    )
 
-                save_event(event)
+    return {
+        "markets": market_stats,
+        "new_crosses": len(new_crosses),
+        "confirmed_crosses": len(confirmed_crosses),
+        "invalid_symbols": len(invalid_symbols),
+        "processing_errors": len(processing_errors),
+    }
 
-                chart_path = plot_golden_cross(
-                    symbol=symbol,
-                    market=market_name,
-                    signal_name=signal_name,
-                    event_date=event_date,
-                    short_period=short_period,
-                    long_period=long_period,
-                    window_sessions=config["chart"]["window_sessions"],
-                )
 
-                new_crosses.append({
-                    "symbol": symbol,
-                    "market": market_name,
-                    "date": event_date,
-                    "difference": diff,
-                    "wma_short": float(wma_short.iloc[-1]),
-                    "wma_long": float(wma_long.iloc[-1]),
-                    "chart_path": chart_path,
-                })
-                market_stats[market_name]["found"] += 1
+def run_backfill(args: argparse.Namespace) -> dict:
+    """
+    Backfill de un rango de fechas en un solo proceso: cada simbolo se
+    descarga una vez, las WMA se calculan una vez y los cruces de todo el
+    rango se detectan de forma vectorizada. Despues, fecha a fecha, se
+    registran, se generan las graficas y se envian las notificaciones igual
+    que en una ejecucion diaria.
+    """
 
-            except Exception as e:
-                logger.error(f"Error procesando {symbol}: {str(e)}", exc_info=True)
-                processing_errors.append((symbol, market_name, str(e)))
+    dates, end_date = resolve_range_dates(args.start, args.end)
+    start_run(make_run_id(f"{dates[0]}_{dates[-1]}", args.mode), args.mode)
 
     logger.info("=" * 70)
-    logger.info("FIN DE EJECUCION DEL SISTEMA")
+    logger.info("INICIO DE BACKFILL DEL SISTEMA")
+    logger.info(f"RANGO DE FECHAS: {dates[0]} -> {dates[-1]} ({len(dates)} dias)")
     logger.info("=" * 70)
 
-    logger.info("RESUMEN POR MERCADO:")
-    logger.info(f"{'MERCADO':<15} | {'CONSULTADAS':<12} | {'GOLDEN CROSS':<12}")
-    logger.info("-" * 50)
-    for m_name, stats in market_stats.items():
-        logger.info(f"{m_name:<15} | {stats['scanned']:<12} | {stats['found']:<12}")
-    logger.info("-" * 50)
+    config, blacklist, pairs = _prepare_scan(args)
 
-    if new_crosses:
-        send_cross_alert_email(
-            exec_date=exec_date,
-            golden_crosses=new_crosses,
-            invalid_symbols=invalid_symbols,
-            processing_errors=processing_errors,
-            mode=args.mode,
-        )
-    else:
-        logger.info("No se detectaron Golden Cross en esta ejecucion")
+    invalid_symbols: list[tuple] = []
+    processing_errors: list[tuple] = []
+    market_stats: dict[str, dict[str, int]] = {}
+    new_count = confirmed_count = register_errors = 0
+    crosses_by_date: dict[str, list[dict]] = {d: [] for d in dates}
+
+    with scan_markets(
+        config,
+        blacklist,
+        market_stats,
+        **_scan_options(args),
+        end_date=end_date,
+        dates=dates,
+        pairs=pairs,
+    ) as results:
+        for result in results:
+            if result["status"] == "invalid":
+                invalid_symbols.append((result["symbol"], result["market"], result["reason"]))
+                incr("errors_invalid_data")
+            elif result["status"] == "error":
+                processing_errors.append((result["symbol"], result["market"], result["error"]))
+            else:
+                for cross in result["crosses"]:
+                    crosses_by_date[cross["date"]].append(cross)
+
+    for exec_date in dates:
+        logger.info("=" * 70)
+        logger.info(f"BACKFILL - FECHA EVALUADA: {exec_date}")
+        logger.info("=" * 70)
+
+        new_crosses: list[dict] = []
+        confirmed_crosses: list[dict] = []
+        day_errors: list[tuple] = []
+        day_stats = {m: {"scanned": st["scanned"], "found": 0} for m, st in market_stats.items()}
+
+        for cross in crosses_by_date[exec_date]:
+            try:
+                registered = register_cross(
+                    cross,
+                    window_sessions=config["chart"]["window_sessions"],
+                    mode=args.mode,
+                )
+            except Exception as e:
+                logger.error(f"Error procesando {cross['symbol']}: {str(e)}", exc_info=True)
+                day_errors.append((cross["symbol"], cross["market"], str(e)))
+                incr("errors_register")
+                continue
 
-    if processing_errors or invalid_symbols:
-        send_error_report_email(
-            exec_date=exec_date,
-            processing_errors=processing_errors,
-            invalid_symbols=invalid_symbols,
+            if registered is None:
+                continue
+
+            kind, entry = registered
+            if kind == "confirmed":
+                confirmed_crosses.append(entry)
+            else:
+                new_crosses.append(entry)
+                day_stats[cross["market"]]["found"] += 1
+                market_stats[cross["market"]]["found"] += 1
+
+        with stage("event_flush"):
+            flush_events()
+
+        new_count += len(new_crosses)
+        confirmed_count += len(confirmed_crosses)
+        register_errors += len(day_errors)
+
+        log_summary(day_stats)
+
+        # Los errores de descarga y datos insuficientes son del rango completo:
+        # se notifican una sola vez, con la primera fecha.
+        first_day = exec_date == dates[0]
+        send_notifications(
+            exec_date,
+            new_crosses=new_crosses,
+            confirmed_crosses=confirmed_crosses,
+            invalid_symbols=invalid_symbols if first_day else [],
+            processing_errors=(processing_errors if first_day else []) + day_errors,
+            market_stats=day_stats,
             mode=args.mode,
+            force=args.force_email,
         )
 
-    # 4. Enviar confirmacion de ejecucion exitosa (si no hubo excepciones fatales)
-    send_success_execution_email(
-        exec_date=exec_date,
-        market_stats=market_stats,
-        golden_crosses_count=len(new_crosses),
-        mode=args.mode,
-        confirmed_crosses_count=len(confirmed_crosses),
-    )
+    logger.info("=" * 70)
+    logger.info("FIN DE BACKFILL DEL SISTEMA")
+    logger.info("=" * 70)
+
+    return {
+        "markets": market_stats,
+        "new_crosses": new_count,
+        "confirmed_crosses": confirmed_count,
+        "invalid_symbols": len(invalid_symbols),
+        "processing_errors": len(processing_errors) + register_errors,
+    }
 
 
 if __name__ == "__main__":
@@ -1,13 +1,20 @@
+import atexit
+import hashlib
 import os
-import ssl
-import smtplib
+import threading
+import uuid
 from pathlib import Path
 from email.message import EmailMessage
+from typing import TYPE_CHECKING
 
 from dotenv import load_dotenv
 
+from wma_cross_alerts.notifiers.outbox import enqueue
 from wma_cross_alerts.utils.logger import get_logger
 
+if TYPE_CHECKING:
+    import smtplib
+
 load_dotenv()
 
 logger = get_logger("email_notifier")
@@ -24,6 +31,36 @@ def _parse_recipients(value: str) -> list[str]:
     return [v.strip() for v in value.split(",") if v.strip()]
 
 
+def _message_key(kind: str, exec_date: str, mode: str, msg: EmailMessage, *, force: bool = False) -> str:
+    """
+    Clave de idempotencia para la bandeja de salida: el mismo correo
+    (mismo tipo, fecha, modo y contenido, adjuntos incluidos) no se envia
+    dos veces. Una grafica regenerada cambia la clave.
+
+    Con force (reenvios y ejecuciones manuales) la clave lleva un sufijo
+    unico, asi que el correo se encola aunque ya se enviara uno igual.
+    """
+
+    digest = hashlib.sha256()
+    for part in msg.walk():
+        if part.is_multipart():
+            continue
+        digest.update(part.get_content_type().encode("ascii"))
+        digest.update(str(part.get_filename() or "").encode("utf-8"))
+        digest.update(part.get_payload(decode=True) or b"")
+
+    key = f"{exec_date}_{kind}_{mode}_{digest.hexdigest()[:12]}"
+    if force:
+        key += f"_{uuid.uuid4().hex[:8]}"
+    return key
+
+
+def _cross_periods(gc: dict) -> tuple[int, int]:
+    # Todos los cruces traen sus periodos (main y resend_alerts los copian
+    # del evento): un valor por defecto mostraria periodos falsos
+    return gc["period_short"], gc["period_long"]
+
+
 def _get_smtp_config():
     smtp_host = os.getenv("SMTP_HOST")
     smtp_port = int(os.getenv("SMTP_PORT", "587"))
@@ -37,6 +74,115 @@ def _get_smtp_config():
     return smtp_host, smtp_port, smtp_user, smtp_password, email_from
 
 
+# =====================================================
+# SESION SMTP COMPARTIDA
+# =====================================================
+
+class Mailer:
+    """
+    Conexion SMTP autenticada que se reutiliza para todos los correos de
+    una ejecucion: un solo STARTTLS + login en lugar de uno por correo.
+
+    La conexion se abre en el primer envio. Si el servidor la ha cerrado
+    (timeout por inactividad, reinicio...) se reconecta y se reintenta
+    una vez.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        timeout: float = 60.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self._server: "smtplib.SMTP | None" = None
+        self._lock = threading.Lock()
+
+    def send(self, msg: EmailMessage) -> None:
+        import smtplib
+
+        with self._lock:
+            try:
+                self._connection().send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                logger.warning(f"Conexion SMTP perdida ({e}); reconectando")
+                self._disconnect()
+                self._connection().send_message(msg)
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+    def __enter__(self) -> "Mailer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _connection(self) -> "smtplib.SMTP":
+        if self._server is None:
+            # Import diferido: ssl/smtplib solo cuando de verdad se envia correo
+            import smtplib
+            import ssl
+
+            context = ssl.create_default_context()
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                server.starttls(context=context)
+                server.login(self.user, self.password)
+            except Exception:
+                server.close()
+                raise
+            self._server = server
+            logger.info(f"Sesion SMTP abierta con {self.host}:{self.port}")
+        return self._server
+
+    def _disconnect(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        self._server = None
+
+
+_mailer: Mailer | None = None
+_mailer_lock = threading.Lock()
+
+
+def get_mailer() -> Mailer:
+    """
+    Devuelve el Mailer compartido del proceso (se crea en el primer uso).
+    """
+
+    global _mailer
+    with _mailer_lock:
+        if _mailer is None:
+            smtp_host, smtp_port, smtp_user, smtp_password, _ = _get_smtp_config()
+            _mailer = Mailer(smtp_host, smtp_port, smtp_user, smtp_password)
+            atexit.register(close_mailer)
+        return _mailer
+
+
+def close_mailer() -> None:
+    """
+    Cierra la sesion SMTP compartida, si hay una abierta.
+    """
+
+    global _mailer
+    with _mailer_lock:
+        if _mailer is not None:
+            _mailer.close()
+            _mailer = None
+
+
 # =====================================================
 # EMAIL RESUMEN DIARIO (ALERTAS)
 # =====================================================
@@ -47,10 +193,11 @@ def send_cross_alert_email(
     invalid_symbols: list[tuple],
     processing_errors: list[tuple],
     mode: str = "normal",
-) -> None:
+    force: bool = False,
+) -> bool:
     if not _env_bool("EMAIL_ENABLED", False):
         logger.info("EMAIL_ENABLED=false, no se envia correo de alertas")
-        return
+        return False
 
     if mode == "revalidation":
         # En revalidacion, las nuevas alertas van al correo de errores/admin
@@ -63,22 +210,26 @@ def send_cross_alert_email(
             raise RuntimeError("EMAIL_TO_ALERTS no esta definido")
 
     recipients = _parse_recipients(email_to_raw)
-    smtp_host, smtp_port, smtp_user, smtp_password, email_from = _get_smtp_config()
+    *_, email_from = _get_smtp_config()
 
     if mode == "revalidation":
         subject = f"🔍 Golden Cross RECUPERADO [REVALIDACIÓN] | {exec_date} | {len(golden_crosses)} nuevas"
     else:
         subject = f"📈 Alerta Golden Cross WMA | {exec_date} | {len(golden_crosses)} señales"
 
+    pairs = sorted({_cross_periods(gc) for gc in golden_crosses})
+    pair_tags = " | ".join(f"{short} / {long}" for short, long in pairs)
+
     blocks = []
     for i, gc in enumerate(golden_crosses, 1):
+        short_period, long_period = _cross_periods(gc)
         blocks.append(f"""
         <div style="margin-bottom:22px;">
             <h3>{i}. {gc['symbol']} <span style="color:#666;">({gc['market']})</span></h3>
             <ul>
                 <li><b>Fecha:</b> {gc['date']}</li>
-                <li><b>WMA corta (30):</b> {gc['wma_short']:.4f}</li>
-                <li><b>WMA larga (200):</b> {gc['wma_long']:.4f}</li>
+                <li><b>WMA corta ({short_period}):</b> {gc['wma_short']:.4f}</li>
+                <li><b>WMA larga ({long_period}):</b> {gc['wma_long']:.4f}</li>
                 <li><b>Diferencia:</b> <b>{gc['difference']:.4f}</b></li>
             </ul>
         </div>
@@ -88,7 +239,7 @@ def send_cross_alert_email(
     html_body = f"""
     <html>
       <body style="font-family: Arial, sans-serif;">
-        <h2>Alerta - Golden Cross WMA (30 / 200)</h2>
+        <h2>Alerta - Golden Cross WMA ({pair_tags})</h2>
         <p><b>Fecha evaluada:</b> {exec_date}</p>
         <p><b>Total de cruces detectados:</b> {len(golden_crosses)}</p>
         <hr>
@@ -116,14 +267,12 @@ def send_cross_alert_email(
                     filename=Path(path).name,
                 )
 
-    context = ssl.create_default_context()
+    if not enqueue(msg, _message_key("alerts", exec_date, mode, msg, force=force)):
+        logger.warning("Email de alertas omitido: ya se envio uno identico (--force-email para reenviarlo)")
+        return False
 
-    with smtplib.SMTP(smtp_host, smtp_port) as server:
-        server.starttls(context=context)
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
-
-    logger.info(f"Email de alertas enviado ({len(golden_crosses)} cruces)")
+    logger.info(f"Email de alertas encolado ({len(golden_crosses)} cruces)")
+    return True
 
 
 # =====================================================
@@ -135,17 +284,18 @@ def send_error_report_email(
     processing_errors: list[tuple],
     invalid_symbols: list[tuple],
     mode: str = "normal",
-) -> None:
+    force: bool = False,
+) -> bool:
     if not _env_bool("EMAIL_ENABLED", False):
         logger.info("EMAIL_ENABLED=false, no se envia correo de errores")
-        return
+        return False
 
     email_to_raw = os.getenv("EMAIL_TO_ERRORS")
     if not email_to_raw:
         raise RuntimeError("EMAIL_TO_ERRORS no esta definido")
 
     recipients = _parse_recipients(email_to_raw)
-    smtp_host, smtp_port, smtp_user, smtp_password, email_from = _get_smtp_config()
+    *_, email_from = _get_smtp_config()
 
     if mode == "revalidation":
         subject = f"🔍 Errores en REVALIDACIÓN | {exec_date}"
@@ -194,14 +344,12 @@ def send_error_report_email(
     msg.set_content("Este correo contiene contenido HTML.")
     msg.add_alternative(html_body, subtype="html")
 
-    context = ssl.create_default_context()
-
-    with smtplib.SMTP(smtp_host, smtp_port) as server:
-        server.starttls(context=context)
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
+    if not enqueue(msg, _message_key("errors", exec_date, mode, msg, force=force)):
+        logger.warning("Email de errores omitido: ya se envio uno identico (--force-email para reenviarlo)")
+        return False
 
-    logger.info("Email de errores enviado correctamente")
+    logger.info("Email de errores encolado correctamente")
+    return True
 
 
 # =====================================================
@@ -214,19 +362,20 @@ def send_success_execution_email(
     golden_crosses_count: int,
     mode: str = "normal",
     confirmed_crosses_count: int = 0,
-) -> None:
+    force: bool = False,
+) -> bool:
     if not _env_bool("EMAIL_ENABLED", False):
         logger.info("EMAIL_ENABLED=false, no se envia correo de confirmacion")
-        return
+        return False
 
     # Usamos el mismo destinatario que para los errores (admin/monitoring)
     email_to_raw = os.getenv("EMAIL_TO_ERRORS")
     if not email_to_raw:
         logger.warning("EMAIL_TO_ERRORS no definido, omitiendo correo de confirmacion")
-        return
+        return False
 
     recipients = _parse_recipients(email_to_raw)
-    smtp_host, smtp_port, smtp_user, smtp_password, email_from = _get_smtp_config()
+    *_, email_from = _get_smtp_config()
 
     if mode == "revalidation":
         subject = f"✅ Revalidación Correcta [REVALIDACIÓN SUCCESS] | {exec_date}"
@@ -322,11 +471,9 @@ def send_success_execution_email(
     msg.set_content("Ejecucion finalizada correctamente. Ver contenido HTML.")
     msg.add_alternative(html_body, subtype="html")
 
-    context = ssl.create_default_context()
-
-    with smtplib.SMTP(smtp_host, smtp_port) as server:
-        server.starttls(context=context)
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
+    if not enqueue(msg, _message_key("success", exec_date, mode, msg, force=force)):
+        logger.warning("Email de confirmacion omitido: ya se envio uno identico (--force-email para reenviarlo)")
+        return False
 
-    logger.info(f"Email de confirmacion enviado a {recipients}")
+    logger.info(f"Email de confirmacion encolado para {recipients}")
+    return True
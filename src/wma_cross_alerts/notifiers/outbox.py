@@ -0,0 +1,410 @@
+"""
+Bandeja de salida persistente para los correos del sistema.
+
+Los send_*_email no hablan con SMTP: serializan el mensaje en
+data/outbox/pending/ y un hilo en segundo plano lo entrega con reintentos
+y backoff exponencial. Si el servidor de correo no esta disponible los
+mensajes se quedan en disco y se reintentan en la siguiente ejecucion (o
+con `python -m wma_cross_alerts.notifiers.outbox`).
+
+Varios procesos pueden compartir la bandeja (dos ejecuciones solapadas, o
+una ejecucion y la entrega manual): los cambios de estado se hacen con un
+flock sobre data/outbox/outbox.lock y cada mensaje se reclama moviendolo a
+inflight/ antes de enviarlo, asi que solo lo envia quien lo movio. Si ese
+proceso muere a mitad, el mensaje vuelve a pending/ (su proceso ya no
+existe o lleva mas de OUTBOX_INFLIGHT_SECS reclamado).
+
+Estructura:
+    data/outbox/pending/<key>.eml + <key>.json   pendientes (mensaje + intentos)
+    data/outbox/inflight/<key>.eml + <key>.json  reclamados por un proceso que los esta enviando
+    data/outbox/sent/<key>.json                  entregados (marca de idempotencia durante
+                                                 OUTBOX_SENT_RETENTION_DAYS)
+    data/outbox/failed/<key>.eml + <key>.json    agotaron los reintentos
+    data/outbox/sink/<key>.eml                   entregas con EMAIL_TRANSPORT=file
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from wma_cross_alerts.utils.atomic import write_atomic
+from wma_cross_alerts.utils.logger import get_logger
+
+
+logger = get_logger("email_outbox")
+
+OUTBOX_DIR = Path("data") / "outbox"
+PENDING_DIR = OUTBOX_DIR / "pending"
+INFLIGHT_DIR = OUTBOX_DIR / "inflight"
+SENT_DIR = OUTBOX_DIR / "sent"
+FAILED_DIR = OUTBOX_DIR / "failed"
+SINK_DIR = OUTBOX_DIR / "sink"
+LOCK_PATH = OUTBOX_DIR / "outbox.lock"
+
+RETRY_BASE_SECS = float(os.getenv("OUTBOX_RETRY_BASE_SECS", "30"))
+RETRY_MAX_SECS = float(os.getenv("OUTBOX_RETRY_MAX_SECS", "3600"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+POLL_SECS = float(os.getenv("OUTBOX_POLL_SECS", "1"))
+DRAIN_SECS = float(os.getenv("OUTBOX_DRAIN_SECS", "60"))
+INFLIGHT_SECS = float(os.getenv("OUTBOX_INFLIGHT_SECS", "900"))
+# 0 = conservar las marcas de enviados indefinidamente
+SENT_RETENTION_DAYS = float(os.getenv("OUTBOX_SENT_RETENTION_DAYS", "30"))
+
+# smtp: sesion SMTP compartida (notifiers.email.get_mailer)
+# file: escribe el .eml en data/outbox/sink (sustituto local para pruebas)
+TRANSPORT = os.getenv("EMAIL_TRANSPORT", "smtp").strip().lower()
+
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_stop = threading.Event()
+_worker: threading.Thread | None = None
+
+
+def enqueue(msg: EmailMessage, key: str) -> bool:
+    """
+    Guarda el mensaje en la bandeja de salida y despierta al worker.
+
+    key es la clave de idempotencia: si ya hay un mensaje pendiente, en
+    envio o entregado con esa clave no se encola de nuevo. Devuelve True si
+    se encolo.
+    """
+
+    with _outbox_lock():
+        if any((d / f"{key}.json").exists() for d in (PENDING_DIR, INFLIGHT_DIR, SENT_DIR)):
+            logger.info(f"Correo {key} ya encolado o enviado; se omite")
+            return False
+
+        write_atomic(PENDING_DIR / f"{key}.eml", msg.as_bytes(policy=policy.SMTP), fsync=True)
+        _write_meta(PENDING_DIR / f"{key}.json", {
+            "key": key,
+            "subject": str(msg["Subject"]),
+            "enqueued_at": _now_iso(),
+            "attempts": 0,
+            "next_attempt_at": 0.0,
+            "last_error": None,
+        })
+
+    logger.info(f"Correo encolado: {key}")
+    start_worker()
+    _wakeup.set()
+    return True
+
+
+def deliver_pending() -> int:
+    """
+    Intenta entregar (una vez) los mensajes pendientes cuyo reintento ya
+    toca. Devuelve el numero de mensajes que siguen pendientes.
+    """
+
+    _release_stale_claims()
+    now = time.time()
+
+    for meta_path in sorted(PENDING_DIR.glob("*.json")):
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.error(f"Metadatos de correo ilegibles {meta_path}: {e}")
+            continue
+
+        if meta.get("next_attempt_at", 0.0) > now:
+            continue
+
+        key = meta["key"]
+        claimed = _claim(key)
+        if claimed is None:
+            # Otro proceso lo ha reclamado (o ya lo entrego) antes
+            continue
+        meta = claimed
+
+        meta_path = INFLIGHT_DIR / f"{key}.json"
+        eml_path = INFLIGHT_DIR / f"{key}.eml"
+
+        try:
+            with open(eml_path, "rb") as f:
+                msg = BytesParser(policy=policy.default).parse(f)
+            _send(msg, key)
+        except Exception as e:
+            _register_failure(meta_path, eml_path, meta, e)
+            continue
+
+        with _outbox_lock():
+            meta.pop("claimed_by", None)
+            meta.pop("claimed_at", None)
+            meta["sent_at"] = _now_iso()
+            _write_meta(SENT_DIR / f"{key}.json", meta)
+            eml_path.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+
+        logger.info(f"Correo entregado: {key} ({meta.get('subject')})")
+
+    return pending_count()
+
+
+def prune_sent() -> int:
+    """
+    Borra las marcas de sent/ con mas de OUTBOX_SENT_RETENTION_DAYS dias.
+    Pasado ese plazo un correo identico se volveria a enviar. Devuelve el
+    numero de marcas borradas.
+    """
+
+    if SENT_RETENTION_DAYS <= 0 or not SENT_DIR.exists():
+        return 0
+
+    cutoff = time.time() - SENT_RETENTION_DAYS * 86400
+    removed = 0
+    for path in SENT_DIR.glob("*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+
+    if removed:
+        logger.info(f"Bandeja de salida: {removed} marca(s) de enviados caducadas borradas")
+    return removed
+
+
+def pending_count() -> int:
+    if not PENDING_DIR.exists():
+        return 0
+    return sum(1 for _ in PENDING_DIR.glob("*.json"))
+
+
+def _due_count() -> int:
+    """Pendientes cuyo siguiente intento ya toca (los que esperan backoff no cuentan)."""
+
+    if not PENDING_DIR.exists():
+        return 0
+
+    now = time.time()
+    due = 0
+    for meta_path in PENDING_DIR.glob("*.json"):
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if meta.get("next_attempt_at", 0.0) <= now:
+            due += 1
+
+    # Los que este proceso esta enviando en este momento tambien cuentan
+    for meta_path in INFLIGHT_DIR.glob("*.json"):
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if meta.get("claimed_by") == os.getpid():
+            due += 1
+    return due
+
+
+def start_worker() -> None:
+    """
+    Arranca (si no esta ya en marcha) el hilo que vacia la bandeja.
+    """
+
+    global _worker
+    with _lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _stop.clear()
+        _worker = threading.Thread(target=_run_worker, name="email-outbox", daemon=True)
+        _worker.start()
+
+
+def drain(timeout: float = DRAIN_SECS) -> int:
+    """
+    Espera hasta timeout segundos a que se vacie la bandeja y para el worker.
+    Lo que quede pendiente se reintenta en la siguiente ejecucion.
+    Devuelve el numero de mensajes pendientes.
+    """
+
+    global _worker
+
+    deadline = time.monotonic() + timeout
+    while _worker is not None and _worker.is_alive() and _due_count() > 0:
+        if time.monotonic() >= deadline:
+            break
+        _wakeup.set()
+        time.sleep(min(POLL_SECS, 0.1))
+
+    _stop.set()
+    _wakeup.set()
+    if _worker is not None:
+        _worker.join(timeout=max(0.0, deadline - time.monotonic()) + 5.0)
+        _worker = None
+
+    remaining = pending_count()
+    if remaining:
+        logger.warning(f"Quedan {remaining} correos pendientes en {PENDING_DIR}; se reintentaran mas tarde")
+    return remaining
+
+
+def _run_worker() -> None:
+    try:
+        prune_sent()
+    except Exception as e:
+        logger.error(f"Error limpiando {SENT_DIR}: {e}")
+
+    while not _stop.is_set():
+        try:
+            deliver_pending()
+        except Exception as e:
+            logger.error(f"Error en el worker de correo: {e}", exc_info=True)
+        _wakeup.wait(POLL_SECS)
+        _wakeup.clear()
+
+
+def _send(msg: EmailMessage, key: str) -> None:
+    if TRANSPORT == "file":
+        write_atomic(SINK_DIR / f"{key}.eml", msg.as_bytes(policy=policy.SMTP), fsync=True)
+        return
+
+    # Import diferido: notifiers.email importa este modulo
+    from wma_cross_alerts.notifiers.email import get_mailer
+
+    get_mailer().send(msg)
+
+
+def _register_failure(meta_path: Path, eml_path: Path, meta: dict, error: Exception) -> None:
+    # meta_path/eml_path son los de inflight/: el mensaje vuelve a pending/
+    # con el siguiente intento programado, o pasa a failed/
+    key = meta["key"]
+    attempts = int(meta.get("attempts", 0)) + 1
+    meta["attempts"] = attempts
+    meta["last_error"] = str(error)
+    meta.pop("claimed_by", None)
+    meta.pop("claimed_at", None)
+
+    with _outbox_lock():
+        if attempts >= MAX_ATTEMPTS:
+            _write_meta(FAILED_DIR / f"{key}.json", meta)
+            FAILED_DIR.mkdir(parents=True, exist_ok=True)
+            eml_path.replace(FAILED_DIR / eml_path.name)
+            meta_path.unlink(missing_ok=True)
+            logger.error(f"Correo {key} descartado tras {attempts} intentos: {error}")
+            return
+
+        delay = min(RETRY_BASE_SECS * (2 ** (attempts - 1)), RETRY_MAX_SECS)
+        meta["next_attempt_at"] = time.time() + delay
+        _write_meta(PENDING_DIR / f"{key}.json", meta)
+        eml_path.replace(PENDING_DIR / eml_path.name)
+        meta_path.unlink(missing_ok=True)
+
+    logger.warning(f"Fallo enviando correo {key} (intento {attempts}); reintento en {delay:.0f}s: {error}")
+
+
+@contextmanager
+def _outbox_lock() -> Iterator[None]:
+    """
+    Lock exclusivo de la bandeja entre hilos (threading) y procesos (flock).
+    No es reentrante.
+    """
+
+    with _lock:
+        OUTBOX_DIR.mkdir(parents=True, exist_ok=True)
+        fd = os.open(LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+
+def _claim(key: str) -> dict | None:
+    """
+    Mueve un pendiente a inflight/ a nombre de este proceso. Devuelve sus
+    metadatos, o None si ya no esta pendiente o aun no toca reintentarlo.
+    """
+
+    meta_path = PENDING_DIR / f"{key}.json"
+    eml_path = PENDING_DIR / f"{key}.eml"
+
+    with _outbox_lock():
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+        if meta.get("next_attempt_at", 0.0) > time.time():
+            return None
+
+        meta["claimed_by"] = os.getpid()
+        meta["claimed_at"] = time.time()
+
+        INFLIGHT_DIR.mkdir(parents=True, exist_ok=True)
+        _write_meta(INFLIGHT_DIR / meta_path.name, meta)
+        os.replace(eml_path, INFLIGHT_DIR / eml_path.name)
+        meta_path.unlink()
+
+    return meta
+
+
+def _release_stale_claims() -> None:
+    """
+    Devuelve a pending/ los mensajes reclamados por un proceso que ya no
+    existe o que llevan mas de OUTBOX_INFLIGHT_SECS en inflight/.
+    """
+
+    if not INFLIGHT_DIR.exists():
+        return
+
+    now = time.time()
+    with _outbox_lock():
+        for meta_path in INFLIGHT_DIR.glob("*.json"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.error(f"Metadatos de correo ilegibles {meta_path}: {e}")
+                continue
+
+            pid = meta.get("claimed_by")
+            expired = now - meta.get("claimed_at", 0.0) > INFLIGHT_SECS
+            if _process_alive(pid) and not expired:
+                continue
+
+            key = meta["key"]
+            meta.pop("claimed_by", None)
+            meta.pop("claimed_at", None)
+            _write_meta(PENDING_DIR / meta_path.name, meta)
+            eml_path = INFLIGHT_DIR / f"{key}.eml"
+            if eml_path.exists():
+                os.replace(eml_path, PENDING_DIR / eml_path.name)
+            meta_path.unlink(missing_ok=True)
+            logger.warning(f"Correo {key} reclamado por un envio que no termino; vuelve a pendientes")
+
+
+def _process_alive(pid: int | None) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_meta(path: Path, meta: dict) -> None:
+    write_atomic(path, json.dumps(meta, ensure_ascii=False, indent=2), fsync=True)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+if __name__ == "__main__":
+    # Entrega manual (o desde cron) de lo que haya quedado pendiente
+    prune_sent()
+    remaining = deliver_pending()
+    print(f"Correos pendientes: {remaining}")
@@ -0,0 +1,384 @@
+"""
+Indice SQLite de los eventos guardados en data/events.
+
+Ademas de la busqueda de duplicados por (signal, symbol, date), guarda el
+evento completo, de modo que las consultas por rango de fechas
+(query_events, count_events_by_month) se resuelven con el indice
+(signal, date) sin recorrer el arbol de JSON.
+
+El indice es una copia derivada del arbol JSON (mas los lotes del journal
+aun sin compactar). Cada proceso abre una sola conexion, comprueba el
+esquema y la firma en el primer uso y la reutiliza despues. Se reconstruye
+desde el arbol si falta, si es de una version anterior del esquema o si el arbol
+ha cambiado desde la ultima indexacion: se guarda una firma del arbol
+(numero de JSON y mtime mas reciente de ficheros y directorios) y se compara
+con la actual. Las escrituras propias (storage.flush_events y la
+compactacion) actualizan la firma con mark_tree_synced().
+
+Reconstruccion manual (p. ej. tras editar JSON mientras corre una ejecucion):
+    python -m wma_cross_alerts.persistence.event_index --rebuild
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from wma_cross_alerts.persistence.event_journal import BASE_EVENTS_DIR, journal_lock, read_events
+from wma_cross_alerts.utils.logger import get_logger
+
+
+logger = get_logger("event_index")
+
+INDEX_PATH = BASE_EVENTS_DIR / "index.sqlite"
+
+# Subir al cambiar la tabla events: fuerza la reconstruccion desde los JSON
+SCHEMA_VERSION = "2"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    signal  TEXT NOT NULL,
+    symbol  TEXT NOT NULL,
+    date    TEXT NOT NULL,
+    market  TEXT NOT NULL,
+    path    TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (signal, symbol, date, market)
+);
+CREATE INDEX IF NOT EXISTS events_by_date ON events (signal, date, market);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Conexion compartida por los hilos del proceso; _lock serializa su uso y
+# va siempre despues de journal_lock. Se reabre si cambia el proceso, la
+# ruta absoluta del indice (cwd distinto) o el propio fichero (borrado o
+# sustituido).
+_conn: sqlite3.Connection | None = None
+_conn_key: tuple | None = None
+_lock = threading.RLock()
+
+
+def event_path(event: Dict) -> Path:
+    """
+    data/events/<signal>/<market>/<symbol>/<fecha>_<symbol>_<signal>.json
+    """
+
+    signal = event["signal"]
+    symbol = event["symbol"]
+    return BASE_EVENTS_DIR / signal / event["market"] / symbol / f"{event['date']}_{symbol}_{signal}.json"
+
+
+def index_event(event: Dict, path: Path) -> None:
+    """
+    Registra (o actualiza) un evento en el indice.
+    Si el indice aun no existe se construye antes desde los JSON.
+    """
+
+    conn = _connection()
+    with _lock, conn:
+        _upsert(conn, event, path)
+
+
+def index_events(entries: Iterable[Tuple[Dict, Path]]) -> None:
+    """
+    index_event para varios eventos en una sola transaccion.
+    """
+
+    conn = _connection()
+    with _lock, conn:
+        for event, path in entries:
+            _upsert(conn, event, path)
+
+
+def is_indexed(symbol: str, signal: str, date: str) -> bool:
+    """
+    Busqueda O(1) por (signal, symbol, date) en el indice.
+    """
+
+    conn = _connection()
+    with _lock:
+        row = conn.execute(
+            "SELECT 1 FROM events WHERE signal = ? AND symbol = ? AND date = ? LIMIT 1",
+            (signal, symbol, date),
+        ).fetchone()
+    return row is not None
+
+
+def query_events(
+    signal: str | None = None,
+    market: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    symbols: Iterable[str] | None = None,
+) -> List[Dict]:
+    """
+    Eventos que cumplen todos los filtros indicados (fechas YYYY-MM-DD,
+    ambas incluidas), ordenados por fecha, mercado y simbolo. Mismo
+    contenido que load_events, pero filtrado en SQLite.
+    """
+
+    where, params = _filters(signal, market, date_from, date_to, symbols)
+
+    conn = _connection()
+    with _lock:
+        rows = conn.execute(
+            f"SELECT payload FROM events {where} ORDER BY date, market, symbol, signal",
+            params,
+        ).fetchall()
+
+    return [json.loads(payload) for (payload,) in rows]
+
+
+def count_events_by_month(
+    signal: str | None = None,
+    market: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    symbols: Iterable[str] | None = None,
+) -> Dict[str, int]:
+    """
+    Numero de eventos por mes ("YYYY-MM") con los mismos filtros que
+    query_events, en orden cronologico.
+    """
+
+    where, params = _filters(signal, market, date_from, date_to, symbols)
+
+    conn = _connection()
+    with _lock:
+        rows = conn.execute(
+            f"SELECT substr(date, 1, 7) AS month, COUNT(*) FROM events {where} GROUP BY month ORDER BY month",
+            params,
+        ).fetchall()
+
+    return dict(rows)
+
+
+def rebuild_index() -> int:
+    """
+    Reconstruye el indice completo a partir del arbol JSON en data/events.
+    Devuelve el numero de eventos indexados.
+    """
+
+    with journal_lock(), _lock:
+        _close()
+        INDEX_PATH.unlink(missing_ok=True)
+        conn = _connection()
+        return conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def mark_tree_synced() -> None:
+    """
+    Registra el estado actual del arbol JSON como indexado. Se llama despues
+    de escribir en el eventos que ya estan en el indice, para que esas
+    escrituras no se tomen por cambios externos.
+    """
+
+    conn = _connection()
+    with _lock, conn:
+        _set_tree_signature(conn, tree_signature())
+
+
+def tree_signature() -> str:
+    """
+    Firma barata del arbol JSON: numero de eventos y mtime mas reciente
+    (en ns) de los JSON y de los directorios por debajo de data/events.
+    Crear, editar o borrar un JSON la cambia.
+    """
+
+    count = 0
+    latest = 0
+
+    # La raiz no cuenta: su mtime cambia con el journal y los ficheros de SQLite
+    for root, dirs, files in os.walk(BASE_EVENTS_DIR):
+        for name in dirs:
+            try:
+                latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            try:
+                latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+            except FileNotFoundError:
+                continue
+            count += 1
+
+    return f"{count}:{latest}"
+
+
+def _connection() -> sqlite3.Connection:
+    """
+    Conexion del proceso al indice. La primera llamada (o tras un cambio de
+    proceso o de directorio de trabajo) la abre, comprueba el esquema y la
+    firma del arbol y reconstruye el indice si hace falta; las siguientes
+    solo devuelven la conexion abierta.
+    """
+
+    global _conn, _conn_key
+
+    if _conn is not None and _conn_key == _index_key():
+        return _conn
+
+    # Mismo orden de locks que la compactacion: journal y despues _lock
+    with journal_lock(), _lock:
+        if _conn is not None and _conn_key == _index_key():
+            return _conn
+
+        _close()
+        conn = _open()
+        _conn, _conn_key = conn, _index_key()
+        return conn
+
+
+def _index_key() -> tuple:
+    path = os.path.abspath(INDEX_PATH)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (os.getpid(), path, None)
+    return (os.getpid(), path, (st.st_dev, st.st_ino))
+
+
+def _open() -> sqlite3.Connection:
+    BASE_EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Una conexion para todos los hilos: su uso va siempre bajo _lock
+    conn = sqlite3.connect(INDEX_PATH, timeout=30, check_same_thread=False)
+    try:
+        conn.executescript(_SCHEMA)
+
+        version = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if version is None or version[0] != SCHEMA_VERSION:
+            # Indice de una version anterior: se descarta y se reconstruye
+            conn.executescript("DROP TABLE IF EXISTS events; DELETE FROM meta;")
+            conn.executescript(_SCHEMA)
+            _populate_from_json(conn)
+        else:
+            built = conn.execute("SELECT value FROM meta WHERE key = 'built'").fetchone()
+            stored = conn.execute("SELECT value FROM meta WHERE key = 'tree'").fetchone()
+            if built is None:
+                _populate_from_json(conn)
+            elif stored is None or stored[0] != tree_signature():
+                logger.warning("El arbol de eventos ha cambiado desde la ultima indexacion; se reconstruye el indice")
+                _populate_from_json(conn)
+    except BaseException:
+        conn.close()
+        raise
+
+    return conn
+
+
+def _close() -> None:
+    global _conn, _conn_key
+
+    # La conexion de otro proceso (heredada) no se toca
+    if _conn is not None and _conn_key is not None and _conn_key[0] == os.getpid():
+        _conn.close()
+    _conn, _conn_key = None, None
+
+
+def _filters(
+    signal: str | None,
+    market: str | None,
+    date_from: str | None,
+    date_to: str | None,
+    symbols: Iterable[str] | None,
+) -> tuple[str, list]:
+    clauses = []
+    params: list = []
+
+    for clause, value in (
+        ("signal = ?", signal),
+        ("market = ?", market),
+        ("date >= ?", date_from),
+        ("date <= ?", date_to),
+    ):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+
+    if symbols is not None:
+        # Un solo parametro aunque la lista sea larga (sin limite de variables)
+        clauses.append("symbol IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(symbols)))
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def _populate_from_json(conn: sqlite3.Connection) -> None:
+    logger.info(f"Construyendo indice de eventos desde {BASE_EVENTS_DIR}")
+
+    count = 0
+    # Con el journal bloqueado ninguna compactacion escribe en el arbol
+    # mientras se lee; el orden de locks (journal y despues SQLite) es el de
+    # la compactacion
+    with journal_lock(), conn:
+        # La firma se toma antes de leer: una edicion externa durante la
+        # lectura provoca otra reconstruccion, nunca un indice desfasado
+        signature = tree_signature()
+        conn.execute("DELETE FROM events")
+
+        for file in BASE_EVENTS_DIR.rglob("*.json"):
+            try:
+                with open(file, "r", encoding="utf-8") as f:
+                    event = json.load(f)
+                _upsert(conn, event, file)
+                count += 1
+            except Exception as e:
+                logger.error(f"Error indexando evento {file}: {e}")
+
+        # Eventos confirmados en el journal que aun no se han compactado
+        for event in read_events():
+            _upsert(conn, event, event_path(event))
+            count += 1
+
+        # En la misma transaccion: si se interrumpe, se reconstruye en el siguiente uso
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', '1')")
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema', ?)", (SCHEMA_VERSION,))
+        _set_tree_signature(conn, signature)
+
+    logger.info(f"Indice de eventos construido: {count} eventos")
+
+
+def _set_tree_signature(conn: sqlite3.Connection, signature: str) -> None:
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('tree', ?)", (signature,))
+
+
+def _upsert(conn: sqlite3.Connection, event: Dict, path: Path) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO events (signal, symbol, date, market, path, payload) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            event["signal"],
+            event["symbol"],
+            event["date"],
+            event["market"],
+            str(path),
+            json.dumps(event, ensure_ascii=False),
+        ),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indice SQLite de eventos (data/events/index.sqlite)")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Reconstruir el indice desde el arbol JSON y el journal",
+    )
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(f"Eventos indexados: {rebuild_index()}")
+    else:
+        conn = _connection()
+        with _lock:
+            total = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        print(f"Eventos indexados: {total}")
@@ -0,0 +1,166 @@
+"""
+Journal de eventos: data/events/journal.jsonl, solo anadir.
+
+Cada lote de eventos se escribe con una sola escritura y un fsync:
+
+    {"batch": "<id>", "event": {...}}
+    ...
+    {"batch": "<id>", "commit": <n eventos>}
+
+Un lote solo cuenta si su linea commit esta completa, asi que un corte a
+mitad de escritura no deja eventos sueltos ni lineas corruptas que se lean
+como validas. Los escritores (hilos o procesos) se serializan con un flock
+sobre journal.lock; la compactacion toma el mismo lock mientras vuelca los
+eventos al arbol JSON y vacia el journal.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from wma_cross_alerts.utils.logger import get_logger
+
+
+logger = get_logger("event_journal")
+
+BASE_EVENTS_DIR = Path("data") / "events"
+JOURNAL_PATH = BASE_EVENTS_DIR / "journal.jsonl"
+LOCK_PATH = BASE_EVENTS_DIR / "journal.lock"
+
+# flock es por descripcion de fichero: dentro del proceso el lock se toma
+# una vez y es reentrante (la compactacion puede reconstruir el indice, que
+# vuelve a leer el journal)
+_thread_lock = threading.RLock()
+_depth = 0
+
+
+@contextmanager
+def journal_lock() -> Iterator[None]:
+    """
+    Lock exclusivo del journal entre hilos y procesos.
+    """
+
+    global _depth
+
+    with _thread_lock:
+        if _depth:
+            _depth += 1
+            try:
+                yield
+            finally:
+                _depth -= 1
+            return
+
+        BASE_EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+        fd = os.open(LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            _depth = 1
+            try:
+                yield
+            finally:
+                _depth = 0
+        finally:
+            os.close(fd)
+
+
+def append_batch(events: List[Dict]) -> None:
+    """
+    Anade un lote al journal con una sola escritura y un fsync. Al volver,
+    el lote es duradero.
+    """
+
+    if not events:
+        return
+
+    batch_id = uuid.uuid4().hex
+    lines = [{"batch": batch_id, "event": event} for event in events]
+    lines.append({"batch": batch_id, "commit": len(events)})
+    data = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines).encode("utf-8")
+
+    with journal_lock():
+        fd = os.open(JOURNAL_PATH, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # Un lote anterior cortado a mitad de linea: se cierra esa linea
+            # para que no se mezcle con la primera de este lote
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                data = b"\n" + data
+
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def read_events() -> List[Dict]:
+    """
+    Eventos de los lotes confirmados del journal, en orden de escritura.
+    """
+
+    if not JOURNAL_PATH.exists():
+        return []
+
+    with journal_lock():
+        return _read_committed(JOURNAL_PATH.read_bytes())
+
+
+def journal_size() -> int:
+    try:
+        return JOURNAL_PATH.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+@contextmanager
+def compacting() -> Iterator[List[Dict]]:
+    """
+    Entrega los eventos confirmados con el journal bloqueado y, si el bloque
+    termina sin error, lo vacia. Si falla, el journal queda intacto y la
+    compactacion se repite en la siguiente ocasion.
+    """
+
+    with journal_lock():
+        data = JOURNAL_PATH.read_bytes() if JOURNAL_PATH.exists() else b""
+        yield _read_committed(data)
+        if data:
+            os.truncate(JOURNAL_PATH, 0)
+
+
+def _read_committed(data: bytes) -> List[Dict]:
+    pending: Dict[str, List[Dict]] = {}
+    events: List[Dict] = []
+    discarded = 0
+
+    for raw in data.split(b"\n"):
+        if not raw.strip():
+            continue
+        try:
+            line = json.loads(raw)
+            batch = line["batch"]
+        except Exception:
+            discarded += 1
+            continue
+
+        if "commit" in line:
+            batch_events = pending.pop(batch, [])
+            if len(batch_events) == line["commit"]:
+                events.extend(batch_events)
+            else:
+                discarded += len(batch_events)
+        elif "event" in line:
+            pending.setdefault(batch, []).append(line["event"])
+
+    discarded += sum(len(batch_events) for batch_events in pending.values())
+    if discarded:
+        logger.warning(f"Journal de eventos: {discarded} linea(s) de lotes sin confirmar descartadas")
+
+    return events
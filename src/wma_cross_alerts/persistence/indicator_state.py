@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+from typing import Dict
+
+from wma_cross_alerts.indicators.wma_state import WmaState
+from wma_cross_alerts.utils.atomic import atomic_open
+from wma_cross_alerts.utils.logger import get_logger
+
+
+logger = get_logger("indicator_state")
+
+BASE_STATE_DIR = Path("data") / "state" / "wma"
+
+
+def load_wma_states(symbol: str) -> Dict[int, WmaState]:
+    """
+    Carga los estados WMA incrementales de un simbolo desde:
+    data/state/wma/<symbol>.json
+
+    Devuelve un dict periodo -> WmaState (vacio si no hay estado o es invalido).
+    """
+
+    path = BASE_STATE_DIR / f"{symbol}.json"
+    if not path.exists():
+        return {}
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        states = {}
+        for raw in data.get("states", []):
+            state = WmaState.from_dict(raw)
+            states[state.period] = state
+        return states
+    except Exception as e:
+        logger.warning(f"Estado WMA invalido para {symbol} ({path}): {e}")
+        return {}
+
+
+def save_wma_states(symbol: str, states: Dict[int, WmaState]) -> Path:
+    """
+    Guarda los estados WMA de un simbolo (escritura atomica).
+    """
+
+    path = BASE_STATE_DIR / f"{symbol}.json"
+
+    payload = {
+        "symbol": symbol,
+        "states": [states[p].to_dict() for p in sorted(states)],
+    }
+
+    with atomic_open(path) as f:
+        json.dump(payload, f, ensure_ascii=False)
+
+    return path
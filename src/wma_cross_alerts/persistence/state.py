@@ -1,6 +1,7 @@
 from typing import Dict, Optional
 
-from wma_cross_alerts.persistence.storage import load_events
+from wma_cross_alerts.persistence.event_index import is_indexed
+from wma_cross_alerts.persistence.storage import is_pending
 from wma_cross_alerts.utils.logger import get_logger
 
 
@@ -14,19 +15,16 @@ def already_registered(
 ) -> bool:
     """
     Comprueba si un evento ya fue registrado anteriormente.
+
+    Consulta el indice de eventos (data/events/index.sqlite) en lugar de
+    recorrer el arbol JSON, y los eventos guardados en esta ejecucion que
+    aun no se han confirmado en el journal.
     """
 
-    events = load_events(symbol=symbol)
-
-    for event in events:
-        if (
-            event.get("symbol") == symbol
-            and event.get("signal") == signal
-            and event.get("date") == date
-        ):
-            logger.info(
-                f"Evento ya registrado: {symbol} {signal} {date}"
-            )
-            return True
+    if is_pending(symbol, signal, date) or is_indexed(symbol, signal, date):
+        logger.info(
+            f"Evento ya registrado: {symbol} {signal} {date}"
+        )
+        return True
 
     return False
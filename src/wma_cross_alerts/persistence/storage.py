@@ -1,45 +1,190 @@
+"""
+Almacenamiento de eventos.
+
+Un JSON por evento en data/events/<signal>/<market>/<symbol>/. Con el journal
+activo (EVENT_JOURNAL=true, por defecto) save_event no escribe ese JSON en el
+momento: los eventos se acumulan y flush_events() los confirma en lote en
+data/events/journal.jsonl (una escritura secuencial y un fsync) y en el
+indice. compact_journal() vuelca despues el journal al arbol JSON con
+escrituras atomicas; main lo hace al final de cada ejecucion o antes si el
+journal supera EVENT_JOURNAL_COMPACT_BYTES.
+
+Variables de entorno:
+    EVENT_JOURNAL               true (por defecto) o false para escribir cada
+                                JSON (de forma atomica) al guardarlo
+    EVENT_JOURNAL_BATCH         eventos por lote antes de confirmar (64)
+    EVENT_JOURNAL_COMPACT_BYTES tamano del journal que dispara la compactacion
+"""
+
+import atexit
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Dict, List
-
+from typing import Dict, Iterable, List
+
+from wma_cross_alerts.persistence.event_index import (
+    event_path,
+    index_event,
+    index_events,
+    mark_tree_synced,
+)
+from wma_cross_alerts.persistence.event_journal import (
+    BASE_EVENTS_DIR,
+    append_batch,
+    compacting,
+    journal_size,
+    read_events,
+)
+from wma_cross_alerts.utils.atomic import atomic_open
 from wma_cross_alerts.utils.logger import get_logger
 
 
 logger = get_logger("event_storage")
 
-BASE_EVENTS_DIR = Path("data") / "events"
-BASE_EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+EVENT_JOURNAL_ENABLED = os.getenv("EVENT_JOURNAL", "true").strip().lower() in {"1", "true", "yes", "on"}
+JOURNAL_BATCH = int(os.getenv("EVENT_JOURNAL_BATCH", "64"))
+JOURNAL_COMPACT_BYTES = int(os.getenv("EVENT_JOURNAL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+
+_pending: List[Dict] = []
+_pending_lock = threading.RLock()
+_atexit_registered = False
+# JSON escritos directamente (journal desactivado) cuya firma en el indice
+# aun no se ha actualizado
+_tree_written = False
 
 
 def save_event(event: Dict) -> Path:
     """
-    Guarda un evento en formato JSON en:
-    data/events/<signal>/<market>/<symbol>/<fecha>_<symbol>_<signal>.json
+    Guarda un evento. Devuelve la ruta de su JSON, que con el journal activo
+    se escribe al compactar.
     """
 
-    signal = event["signal"]
-    market = event["market"]
-    symbol = event["symbol"]
+    global _atexit_registered, _tree_written
 
-    filename = f"{event['date']}_{symbol}_{signal}.json"
+    path = event_path(event)
 
-    event_dir = (
-        BASE_EVENTS_DIR
-        / signal
-        / market
-        / symbol
-    )
-    event_dir.mkdir(parents=True, exist_ok=True)
+    if not EVENT_JOURNAL_ENABLED:
+        _write_event_file(event, path)
+        index_event(event, path)
+        logger.info(f"Evento guardado: {path}")
 
-    path = event_dir / filename
+    with _pending_lock:
+        # Red de seguridad: lo pendiente se confirma (y la firma del arbol
+        # en el indice se actualiza) al salir del proceso
+        if not _atexit_registered:
+            atexit.register(flush_events)
+            _atexit_registered = True
 
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(event, f, indent=2, ensure_ascii=False)
+        if not EVENT_JOURNAL_ENABLED:
+            _tree_written = True
+            return path
+
+        _pending.append(event)
+        full = len(_pending) >= JOURNAL_BATCH
+
+    logger.info(f"Evento guardado: {path} (journal)")
+
+    if full:
+        flush_events()
 
-    logger.info(f"Evento guardado: {path}")
     return path
 
 
+def is_pending(symbol: str, signal: str, date: str) -> bool:
+    """
+    True si el evento esta guardado pero aun sin confirmar en el journal
+    (todavia no aparece en el indice).
+    """
+
+    with _pending_lock:
+        return any(
+            e["symbol"] == symbol and e["signal"] == signal and e["date"] == date
+            for e in _pending
+        )
+
+
+def flush_events(*, compact: bool = False) -> int:
+    """
+    Confirma los eventos pendientes: un lote en el journal (con fsync) y una
+    sola transaccion en el indice. Con compact=True, o si el journal ha
+    crecido demasiado, compacta despues. Devuelve los eventos confirmados.
+    """
+
+    global _tree_written
+
+    with _pending_lock:
+        batch = list(_pending)
+        if batch:
+            append_batch(batch)
+            index_events([(event, event_path(event)) for event in batch])
+            _pending.clear()
+            logger.info(f"Journal de eventos: {len(batch)} evento(s) confirmados")
+
+        if _tree_written:
+            mark_tree_synced()
+            _tree_written = False
+
+    if compact or journal_size() > JOURNAL_COMPACT_BYTES:
+        compact_journal()
+
+    return len(batch)
+
+
+def compact_journal() -> int:
+    """
+    Vuelca los eventos confirmados del journal al arbol JSON y lo vacia.
+    Idempotente: si se interrumpe, la siguiente compactacion repite el
+    volcado. Devuelve los eventos volcados.
+    """
+
+    with compacting() as events:
+        if not events:
+            return 0
+
+        entries = [(event, event_path(event)) for event in events]
+        for event, path in entries:
+            _write_event_file(event, path)
+
+        # Los JSON y sus entradas de directorio tienen que ser duraderos
+        # antes de vaciar el journal; el indice se reafirma por si un lote
+        # quedo confirmado sin indexar
+        _fsync_dirs({path.parent for _, path in entries})
+        index_events(entries)
+        mark_tree_synced()
+
+    logger.info(f"Journal de eventos compactado: {len(events)} evento(s) en {BASE_EVENTS_DIR}")
+    return len(events)
+
+
+def _write_event_file(event: Dict, path: Path) -> None:
+    # tmp + fsync + rename: un corte nunca deja un JSON a medio escribir
+    with atomic_open(path, fsync=True) as f:
+        json.dump(event, f, indent=2, ensure_ascii=False)
+
+
+def _fsync_dirs(dirs: Iterable[Path]) -> None:
+    """
+    fsync de los directorios y de sus ascendientes hasta data/events, para
+    que los renames y los directorios recien creados sobrevivan a un corte.
+    """
+
+    pending = set()
+    for directory in dirs:
+        while True:
+            pending.add(directory)
+            if directory == BASE_EVENTS_DIR or directory == directory.parent:
+                break
+            directory = directory.parent
+
+    for directory in pending:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
 def load_events(
     *,
     signal: str | None = None,
@@ -50,7 +195,7 @@ def load_events(
     Carga eventos filtrando opcionalmente por signal, market y/o symbol.
     """
 
-    events = []
+    events = {}
 
     # Siempre buscar recursivamente en toda la estructura
     # porque el usuario puede pedir un symbol sin saber el market o signal
@@ -65,9 +210,6 @@ def load_events(
     if symbol and market and signal:
         search_dir = search_dir / symbol
     
-    if not search_dir.exists():
-         return []
-
     # Patrón de búsqueda: si tenemos symbol, buscamos ese archivo específico
     # Si no, buscamos todos
     pattern = "*.json"
@@ -87,8 +229,22 @@ def load_events(
             if symbol and data.get("symbol") != symbol:
                 continue
                 
-            events.append(data)
+            events[_event_key(data)] = data
         except Exception as e:
             logger.error(f"Error leyendo evento {file}: {e}")
 
-    return events
+    # Eventos confirmados en el journal que aun no se han compactado
+    for data in read_events():
+        if signal and data.get("signal") != signal:
+            continue
+        if market and data.get("market") != market:
+            continue
+        if symbol and data.get("symbol") != symbol:
+            continue
+        events[_event_key(data)] = data
+
+    return list(events.values())
+
+
+def _event_key(event: Dict) -> tuple:
+    return (event.get("signal"), event.get("market"), event.get("symbol"), event.get("date"))
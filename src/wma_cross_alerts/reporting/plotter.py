@@ -23,10 +23,16 @@ def plot_golden_cross(
     long_period: int,
     window_sessions: int = 300,
     start_buffer: int = 10,
+    close: pd.Series | None = None,
+    wma_short: pd.Series | None = None,
+    wma_long: pd.Series | None = None,
 ) -> Path:
     """
     Genera y guarda una grafica del Golden Cross para una fecha concreta.
 
+    Si se pasa close (y opcionalmente las WMA ya calculadas sobre ese mismo
+    indice) se reutilizan y no se vuelve a descargar ni recalcular nada.
+
     La grafica se guarda en:
     data/charts/<signal>/<market>/<symbol>/<date>_<symbol>_<signal>.png
     """
@@ -35,11 +41,14 @@ def plot_golden_cross(
         f"Generando grafica {signal_name} para {symbol} ({market}) en {event_date}"
     )
 
-    # Descargar historico suficiente hasta la fecha del evento
-    close = fetch_daily_close(
-        symbol=symbol,
-        end=event_date,
-    )
+    if close is None:
+        # Descargar historico suficiente hasta la fecha del evento
+        close = fetch_daily_close(
+            symbol=symbol,
+            end=event_date,
+        )
+    else:
+        close = close[close.index <= pd.to_datetime(event_date)]
 
     if close.empty or len(close) < long_period + start_buffer:
         raise ValueError("Datos insuficientes para generar la grafica")
@@ -47,8 +56,12 @@ def plot_golden_cross(
     # Ventana visual
     close = close.tail(window_sessions)
 
-    wma_short = wma(close, short_period)
-    wma_long = wma(close, long_period)
+    if wma_short is None or wma_long is None:
+        wma_short = wma(close, short_period)
+        wma_long = wma(close, long_period)
+    else:
+        wma_short = wma_short.reindex(close.index)
+        wma_long = wma_long.reindex(close.index)
 
     # Ruta de salida
     charts_dir = (
@@ -83,7 +96,7 @@ def plot_golden_cross(
             label="Golden Cross",
         )
 
-    plt.title(f"{symbol} – Golden Cross WMA ({event_date})")
+    plt.title(f"{symbol} – Golden Cross WMA {short_period}/{long_period} ({event_date})")
     plt.xlabel("Fecha")
     plt.ylabel("Precio")
     plt.legend()
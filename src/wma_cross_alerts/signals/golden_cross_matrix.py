@@ -0,0 +1,308 @@
+"""
+Motor matricial del Golden Cross.
+
+Alinea los cierres de todo un mercado (o de un lote) en una matriz
+fechas x simbolos y calcula las dos WMA y la mascara de cruces de todas las
+columnas a la vez, con la misma semantica que wma() y detect_cross_up().
+
+Historicos irregulares: cada simbolo puede empezar en una fecha distinta o
+no tener barra en alguna fecha del calendario comun. El calculo por simbolo
+trabaja sobre sus propias barras (close.dropna()), asi que aqui los cierres
+de cada columna se compactan hacia arriba antes de calcular y los resultados
+se devuelven despues a su fecha original.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from wma_cross_alerts.indicators.wma import wma_many_values
+from wma_cross_alerts.signals.golden_cross_wma import cross_up_matrix
+
+
+@dataclass
+class CloseMatrix:
+    """
+    Cierres alineados: values[i, j] es el cierre de symbols[j] en dates[i]
+    (NaN si el simbolo no tiene barra ese dia).
+    """
+
+    dates: pd.DatetimeIndex
+    symbols: list[str]
+    values: np.ndarray
+
+    @classmethod
+    def from_series(
+        cls,
+        closes: Mapping[str, pd.Series],
+        *,
+        alloc: Callable[[tuple[int, int]], np.ndarray] = np.empty,
+    ) -> "CloseMatrix":
+        """
+        Alinea los cierres en una matriz nueva. alloc(shape) reserva la
+        matriz (por defecto np.empty); permite escribirla directamente en
+        memoria compartida o en un fichero mapeado.
+        """
+
+        symbols = list(closes)
+        indexes = [closes[s].index.values.astype("datetime64[ns]") for s in symbols]
+
+        # Caso habitual en un mismo mercado: todos con el mismo calendario
+        if indexes and all(np.array_equal(index, indexes[0]) for index in indexes[1:]):
+            values = alloc((len(indexes[0]), len(symbols)))
+            for j, symbol in enumerate(symbols):
+                values[:, j] = np.asarray(closes[symbol], dtype="float64")
+            return cls(dates=pd.DatetimeIndex(indexes[0]), symbols=symbols, values=values)
+
+        all_dates = np.unique(np.concatenate(indexes)) if indexes else np.array([], dtype="datetime64[ns]")
+        values = alloc((len(all_dates), len(symbols)))
+        values.fill(np.nan)
+
+        for j, (symbol, index) in enumerate(zip(symbols, indexes)):
+            if len(index):
+                values[np.searchsorted(all_dates, index), j] = np.asarray(closes[symbol], dtype="float64")
+
+        return cls(dates=pd.DatetimeIndex(all_dates), symbols=symbols, values=values)
+
+    def column(self, symbol: str) -> pd.Series:
+        """
+        Cierres de un simbolo como Series (sin las fechas en las que no cotiza).
+        """
+
+        values = self.values[:, self.symbols.index(symbol)]
+        mask = ~np.isnan(values)
+        return pd.Series(values[mask], index=self.dates[mask], name="Close")
+
+
+@dataclass
+class CompactColumns:
+    """
+    Cierres de cada columna desplazados a las primeras filas.
+
+    - values: compact[k, j] es la k-esima barra de la columna j (NaN al final)
+    - rows:   fila original de esa barra en la matriz alineada (-1 si no hay)
+    - counts: barras de cada columna
+    """
+
+    values: np.ndarray
+    rows: np.ndarray
+    counts: np.ndarray
+
+    def expand(self, compact: np.ndarray, n_rows: int) -> np.ndarray:
+        """
+        Devuelve un resultado calculado sobre la forma compacta a las filas
+        originales (NaN/False donde la columna no tiene barra).
+        """
+
+        fill = False if compact.dtype == bool else np.nan
+        out = np.full((n_rows, compact.shape[1]), fill, dtype=compact.dtype)
+        k, j = np.nonzero(self.rows >= 0)
+        out[self.rows[k, j], j] = compact[k, j]
+        return out
+
+
+def compact_columns(values: np.ndarray) -> CompactColumns:
+    mask = ~np.isnan(values)
+    counts = mask.sum(axis=0)
+    n_rows = int(counts.max()) if counts.size else 0
+
+    # Caso habitual: todas las columnas completas, no hay nada que mover
+    if bool(mask.all()):
+        rows = np.broadcast_to(np.arange(n_rows)[:, None], values.shape).copy()
+        return CompactColumns(values=values, rows=rows, counts=counts)
+
+    r, j = np.nonzero(mask)
+    k = (np.cumsum(mask, axis=0) - 1)[r, j]
+
+    compact = np.full((n_rows, values.shape[1]), np.nan)
+    rows = np.full((n_rows, values.shape[1]), -1, dtype=np.int64)
+    compact[k, j] = values[r, j]
+    rows[k, j] = r
+
+    return CompactColumns(values=compact, rows=rows, counts=counts)
+
+
+@dataclass
+class TailScan:
+    """
+    Resultado por simbolo del Golden Cross en una fecha objetivo.
+
+    - bars:      barras disponibles hasta la fecha objetivo (incluida)
+    - last_date: fecha de la ultima de esas barras (NaT si no hay)
+    - wma_short / wma_long: WMA en esa barra
+    - is_cross:  cruce al alza en esa barra (ayer <=, hoy >)
+    """
+
+    date: pd.Timestamp
+    symbols: list[str]
+    bars: np.ndarray
+    last_date: pd.DatetimeIndex
+    wma_short: np.ndarray
+    wma_long: np.ndarray
+    is_cross: np.ndarray
+
+    @property
+    def on_date(self) -> np.ndarray:
+        return np.asarray(self.last_date == self.date)
+
+    @property
+    def crossing_symbols(self) -> list[str]:
+        """
+        Simbolos con Golden Cross confirmado en la fecha objetivo.
+        """
+
+        hits = self.is_cross & self.on_date
+        return [s for s, hit in zip(self.symbols, hits) if hit]
+
+
+def scan_cross_up(
+    matrix: CloseMatrix,
+    short_period: int,
+    long_period: int,
+    date: str | pd.Timestamp,
+) -> TailScan:
+    """
+    Evalua el Golden Cross de todas las columnas en la ultima barra de cada
+    una hasta date. Como tail_cross_up, solo se calculan las ultimas
+    long_period + 1 barras de cada simbolo.
+    """
+
+    return scan_cross_up_pairs(matrix, [(short_period, long_period)], date)[(short_period, long_period)]
+
+
+def scan_cross_up_pairs(
+    matrix: CloseMatrix,
+    pairs: Iterable[tuple[int, int]],
+    date: str | pd.Timestamp,
+) -> dict[tuple[int, int], TailScan]:
+    """
+    scan_cross_up para varios pares (corta, larga): la compactacion, la
+    ventana final y las sumas acumuladas de las WMA se comparten entre
+    todos los pares.
+    """
+
+    pairs = list(pairs)
+    target = pd.Timestamp(date)
+    upto = int(matrix.dates.searchsorted(target, side="right"))
+
+    compact = compact_columns(matrix.values[:upto])
+    n_symbols = len(matrix.symbols)
+
+    bars = compact.counts
+    last = bars - 1
+    cols = np.arange(n_symbols)
+    lookback = max(max(pair) for pair in pairs) + 1
+
+    if compact.values.shape[0]:
+        last_rows = compact.rows[np.maximum(last, 0), cols]
+        last_date = pd.DatetimeIndex(np.where(
+            last >= 0,
+            matrix.dates.values[np.maximum(last_rows, 0)],
+            np.datetime64("NaT"),
+        ))
+
+        # Ventana final de cada columna: (lookback, simbolos), NaN antes de la primera barra
+        idx = last[None, :] + np.arange(-lookback + 1, 1)[:, None]
+        window = np.where(idx >= 0, compact.values[np.maximum(idx, 0), cols], np.nan)
+    else:
+        last_date = pd.DatetimeIndex([pd.NaT] * n_symbols)
+        window = np.full((lookback, n_symbols), np.nan)
+
+    wmas = wma_many_values(window, {p for pair in pairs for p in pair})
+
+    out = {}
+    for short_period, long_period in pairs:
+        short = wmas[short_period][-2:]
+        long = wmas[long_period][-2:]
+        out[(short_period, long_period)] = TailScan(
+            date=target,
+            symbols=list(matrix.symbols),
+            bars=bars,
+            last_date=last_date,
+            wma_short=short[-1],
+            wma_long=long[-1],
+            is_cross=cross_up_matrix(short, long)[-1],
+        )
+
+    return out
+
+
+@dataclass
+class HistoryScan:
+    """
+    WMA y mascara de cruces de todo el historico, en las filas de la
+    matriz alineada (NaN/False donde el simbolo no tiene barra).
+    """
+
+    dates: pd.DatetimeIndex
+    symbols: list[str]
+    wma_short: np.ndarray
+    wma_long: np.ndarray
+    cross: np.ndarray
+
+    def cross_positions(self, date_from: str | None = None, date_to: str | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (filas, columnas) de cada cruce con fecha en [date_from, date_to],
+        ordenados por columna y fila.
+        """
+
+        lo = 0 if date_from is None else int(self.dates.searchsorted(pd.Timestamp(date_from), side="left"))
+        hi = len(self.dates) if date_to is None else int(self.dates.searchsorted(pd.Timestamp(date_to), side="right"))
+
+        j, i = np.nonzero(self.cross[lo:hi].T)
+        return lo + i, j
+
+    def crosses(self, date_from: str | None = None, date_to: str | None = None) -> list[tuple[str, pd.Timestamp]]:
+        """
+        (simbolo, fecha) de cada cruce con fecha en [date_from, date_to],
+        ordenados por simbolo y fecha.
+        """
+
+        rows, cols = self.cross_positions(date_from, date_to)
+        return [(self.symbols[col], self.dates[row]) for row, col in zip(rows, cols)]
+
+
+def scan_cross_up_history(
+    matrix: CloseMatrix,
+    short_period: int,
+    long_period: int,
+) -> HistoryScan:
+    """
+    Calcula las dos WMA y la mascara de cruces de todas las columnas sobre
+    el historico completo (equivalente a wma() + detect_cross_up() por
+    simbolo).
+    """
+
+    return scan_cross_up_history_pairs(matrix, [(short_period, long_period)])[(short_period, long_period)]
+
+
+def scan_cross_up_history_pairs(
+    matrix: CloseMatrix,
+    pairs: Iterable[tuple[int, int]],
+) -> dict[tuple[int, int], HistoryScan]:
+    """
+    scan_cross_up_history para varios pares (corta, larga). Cada periodo
+    distinto se calcula una sola vez aunque aparezca en varios pares.
+    """
+
+    pairs = list(pairs)
+    compact = compact_columns(matrix.values)
+    n_rows = len(matrix.dates)
+
+    wmas = wma_many_values(compact.values, {p for pair in pairs for p in pair})
+    expanded = {p: compact.expand(values, n_rows) for p, values in wmas.items()}
+
+    out = {}
+    for short_period, long_period in pairs:
+        cross = cross_up_matrix(wmas[short_period], wmas[long_period])
+        out[(short_period, long_period)] = HistoryScan(
+            dates=matrix.dates,
+            symbols=list(matrix.symbols),
+            wma_short=expanded[short_period],
+            wma_long=expanded[long_period],
+            cross=compact.expand(cross, n_rows),
+        )
+
+    return out
@@ -1,6 +1,10 @@
+from typing import Iterable
+
+import numpy as np
 import pandas as pd
 
-from wma_cross_alerts.utils.logger import get_logger
+from wma_cross_alerts.indicators.wma import wma_many_values, wma_values
+from wma_cross_alerts.utils.logger import DETAIL, get_logger
 
 
 logger = get_logger("golden_cross_signal")
@@ -24,7 +28,7 @@ def detect_cross_up(
     if not wma_short.index.equals(wma_long.index):
         raise ValueError("Las series deben tener el mismo indice temporal")
 
-    logger.info("Detectando Golden Cross (WMA short vs long)")
+    logger.log(DETAIL, "Detectando Golden Cross (WMA short vs long)")
 
     prev_condition = wma_short.shift(1) <= wma_long.shift(1)
     curr_condition = wma_short > wma_long
@@ -34,20 +38,122 @@ def detect_cross_up(
     return cross_up
 
 
+def is_cross_up(
+    prev_short: float,
+    prev_long: float,
+    curr_short: float,
+    curr_long: float,
+) -> bool:
+    """
+    Misma regla que detect_cross_up aplicada a los dos ultimos valores
+    de cada WMA (ayer <=, hoy >). Un NaN nunca produce cruce.
+    """
+
+    return bool(prev_short <= prev_long and curr_short > curr_long)
+
+
+def cross_up_matrix(
+    wma_short: np.ndarray,
+    wma_long: np.ndarray,
+) -> np.ndarray:
+    """
+    Regla de detect_cross_up (ayer <=, hoy >) aplicada por columnas a dos
+    matrices fechas x simbolos. La primera fila nunca es cruce y un NaN
+    nunca produce cruce.
+    """
+
+    if wma_short.shape != wma_long.shape:
+        raise ValueError("Las matrices deben tener la misma forma")
+
+    cross = np.zeros(wma_short.shape, dtype=bool)
+    cross[1:] = (wma_short[:-1] <= wma_long[:-1]) & (wma_short[1:] > wma_long[1:])
+    return cross
+
+
 def last_cross_up(
     wma_short: pd.Series,
     wma_long: pd.Series
 ) -> bool:
     """
     Devuelve True si el ultimo dia hay un Golden Cross confirmado.
+
+    Solo lee los dos ultimos valores de cada serie; no construye la
+    Series booleana de todo el historico.
     """
 
-    cross_up = detect_cross_up(wma_short, wma_long)
+    if not isinstance(wma_short, pd.Series) or not isinstance(wma_long, pd.Series):
+        raise TypeError("wma_short y wma_long deben ser pandas.Series")
+
+    if len(wma_short) != len(wma_long) or not wma_short.index[-2:].equals(wma_long.index[-2:]):
+        raise ValueError("Las series deben tener el mismo indice temporal")
 
-    if cross_up.empty:
+    if len(wma_short) < 2:
         return False
 
-    return bool(cross_up.iloc[-1])
+    prev_short, curr_short = wma_short.iloc[-2:]
+    prev_long, curr_long = wma_long.iloc[-2:]
+
+    return is_cross_up(prev_short, prev_long, curr_short, curr_long)
+
+
+def tail_cross_up(
+    close: pd.Series | np.ndarray,
+    short_period: int,
+    long_period: int,
+) -> tuple[bool, float, float]:
+    """
+    Evalua el Golden Cross de la ultima barra usando solo las ultimas
+    long_period + 1 barras de close.
+
+    Devuelve (hay_cruce, wma_corta, wma_larga) en la ultima barra.
+    """
+
+    lookback = max(short_period, long_period) + 1
+    values = np.asarray(close, dtype="float64")[-lookback:]
+
+    if len(values) < lookback:
+        return False, float("nan"), float("nan")
+
+    prev_short, curr_short = wma_values(values, short_period)[-2:]
+    prev_long, curr_long = wma_values(values, long_period)[-2:]
+
+    is_cross = is_cross_up(prev_short, prev_long, curr_short, curr_long)
+    return is_cross, float(curr_short), float(curr_long)
+
+
+def tail_cross_up_many(
+    close: pd.Series | np.ndarray,
+    pairs: Iterable[tuple[int, int]],
+) -> dict[tuple[int, int], tuple[bool, float, float]]:
+    """
+    tail_cross_up para varios pares (corta, larga) a la vez. Las WMA de
+    todos los periodos salen de las mismas sumas acumuladas
+    (wma_many_values) sobre las ultimas max(periodos) + 1 barras.
+
+    Devuelve {(corta, larga): (hay_cruce, wma_corta, wma_larga)}; un par sin
+    barras suficientes devuelve (False, nan, nan), como tail_cross_up.
+    """
+
+    pairs = list(pairs)
+    lookback = max(max(pair) for pair in pairs) + 1
+    values = np.asarray(close, dtype="float64")[-lookback:]
+
+    periods = [p for p in {p for pair in pairs for p in pair} if p < len(values)]
+    wmas = wma_many_values(values, periods)
+
+    out = {}
+    for short_period, long_period in pairs:
+        if max(short_period, long_period) + 1 > len(values):
+            out[(short_period, long_period)] = (False, float("nan"), float("nan"))
+            continue
+
+        prev_short, curr_short = wmas[short_period][-2:]
+        prev_long, curr_long = wmas[long_period][-2:]
+
+        is_cross = is_cross_up(prev_short, prev_long, curr_short, curr_long)
+        out[(short_period, long_period)] = (is_cross, float(curr_short), float(curr_long))
+
+    return out
 
 
 def all_cross_up(wma_short, wma_long):
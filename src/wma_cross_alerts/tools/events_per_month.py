@@ -0,0 +1,63 @@
+from pathlib import Path
+import sys
+import argparse
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+SRC_PATH = PROJECT_ROOT / "src"
+
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
+
+from wma_cross_alerts.core.settings import SIGNAL_NAME
+from wma_cross_alerts.persistence.event_index import count_events_by_month
+from wma_cross_alerts.utils.logger import get_logger
+
+logger = get_logger("events_per_month")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Numero de eventos registrados por mes (consulta el indice de eventos)"
+    )
+    parser.add_argument(
+        "--signal",
+        type=str,
+        default=SIGNAL_NAME,
+        help="Senal (por defecto la del par principal; los pares extra son golden_cross_wma_<c>_<l>)",
+    )
+    parser.add_argument("--market", type=str, default=None, help="Filtrar por mercado")
+    parser.add_argument("--start", type=str, default=None, help="Fecha inicio YYYY-MM-DD")
+    parser.add_argument("--end", type=str, default=None, help="Fecha fin YYYY-MM-DD (incluida)")
+    parser.add_argument(
+        "--symbol",
+        action="append",
+        help="Filtrar por simbolo (repetible)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    counts = count_events_by_month(
+        signal=args.signal,
+        market=args.market,
+        date_from=args.start,
+        date_to=args.end,
+        symbols=[s.upper() for s in args.symbol] if args.symbol else None,
+    )
+
+    if not counts:
+        logger.info("No hay eventos registrados con esos filtros")
+        return
+
+    print(f"\nEventos {args.signal} por mes:\n")
+
+    for month, count in counts.items():
+        print(f"- {month} | {count}")
+
+    print(f"\nTotal: {sum(counts.values())} eventos en {len(counts)} meses")
+
+
+if __name__ == "__main__":
+    main()
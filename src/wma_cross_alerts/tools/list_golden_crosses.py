@@ -9,13 +9,18 @@ if str(SRC_PATH) not in sys.path:
     sys.path.insert(0, str(SRC_PATH))
 
 from wma_cross_alerts.core.settings import load_config
+from wma_cross_alerts.data_sources.price_archive import PriceArchive, open_archive
 from wma_cross_alerts.data_sources.yahoo import fetch_daily_close
 from wma_cross_alerts.indicators.wma import wma
+from wma_cross_alerts.signals.golden_cross_matrix import scan_cross_up_history
 from wma_cross_alerts.signals.golden_cross_wma import all_cross_up
 from wma_cross_alerts.utils.logger import get_logger
 
 logger = get_logger("golden_cross_history")
 
+# Simbolos por bloque al escanear un archivo completo (acota la memoria)
+ARCHIVE_CHUNK = 500
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -24,8 +29,8 @@ def parse_args():
     parser.add_argument(
         "--symbol",
         type=str,
-        required=True,
-        help="Ticker a analizar (debe existir en config.yml)",
+        default=None,
+        help="Ticker a analizar (debe existir en config.yml); sin el, con --archive, todo el mercado",
     )
     parser.add_argument(
         "--start",
@@ -33,7 +38,40 @@ def parse_args():
         default="2000-01-01",
         help="Fecha inicio YYYY-MM-DD",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--archive",
+        type=str,
+        default=None,
+        help="Leer los cierres del archivo compacto de este mercado (data/archive) en vez de descargarlos",
+    )
+    args = parser.parse_args()
+
+    if args.symbol is None and args.archive is None:
+        parser.error("--symbol es obligatorio sin --archive")
+
+    return args
+
+
+def scan_archive(prices: PriceArchive, short_period: int, long_period: int, start: str) -> None:
+    """
+    Golden Cross historicos de todos los simbolos del archivo, por bloques
+    de columnas con el motor matricial.
+    """
+
+    total = 0
+    print("\nGolden Cross detectados:\n")
+
+    for lo in range(0, len(prices), ARCHIVE_CHUNK):
+        matrix = prices.matrix(start=start, symbols=prices.symbols[lo:lo + ARCHIVE_CHUNK])
+        scan = scan_cross_up_history(matrix, short_period, long_period)
+
+        rows, cols = scan.cross_positions()
+        for row, col in zip(rows, cols):
+            diff = scan.wma_short[row, col] - scan.wma_long[row, col]
+            print(f"- {scan.symbols[col]} | {scan.dates[row]} | diff={diff:.4f}")
+        total += len(rows)
+
+    print(f"\nTotal: {total} cruces en {len(prices)} simbolos")
 
 
 def main():
@@ -44,11 +82,26 @@ def main():
     short_period = signal_cfg["short_period"]
     long_period = signal_cfg["long_period"]
 
+    prices = None
+    if args.archive is not None:
+        prices = open_archive(args.archive)
+        if prices is None:
+            logger.error(f"No existe el archivo de precios de {args.archive}")
+            return
+
+    if args.symbol is None:
+        logger.info(f"Buscando Golden Cross historicos en el archivo de {args.archive}")
+        scan_archive(prices, short_period, long_period, args.start)
+        return
+
     symbol = args.symbol.upper()
 
     logger.info(f"Buscando Golden Cross historicos para {symbol}")
 
-    close = fetch_daily_close(symbol, start=args.start)
+    if prices is not None:
+        close = prices.close(symbol, start=args.start)
+    else:
+        close = fetch_daily_close(symbol, start=args.start)
 
     if close.empty or len(close) < long_period + 1:
         logger.error("Datos insuficientes")
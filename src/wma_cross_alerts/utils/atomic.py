@@ -0,0 +1,62 @@
+"""
+Escritura atomica de ficheros: se escribe un temporal en el mismo directorio
+y se renombra sobre el destino con os.replace. Un corte o un lector
+concurrente ven el fichero anterior completo o el nuevo completo, nunca uno
+a medio escribir.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_open(
+    path: Path,
+    mode: str = "w",
+    *,
+    fsync: bool = False,
+    chmod: int | None = None,
+) -> Iterator[IO]:
+    """
+    Abre un temporal junto a path ("w" texto UTF-8 o "wb") y, si el bloque
+    termina sin errores, lo renombra sobre path. Con un error el temporal se
+    borra y path no cambia.
+
+    fsync: fuerza el contenido a disco antes del rename (el fichero es
+    duradero al volver; el rename en si depende del fsync del directorio).
+    chmod: permisos del fichero final (mkstemp lo crea con 0600).
+    """
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if chmod is not None:
+            os.chmod(tmp_name, chmod)
+        os.replace(tmp_name, path)
+    except Exception:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def write_atomic(
+    path: Path,
+    data: str | bytes,
+    *,
+    fsync: bool = False,
+    chmod: int | None = None,
+) -> None:
+    """
+    Escribe data (texto o bytes) en path de forma atomica (ver atomic_open).
+    """
+
+    with atomic_open(path, "wb" if isinstance(data, bytes) else "w", fsync=fsync, chmod=chmod) as f:
+        f.write(data)
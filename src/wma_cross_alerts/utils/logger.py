@@ -1,42 +1,173 @@
+"""
+Logging de la aplicacion.
+
+Todos los loggers comparten un unico QueueHandler: el hilo que registra solo
+encola el mensaje y un QueueListener en segundo plano lo escribe en
+logs/app.log (con rotacion semanal) y en consola. Asi hay un solo manejador
+por fichero y los workers del escaneo no esperan a la escritura.
+
+Variables de entorno:
+    LOG_FORMAT     text (por defecto) o json (una linea JSON por registro)
+    LOG_VERBOSITY  detail (por defecto) o summary: en summary se omiten los
+                   mensajes por simbolo (nivel DETAIL) y queda el resumen
+    LOG_CONSOLE    true (por defecto) o false para no escribir en consola
+"""
+
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 
 
 LOG_DIR = Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
 
 LOG_FILE = LOG_DIR / "app.log"
 
+# Mensajes por simbolo (o por llamada a los kernels): entre DEBUG e INFO
+DETAIL = 15
+logging.addLevelName(DETAIL, "DETAIL")
 
-def get_logger(name: str) -> logging.Logger:
-    logger = logging.getLogger(name)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").strip().lower()
+LOG_VERBOSITY = os.getenv("LOG_VERBOSITY", "detail").strip().lower()
+LOG_CONSOLE = os.getenv("LOG_CONSOLE", "true").lower() == "true"
 
-    if logger.handlers:
-        return logger
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 
-    logger.setLevel(logging.INFO)
-    logger.propagate = False
 
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    )
+class _LazyFileHandler(TimedRotatingFileHandler):
+    """
+    Abre el fichero (y crea logs/) en el primer registro, no al importar.
+    """
+
+    def _open(self):
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Una linea JSON por registro (ts en UTC, nivel, logger, hilo y mensaje).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        if record.stack_info:
+            payload["stack_info"] = record.stack_info
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class _SharedQueueHandler(QueueHandler):
+    """
+    Encola los registros y arranca el listener con el primer mensaje (no al
+    importar, para no crear hilos ni ficheros por el mero import).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # El mensaje se resuelve en el hilo emisor (los args podrian mutar),
+        # pero el formato final lo aplica el listener. La traza se guarda ya
+        # como texto porque el traceback no debe cruzar la cola.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if _listener is None:
+            _start_listener()
+        super().emit(record)
+
+
+_queue: queue.SimpleQueue = queue.SimpleQueue()
+_queue_handler = _SharedQueueHandler(_queue)
+_listener: QueueListener | None = None
+_listener_lock = threading.Lock()
+
 
-    file_handler = TimedRotatingFileHandler(
-        LOG_FILE,
-        when="W0",
-        interval=1,
-        backupCount=12,
-        encoding="utf-8",
-        utc=True,
-    )
+def _build_formatter() -> logging.Formatter:
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
 
-    file_handler.setFormatter(formatter)
 
-    stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(formatter)
+def _start_listener() -> None:
+    global _listener
 
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
+    with _listener_lock:
+        if _listener is not None:
+            return
+
+        formatter = _build_formatter()
+
+        file_handler = _LazyFileHandler(
+            LOG_FILE,
+            when="W0",
+            interval=1,
+            backupCount=12,
+            encoding="utf-8",
+            delay=True,
+            utc=True,
+        )
+        file_handler.setFormatter(formatter)
+        handlers: list[logging.Handler] = [file_handler]
+
+        if LOG_CONSOLE:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(formatter)
+            handlers.append(stream_handler)
+
+        listener = QueueListener(_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listener = listener
+        atexit.unregister(shutdown_logging)
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """
+    Vacia la cola y cierra los manejadores. Se llama al salir del proceso;
+    despues se puede seguir registrando (el listener se vuelve a arrancar).
+    """
+
+    global _listener
+
+    with _listener_lock:
+        listener, _listener = _listener, None
+
+    if listener is None:
+        return
+
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def get_logger(name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+
+    if logger.handlers:
+        return logger
+
+    logger.setLevel(logging.INFO if LOG_VERBOSITY == "summary" else DETAIL)
+    logger.propagate = False
+    logger.addHandler(_queue_handler)
 
     return logger
@@ -0,0 +1,187 @@
+"""
+Perfilado bajo demanda de una ejecucion completa (--profile cpu|memory).
+
+Los resultados se guardan junto al log, en logs/:
+    profile_<nombre>_<marca>.prof        cpu: estadisticas de cProfile (snakeviz, pstats...)
+    profile_<nombre>_<marca>.tracemalloc memory: snapshot de tracemalloc
+    profile_<nombre>_<marca>.txt         resumen con las PROFILE_TOP_N entradas principales
+"""
+
+import cProfile
+import io
+import os
+import profile
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from wma_cross_alerts.utils.logger import LOG_DIR, get_logger
+
+
+logger = get_logger("profiling")
+
+PROFILE_MODES = ("cpu", "memory")
+
+TOP_N = int(os.getenv("PROFILE_TOP_N", "40"))
+TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "25"))
+
+
+@contextmanager
+def profiled(mode: str | None, name: str) -> Iterator[None]:
+    """
+    Ejecuta el bloque bajo cProfile (mode="cpu") o tracemalloc
+    (mode="memory"). Con mode=None no hace nada.
+    """
+
+    if mode is None:
+        yield
+        return
+
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Modo de perfilado no soportado: {mode}")
+
+    stem = f"profile_{name}_{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    profiler = _profile_cpu if mode == "cpu" else _profile_memory
+    with profiler(LOG_DIR / stem):
+        yield
+
+
+class _ThreadProfile(profile.Profile):
+    """
+    profile.Profile activado a mitad de la pila (en el hilo principal dentro
+    de profiled, en los demas con su primer evento): ignora el retorno de los
+    frames que ya estaban en curso, que profile no ha visto empezar.
+    """
+
+    def trace_dispatch_return(self, frame, t):
+        if isinstance(self.cur[-2], profile.Profile.fake_frame):
+            return 0
+        return super().trace_dispatch_return(frame, t)
+
+    dispatch = {
+        **profile.Profile.dispatch,
+        "return": trace_dispatch_return,
+        "c_return": trace_dispatch_return,
+    }
+
+
+@contextmanager
+def _profile_cpu(base: Path) -> Iterator[None]:
+    # Un perfil por hilo (workers del escaneo, outbox...), combinados al
+    # final. Hasta 3.11 cada cProfile solo ve su hilo. Desde 3.12 cProfile usa
+    # sys.monitoring: solo puede haber uno activo y recibe los eventos de
+    # todos los hilos en una unica pila, que mezcla llamadas de hilos
+    # distintos y falsea los tiempos acumulados. Ahi se usa profile (Python
+    # puro, mas lento pero con su pila por hilo via sys.setprofile).
+    use_cprofile = sys.version_info < (3, 12)
+
+    def _new_profile():
+        if use_cprofile:
+            return cProfile.Profile()
+        return _ThreadProfile(time.perf_counter)
+
+    def _enable(prof) -> None:
+        if use_cprofile:
+            prof.enable()
+        else:
+            sys.setprofile(prof.dispatcher)
+
+    profiles = [_new_profile()]
+    lock = threading.Lock()
+
+    def _start_thread_profile(frame, event, arg):
+        sys.setprofile(None)
+        prof = _new_profile()
+        with lock:
+            profiles.append(prof)
+        _enable(prof)
+
+    logger.info(f"Perfilado de CPU activado ({'cProfile' if use_cprofile else 'profile'}, por hilo)")
+    threading.setprofile(_start_thread_profile)
+    _enable(profiles[0])
+
+    try:
+        yield
+    finally:
+        threading.setprofile(None)
+        if use_cprofile:
+            profiles[0].disable()
+        else:
+            # Tambien los hilos que siguen vivos (outbox): sus perfiles se
+            # leen a continuacion y no deben cambiar mientras tanto
+            threading.setprofile_all_threads(None)
+
+        with lock:
+            stats = pstats.Stats(*profiles)
+
+        prof_path = base.with_suffix(".prof")
+        stats.dump_stats(prof_path)
+
+        out = io.StringIO()
+        stats.stream = out
+        out.write(f"Perfil de CPU ({len(profiles)} hilo(s) perfilado(s))\n\n")
+        out.write(f"=== Top {TOP_N} por tiempo acumulado ===\n")
+        stats.sort_stats("cumulative").print_stats(TOP_N)
+        out.write(f"\n=== Top {TOP_N} por tiempo propio ===\n")
+        stats.sort_stats("tottime").print_stats(TOP_N)
+
+        txt_path = base.with_suffix(".txt")
+        txt_path.write_text(out.getvalue(), encoding="utf-8")
+        logger.info(f"Perfil de CPU guardado en {prof_path} (resumen en {txt_path})")
+
+
+@contextmanager
+def _profile_memory(base: Path) -> Iterator[None]:
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+
+    logger.info(f"Perfilado de memoria activado (tracemalloc, {TRACEMALLOC_FRAMES} frames)")
+
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+
+        snap_path = base.with_suffix(".tracemalloc")
+        snapshot.dump(str(snap_path))
+
+        lines = [
+            "Perfil de memoria (tracemalloc)",
+            "",
+            f"Memoria en uso al final: {current / 1024 / 1024:.1f} MiB",
+            f"Pico de memoria:         {peak / 1024 / 1024:.1f} MiB",
+            "",
+            f"=== Top {TOP_N} por linea (memoria viva al final) ===",
+        ]
+        for stat in snapshot.statistics("lineno")[:TOP_N]:
+            lines.append(str(stat))
+
+        lines += ["", f"=== Top {TOP_N} por fichero ==="]
+        for stat in snapshot.statistics("filename")[:TOP_N]:
+            lines.append(str(stat))
+
+        txt_path = base.with_suffix(".txt")
+        txt_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        logger.info(
+            f"Perfil de memoria guardado en {snap_path} (resumen en {txt_path}); "
+            f"pico {peak / 1024 / 1024:.1f} MiB"
+        )
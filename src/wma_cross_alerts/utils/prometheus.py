@@ -0,0 +1,236 @@
+"""
+Exportador de metricas en formato texto de Prometheus para el textfile
+collector de node-exporter.
+
+Al final de cada ejecucion se reescribe (de forma atomica) el fichero
+PROMETHEUS_TEXTFILE con gauges de la ejecucion e histogramas de latencia
+de descarga. Con PROMETHEUS_TEXTFILE vacio no se exporta nada.
+
+Cada modo escribe su propio fichero (wma_cross_alerts.prom en modo normal,
+wma_cross_alerts_revalidation.prom en revalidacion...) y todas las series
+llevan la etiqueta mode: una revalidacion correcta no tapa una ejecucion
+normal fallida ni borra sus gauges, y el ultimo exito se conserva por modo.
+"""
+
+import functools
+import os
+import re
+import time
+from pathlib import Path
+from typing import Iterable
+
+from wma_cross_alerts.utils.atomic import write_atomic
+from wma_cross_alerts.utils.logger import get_logger
+from wma_cross_alerts.utils.run_metrics import RunMetrics
+
+
+logger = get_logger("prometheus")
+
+TEXTFILE_PATH = os.getenv(
+    "PROMETHEUS_TEXTFILE",
+    str(Path("data") / "metrics" / "wma_cross_alerts.prom"),
+).strip()
+
+PREFIX = "wma_cross_alerts"
+
+DOWNLOAD_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LAST_SUCCESS_METRIC = f"{PREFIX}_last_success_timestamp_seconds"
+
+
+def export_run(
+    metrics: RunMetrics | None,
+    *,
+    status: str,
+    summary: dict,
+    path: str | Path | None = None,
+) -> Path | None:
+    """
+    Escribe las metricas de la ejecucion. Nunca lanza: un fallo del
+    exportador no debe tumbar la ejecucion.
+    """
+
+    target = Path(path) if path is not None else (Path(TEXTFILE_PATH) if TEXTFILE_PATH else None)
+    if target is None:
+        return None
+
+    target = textfile_for_mode(target, metrics.mode if metrics is not None else "unknown")
+
+    try:
+        text = render(metrics, status=status, summary=summary, previous=_read_previous(target))
+        # node-exporter podria leer un fichero a medio escribir; mkstemp lo
+        # crea con 0600 y node-exporter suele correr con otro usuario
+        write_atomic(target, text, chmod=0o644)
+    except Exception as e:
+        logger.error(f"No se pudieron exportar las metricas a {target}: {e}", exc_info=True)
+        return None
+
+    logger.info(f"Metricas Prometheus exportadas a {target}")
+    return target
+
+
+def textfile_for_mode(path: Path, mode: str) -> Path:
+    """
+    Fichero de metricas de un modo: path en modo normal y
+    <stem>_<mode><suffix> en el resto.
+    """
+
+    if mode == "normal":
+        return path
+    return path.with_name(f"{path.stem}_{mode}{path.suffix}")
+
+
+def render(
+    metrics: RunMetrics | None,
+    *,
+    status: str,
+    summary: dict,
+    previous: dict[str, float] | None = None,
+) -> str:
+    """
+    previous son los valores del fichero anterior del mismo modo.
+    """
+
+    now = time.time()
+    mode = metrics.mode if metrics is not None else "unknown"
+    ok = status == "ok"
+
+    out: list[str] = []
+
+    # Todas las series llevan el modo (ver docstring del modulo)
+    metric = functools.partial(_write_metric, common={"mode": mode})
+    histogram = functools.partial(_write_histogram, common={"mode": mode})
+
+    metric(out, "run_success", "gauge", "1 si la ultima ejecucion termino sin errores fatales",
+           [({}, 1 if ok else 0)])
+    metric(out, "run_timestamp_seconds", "gauge", "Fin de la ultima ejecucion (epoch)",
+           [({}, now)])
+
+    # Se conserva el ultimo exito anterior de este modo si esta ejecucion ha fallado
+    last_success = now if ok else (previous or {}).get(LAST_SUCCESS_METRIC)
+    if last_success is not None:
+        metric(out, "last_success_timestamp_seconds", "gauge",
+               "Fin de la ultima ejecucion correcta (epoch)", [({}, last_success)])
+
+    if metrics is not None:
+        metric(out, "run_duration_seconds", "gauge", "Duracion de la ultima ejecucion",
+               [({}, metrics.elapsed_secs)])
+
+    markets = summary.get("markets", {})
+    metric(out, "symbols_scanned", "gauge", "Simbolos escaneados por mercado",
+           [({"market": m}, st.get("scanned", 0)) for m, st in markets.items()])
+    metric(out, "crosses_found", "gauge", "Golden Cross nuevos por mercado",
+           [({"market": m}, st.get("found", 0)) for m, st in markets.items()])
+    metric(out, "crosses", "gauge", "Golden Cross de la ultima ejecucion por tipo", [
+        ({"kind": "new"}, summary.get("new_crosses", 0)),
+        ({"kind": "confirmed"}, summary.get("confirmed_crosses", 0)),
+    ])
+
+    counters = metrics.counters() if metrics is not None else {}
+
+    errors = [
+        ({"type": name[len("errors_"):]}, value)
+        for name, value in sorted(counters.items())
+        if name.startswith("errors_")
+    ]
+    if not ok:
+        errors.append(({"type": "fatal"}, 1))
+    metric(out, "errors", "gauge", "Errores de la ultima ejecucion por tipo",
+           errors or [({"type": "none"}, 0)])
+
+    if metrics is None:
+        return "".join(out)
+
+    metric(out, "price_cache", "gauge", "Simbolos servidos por el historico local por resultado", [
+        ({"result": result}, counters.get(f"price_cache_{result}", 0))
+        for result in ("hit", "tail", "miss")
+    ])
+    metric(out, "download_bytes", "gauge", "Tamano en memoria de los datos descargados",
+           [({}, counters.get("download_bytes", 0))])
+
+    histogram(out, "download_duration_seconds", "Latencia de cada llamada de descarga a Yahoo",
+              metrics.samples("download"), DOWNLOAD_BUCKETS)
+
+    manifest = metrics.manifest()
+    metric(out, "stage_duration_seconds", "gauge", "Tiempo total por etapa (suma entre hilos)",
+           [({"stage": name}, st["total_secs"]) for name, st in manifest["stages"].items()])
+
+    return "".join(out)
+
+
+def _write_metric(
+    out: list[str],
+    name: str,
+    kind: str,
+    help_text: str,
+    samples: Iterable[tuple[dict[str, str], float]],
+    *,
+    common: dict[str, str],
+) -> None:
+    full = f"{PREFIX}_{name}"
+    out.append(f"# HELP {full} {help_text}\n")
+    out.append(f"# TYPE {full} {kind}\n")
+    for labels, value in samples:
+        out.append(f"{full}{_labels({**common, **labels})} {_value(value)}\n")
+
+
+def _write_histogram(
+    out: list[str],
+    name: str,
+    help_text: str,
+    samples: list[float],
+    buckets: tuple[float, ...],
+    *,
+    common: dict[str, str],
+) -> None:
+    full = f"{PREFIX}_{name}"
+    out.append(f"# HELP {full} {help_text}\n")
+    out.append(f"# TYPE {full} histogram\n")
+
+    for le in buckets:
+        count = sum(1 for s in samples if s <= le)
+        out.append(f"{full}_bucket{_labels({**common, 'le': _value(le)})} {count}\n")
+    out.append(f"{full}_bucket{_labels({**common, 'le': '+Inf'})} {len(samples)}\n")
+    out.append(f"{full}_sum{_labels(common)} {_value(sum(samples))}\n")
+    out.append(f"{full}_count{_labels(common)} {len(samples)}\n")
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+_SAMPLE_RE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})?\s+(\S+)")
+
+
+def _read_previous(path: Path) -> dict[str, float]:
+    """
+    Valores por nombre de metrica del fichero anterior (para conservar el
+    ultimo exito). El fichero es de un solo modo, asi que las metricas de
+    una sola serie se identifican por su nombre.
+    """
+
+    if not path.exists():
+        return {}
+
+    values = {}
+    try:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            match = _SAMPLE_RE.match(line)
+            if match:
+                values[match.group(1)] = float(match.group(3))
+    except Exception as e:
+        logger.warning(f"No se pudo leer el fichero de metricas anterior {path}: {e}")
+    return values
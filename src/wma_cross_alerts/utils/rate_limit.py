@@ -0,0 +1,26 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Limita el numero de llamadas por segundo compartido entre hilos.
+    Con rate_per_sec <= 0 no limita.
+    """
+
+    def __init__(self, rate_per_sec: float) -> None:
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+
+        if wait_for > 0:
+            time.sleep(wait_for)
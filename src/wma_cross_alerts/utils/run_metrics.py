@@ -0,0 +1,232 @@
+"""
+Telemetria de una ejecucion: tiempos por etapa (y por simbolo) y
+contadores, agregados al final en el manifiesto data/runs/<run_id>.json.
+
+Cada etapa del manifiesto indica en "unit" que es una muestra: "symbol"
+(una por simbolo, motor symbol), "batch" (una por lote o mercado: fetch y
+el motor matricial; incluye ademas los percentiles por simbolo, dividiendo
+cada muestra entre los simbolos del lote) o "call" (sin simbolos, como
+download o email).
+
+Uso:
+    start_run(make_run_id("2026-02-13", "normal"), mode="normal")
+    with stage("wma", symbol):
+        ...
+    incr("price_cache_hit")
+    finish_run(status="ok", markets=...)
+
+Sin una ejecucion activa (scripts, benchmarks de kernels...) stage() e
+incr() no hacen nada.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from wma_cross_alerts.utils.atomic import atomic_open
+from wma_cross_alerts.utils.logger import get_logger
+
+
+logger = get_logger("run_metrics")
+
+RUNS_DIR = Path("data") / "runs"
+SLOWEST_SYMBOLS = int(os.getenv("RUN_MANIFEST_SLOWEST", "10"))
+
+
+class RunMetrics:
+    """
+    Acumulador de tiempos y contadores de una ejecucion. Seguro entre hilos:
+    los workers del escaneo registran sus etapas en paralelo.
+    """
+
+    def __init__(self, run_id: str, mode: str) -> None:
+        self.run_id = run_id
+        self.mode = mode
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._samples: dict[str, list[float]] = defaultdict(list)
+        # Simbolos de cada muestra (0 = etapa sin simbolo, -n = lote de n)
+        self._sizes: dict[str, list[int]] = defaultdict(list)
+        self._by_symbol: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._counters: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, symbol: str | list[str] | None = None) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0, symbol)
+
+    def record(self, name: str, secs: float, symbol: str | list[str] | None = None) -> None:
+        """
+        Registra una muestra de la etapa. Si symbol es una lista (etapas por
+        lote, como fetch) el tiempo se reparte a partes iguales.
+        """
+
+        symbols = [] if symbol is None else [symbol] if isinstance(symbol, str) else symbol
+
+        with self._lock:
+            self._samples[name].append(secs)
+            self._sizes[name].append(1 if isinstance(symbol, str) else -len(symbols))
+            if not symbols:
+                return
+            share = secs / len(symbols)
+            for s in symbols:
+                self._by_symbol[s][name] += share
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def samples(self, name: str) -> list[float]:
+        with self._lock:
+            return list(self._samples.get(name, []))
+
+    def counters(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    @property
+    def elapsed_secs(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def manifest(self, **extra: Any) -> dict[str, Any]:
+        with self._lock:
+            samples = {k: list(v) for k, v in self._samples.items()}
+            sizes = {k: list(v) for k, v in self._sizes.items()}
+            by_symbol = {s: dict(v) for s, v in self._by_symbol.items()}
+            counters = dict(self._counters)
+
+        stages = {}
+        for name, values in samples.items():
+            arr = np.asarray(values)
+            n_symbols = np.abs(np.asarray(sizes[name]))
+            batched = np.asarray(sizes[name]) < 0
+
+            stages[name] = {
+                "unit": "batch" if batched.any() else "symbol" if n_symbols.all() else "call",
+                "count": int(arr.size),
+                "total_secs": float(arr.sum()),
+                "mean_secs": float(arr.mean()),
+                "p50_secs": float(np.percentile(arr, 50)),
+                "p95_secs": float(np.percentile(arr, 95)),
+                "max_secs": float(arr.max()),
+            }
+
+            if batched.any():
+                per_symbol = arr[n_symbols > 0] / n_symbols[n_symbols > 0]
+                stages[name]["symbols"] = int(n_symbols.sum())
+                if per_symbol.size:
+                    stages[name]["per_symbol_p50_secs"] = float(np.percentile(per_symbol, 50))
+                    stages[name]["per_symbol_p95_secs"] = float(np.percentile(per_symbol, 95))
+
+        totals = sorted(
+            ((sum(st.values()), s, st) for s, st in by_symbol.items()),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        slowest = [
+            {"symbol": s, "total_secs": total, "stages": st}
+            for total, s, st in totals[:SLOWEST_SYMBOLS]
+        ]
+
+        return {
+            "run_id": self.run_id,
+            "mode": self.mode,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "duration_secs": time.perf_counter() - self._t0,
+            **extra,
+            "stages": stages,
+            "counters": dict(sorted(counters.items())),
+            "symbols_timed": len(by_symbol),
+            "slowest_symbols": slowest,
+        }
+
+    def write(self, path: Path | None = None, **extra: Any) -> Path:
+        """
+        Escribe el manifiesto (escritura atomica) y devuelve su ruta.
+        """
+
+        path = path or RUNS_DIR / f"{self.run_id}.json"
+        payload = self.manifest(**extra)
+
+        with atomic_open(path) as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+        return path
+
+
+_current: RunMetrics | None = None
+
+
+def make_run_id(base: str, mode: str) -> str:
+    """
+    Identificador del manifiesto: base (fecha o rango) en modo normal y
+    <base>_<mode> en el resto, para que la revalidacion de una fecha no
+    sobrescriba el manifiesto de su ejecucion normal.
+    """
+
+    return base if mode == "normal" else f"{base}_{mode}"
+
+
+def start_run(run_id: str, mode: str) -> RunMetrics:
+    """
+    Inicia la telemetria de una ejecucion (sustituye a la anterior, si la hay).
+    """
+
+    global _current
+    _current = RunMetrics(run_id, mode)
+    return _current
+
+
+def current_run() -> RunMetrics | None:
+    return _current
+
+
+def finish_run(**extra: Any) -> Path | None:
+    """
+    Escribe el manifiesto de la ejecucion activa y la cierra. Nunca lanza:
+    un fallo de telemetria no debe tumbar la ejecucion.
+    """
+
+    global _current
+    metrics, _current = _current, None
+    if metrics is None:
+        return None
+
+    try:
+        path = metrics.write(**extra)
+    except Exception as e:
+        logger.error(f"No se pudo escribir el manifiesto de la ejecucion: {e}", exc_info=True)
+        return None
+
+    logger.info(f"Manifiesto de la ejecucion guardado en {path}")
+    return path
+
+
+def stage(name: str, symbol: str | list[str] | None = None):
+    """
+    Context manager que cronometra una etapa en la ejecucion activa.
+    """
+
+    metrics = _current
+    if metrics is None:
+        return nullcontext()
+    return metrics.stage(name, symbol)
+
+
+def incr(name: str, n: int = 1) -> None:
+    metrics = _current
+    if metrics is not None:
+        metrics.incr(name, n)
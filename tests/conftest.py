@@ -0,0 +1,19 @@
+import os
+
+import pytest
+
+
+# Los modulos usan rutas relativas (data/..., logs/): cada test corre en su
+# propio directorio temporal
+os.environ.setdefault("LOG_CONSOLE", "false")
+
+from wma_cross_alerts.utils.logger import shutdown_logging
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    # El listener escribe en segundo plano: se vacia antes de cambiar de
+    # directorio para que logs/app.log quede en el del test
+    shutdown_logging()
@@ -0,0 +1,27 @@
+import stat
+from pathlib import Path
+
+import pytest
+
+from wma_cross_alerts.utils.atomic import atomic_open, write_atomic
+
+
+def test_failed_write_keeps_previous_file():
+    path = Path("data") / "x.json"
+    write_atomic(path, "antes")
+
+    with pytest.raises(RuntimeError):
+        with atomic_open(path) as f:
+            f.write("a medias")
+            raise RuntimeError("corte")
+
+    assert path.read_text(encoding="utf-8") == "antes"
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_bytes_and_permissions():
+    path = Path("metrics") / "m.prom"
+    write_atomic(path, b"m 1\n", fsync=True, chmod=0o644)
+
+    assert path.read_bytes() == b"m 1\n"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
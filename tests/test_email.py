@@ -0,0 +1,54 @@
+from email.message import EmailMessage
+
+from wma_cross_alerts.notifiers import email
+from wma_cross_alerts.notifiers.email import _message_key
+
+
+def _alert(chart: bytes) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = "alertas"
+    msg.set_content("Este correo contiene contenido HTML.")
+    msg.add_alternative("<p>1 cruce</p>", subtype="html")
+    msg.add_attachment(chart, maintype="image", subtype="png", filename="AAA.png")
+    return msg
+
+
+def test_key_changes_with_attachments():
+    key = _message_key("alerts", "2026-01-02", "normal", _alert(b"png-1"))
+
+    assert key == _message_key("alerts", "2026-01-02", "normal", _alert(b"png-1"))
+    assert key != _message_key("alerts", "2026-01-02", "normal", _alert(b"png-2"))
+
+
+def test_forced_key_is_unique():
+    msg = _alert(b"png")
+    assert _message_key("alerts", "2026-01-02", "resend", msg, force=True) != _message_key(
+        "alerts", "2026-01-02", "resend", msg, force=True
+    )
+
+
+def test_alert_shows_each_cross_periods(monkeypatch):
+    for name, value in {
+        "EMAIL_ENABLED": "true",
+        "EMAIL_TO_ALERTS": "b@localhost",
+        "SMTP_HOST": "localhost",
+        "SMTP_USER": "a",
+        "SMTP_PASSWORD": "x",
+        "EMAIL_FROM": "a@localhost",
+    }.items():
+        monkeypatch.setenv(name, value)
+    queued = []
+    monkeypatch.setattr(email, "enqueue", lambda msg, key: queued.append(msg) or True)
+
+    cross = {"symbol": "AAA", "market": "US", "date": "2026-01-02", "difference": 1.0, "wma_short": 2.0, "wma_long": 1.0}
+    assert email.send_cross_alert_email(
+        "2026-01-02",
+        [{**cross, "period_short": 50, "period_long": 200}, {**cross, "symbol": "BBB", "period_short": 20, "period_long": 100}],
+        [],
+        [],
+    )
+
+    html = queued[0].get_body(("html",)).get_content()
+    assert "WMA corta (50)" in html and "WMA larga (200)" in html
+    assert "WMA corta (20)" in html and "(20 / 100 | 50 / 200)" in html
+    assert "(30)" not in html
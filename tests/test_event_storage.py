@@ -0,0 +1,90 @@
+import fcntl
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from wma_cross_alerts.persistence import event_journal, storage
+from wma_cross_alerts.persistence.event_index import event_path, is_indexed, query_events
+from wma_cross_alerts.persistence.state import already_registered
+
+
+@pytest.fixture(autouse=True)
+def journal(monkeypatch):
+    monkeypatch.setattr(storage, "EVENT_JOURNAL_ENABLED", True)
+    monkeypatch.setattr(storage, "JOURNAL_BATCH", 1000)
+    # Lo pendiente de un test no se arrastra al siguiente
+    monkeypatch.setattr(storage, "_pending", [])
+
+
+def _event(symbol: str, date: str = "2025-01-02") -> dict:
+    return {"signal": "golden_cross", "market": "US", "symbol": symbol, "date": date, "difference": 1.0}
+
+
+def test_torn_batch_is_discarded_and_later_batches_are_read():
+    event_journal.append_batch([_event("AAA")])
+
+    # Corte a mitad del lote: lineas de evento sin su linea commit
+    batch = {"batch": "torn", "event": _event("TORN")}
+    with open(event_journal.JOURNAL_PATH, "ab") as f:
+        f.write((json.dumps(batch) + "\n").encode("utf-8"))
+        f.write(b'{"batch": "torn", "comm')
+
+    event_journal.append_batch([_event("BBB")])
+
+    assert [e["symbol"] for e in event_journal.read_events()] == ["AAA", "BBB"]
+
+
+def test_compaction_waits_for_journal_lock():
+    storage.save_event(_event("AAA"))
+    storage.flush_events()
+
+    # Otro proceso escribiendo en el journal: flock desde otra descripcion
+    event_journal.BASE_EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+    fd = os.open(event_journal.LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+    done = []
+    worker = threading.Thread(target=lambda: done.append(storage.compact_journal()))
+    try:
+        worker.start()
+        time.sleep(0.2)
+
+        assert worker.is_alive()
+        assert not event_path(_event("AAA")).exists()
+        assert event_journal.journal_size() > 0
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+        worker.join(timeout=10)
+
+    assert done == [1]
+    assert event_path(_event("AAA")).exists()
+    assert event_journal.journal_size() == 0
+
+
+def test_journaled_events_are_read_before_compaction():
+    storage.save_event(_event("AAA"))
+    storage.save_event(_event("BBB", "2025-01-03"))
+    storage.flush_events()
+
+    assert not event_path(_event("AAA")).exists()
+    assert {e["symbol"] for e in storage.load_events(signal="golden_cross")} == {"AAA", "BBB"}
+    assert [e["symbol"] for e in query_events(signal="golden_cross")] == ["AAA", "BBB"]
+
+    assert storage.compact_journal() == 2
+    assert [e["symbol"] for e in query_events(signal="golden_cross")] == ["AAA", "BBB"]
+
+
+def test_already_registered_sees_pending_events():
+    storage.save_event(_event("AAA"))
+
+    # Aun sin confirmar: no esta en el indice pero si cuenta como registrado
+    assert not is_indexed("AAA", "golden_cross", "2025-01-02")
+    assert already_registered("AAA", "golden_cross", "2025-01-02")
+    assert not already_registered("AAA", "golden_cross", "2025-01-03")
+
+    storage.flush_events()
+    assert is_indexed("AAA", "golden_cross", "2025-01-02")
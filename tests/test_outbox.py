@@ -0,0 +1,83 @@
+import json
+import os
+import time
+from email.message import EmailMessage
+
+import pytest
+
+from wma_cross_alerts.notifiers import outbox
+
+
+@pytest.fixture(autouse=True)
+def file_transport(monkeypatch):
+    monkeypatch.setattr(outbox, "TRANSPORT", "file")
+    # Sin hilo de entrega: los tests llaman a deliver_pending directamente
+    monkeypatch.setattr(outbox, "start_worker", lambda: None)
+
+
+def _message(subject: str = "prueba") -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "a@localhost"
+    msg["To"] = "b@localhost"
+    msg["Subject"] = subject
+    msg.set_content("cuerpo")
+    return msg
+
+
+def test_enqueue_is_idempotent_until_sent_marker_expires(monkeypatch):
+    assert outbox.enqueue(_message(), "k1")
+    assert not outbox.enqueue(_message(), "k1")
+
+    assert outbox.deliver_pending() == 0
+    assert not outbox.enqueue(_message(), "k1")
+    assert len(list(outbox.SINK_DIR.glob("*.eml"))) == 1
+
+    # Marca de enviado caducada: se borra y el correo se puede volver a encolar
+    marker = outbox.SENT_DIR / "k1.json"
+    old = time.time() - 40 * 86400
+    os.utime(marker, (old, old))
+    monkeypatch.setattr(outbox, "SENT_RETENTION_DAYS", 30.0)
+    assert outbox.prune_sent() == 1
+    assert outbox.enqueue(_message(), "k1")
+
+
+def test_claimed_message_is_sent_only_by_its_claimer():
+    outbox.enqueue(_message(), "k2")
+
+    assert outbox._claim("k2") is not None
+    # Otro proceso (o hilo) que llegue despues no lo encuentra pendiente
+    assert outbox._claim("k2") is None
+    assert outbox.deliver_pending() == 0
+    assert not list(outbox.SINK_DIR.glob("*.eml"))
+    assert not outbox.enqueue(_message(), "k2")
+
+
+def test_claim_of_dead_process_returns_to_pending():
+    outbox.enqueue(_message(), "k3")
+    outbox._claim("k3")
+
+    meta_path = outbox.INFLIGHT_DIR / "k3.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    meta["claimed_by"] = 2 ** 22 + 12345  # pid inexistente
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+    assert outbox.deliver_pending() == 0
+    assert (outbox.SINK_DIR / "k3.eml").exists()
+    assert (outbox.SENT_DIR / "k3.json").exists()
+    assert not list(outbox.INFLIGHT_DIR.glob("*"))
+
+
+def test_failed_send_goes_back_to_pending_with_backoff(monkeypatch):
+    def fail(msg, key):
+        raise OSError("smtp caido")
+
+    monkeypatch.setattr(outbox, "_send", fail)
+    outbox.enqueue(_message(), "k4")
+
+    assert outbox.deliver_pending() == 1
+    meta = json.loads((outbox.PENDING_DIR / "k4.json").read_text(encoding="utf-8"))
+    assert meta["attempts"] == 1
+    assert meta["next_attempt_at"] > time.time()
+    assert "claimed_by" not in meta
+    assert (outbox.PENDING_DIR / "k4.eml").exists()
+    assert not list(outbox.INFLIGHT_DIR.glob("*"))
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from wma_cross_alerts.data_sources import yahoo
+from wma_cross_alerts.data_sources.price_store import load_close, save_close
+
+
+def _today() -> pd.Timestamp:
+    return pd.Timestamp(datetime.now(timezone.utc).date())
+
+
+def _series(values, last: pd.Timestamp) -> pd.Series:
+    index = pd.date_range(end=last, periods=len(values), freq="D", name="Date")
+    return pd.Series(values, index=index, dtype="float64", name="Close")
+
+
+def _fake_yahoo(monkeypatch, history: pd.Series) -> list[str]:
+    calls = []
+
+    def download(symbol, start, end):
+        calls.append(start)
+        mask = (history.index >= pd.Timestamp(start)) & (history.index < pd.Timestamp(end))
+        return history[mask]
+
+    monkeypatch.setattr(yahoo, "_download_close", download)
+    return calls
+
+
+def test_split_detected_when_last_bar_is_provisional(monkeypatch):
+    today = _today()
+    # Guardado hoy (ejecucion diaria tras el cierre): la ultima barra es provisional
+    save_close("SPLT", _series([100.0] * 10, today), covered_from="2000-01-01")
+    assert load_close("SPLT").last_is_provisional
+
+    # Yahoo ha ajustado todo el historico por un split 2:1
+    adjusted = _series([50.0] * 10, today)
+    calls = _fake_yahoo(monkeypatch, adjusted)
+
+    end = (today + timedelta(days=1)).strftime("%Y-%m-%d")
+    close = yahoo.fetch_daily_close("SPLT", start="2000-01-01", end=end)
+
+    # Tramo desde la ultima barra definitiva y, al no coincidir, descarga completa
+    assert calls == [(today - timedelta(days=1)).strftime("%Y-%m-%d"), "2000-01-01"]
+    assert (close == 50.0).all()
+    assert (load_close("SPLT").close == 50.0).all()
+
+
+def test_provisional_bar_replaced_without_full_download(monkeypatch):
+    today = _today()
+    save_close("PROV", _series([100.0] * 10, today), covered_from="2000-01-01")
+
+    # Solo cambia la barra provisional (cierre definitivo distinto)
+    history = _series([100.0] * 9 + [101.0], today)
+    calls = _fake_yahoo(monkeypatch, history)
+
+    end = (today + timedelta(days=1)).strftime("%Y-%m-%d")
+    close = yahoo.fetch_daily_close("PROV", start="2000-01-01", end=end)
+
+    assert len(calls) == 1
+    assert len(close) == 10
+    assert close.iloc[-1] == 101.0
+    assert (close.iloc[:-1] == 100.0).all()
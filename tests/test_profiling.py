@@ -0,0 +1,39 @@
+import pstats
+import threading
+from pathlib import Path
+
+from wma_cross_alerts.utils.profiling import profiled
+
+
+def _inner() -> int:
+    return sum(range(1000))
+
+
+def _worker() -> None:
+    for _ in range(200):
+        _inner()
+
+
+def _main_work() -> None:
+    for _ in range(100):
+        _inner()
+
+
+def test_cpu_profile_keeps_each_thread_stack():
+    with profiled("cpu", "test"):
+        thread = threading.Thread(target=_worker)
+        thread.start()
+        _main_work()
+        thread.join()
+
+    txt = next(Path("logs").glob("profile_test_*.txt")).read_text(encoding="utf-8")
+    assert txt.startswith("Perfil de CPU (2 hilo(s) perfilado(s))")
+
+    stats = pstats.Stats(str(next(Path("logs").glob("profile_test_*.prof"))))
+    inner = next(fn for fn in stats.stats if fn[2] == "_inner")
+    callers = stats.stats[inner][4]
+
+    # Cada llamada atribuida a la funcion de su propio hilo (cProfile guarda
+    # una tupla por llamador, profile solo el numero de llamadas)
+    calls = {fn[2]: value[0] if isinstance(value, tuple) else value for fn, value in callers.items()}
+    assert calls == {"_worker": 200, "_main_work": 100}
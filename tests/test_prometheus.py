@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from wma_cross_alerts.utils.prometheus import LAST_SUCCESS_METRIC, _read_previous, export_run
+from wma_cross_alerts.utils.run_metrics import RunMetrics
+
+
+def _export(mode: str, status: str, path: Path) -> None:
+    export_run(RunMetrics("r", mode), status=status, summary={}, path=path)
+
+
+def test_modes_write_separate_files_and_keep_their_last_success(tmp_path):
+    path = tmp_path / "wma_cross_alerts.prom"
+    revalidation = tmp_path / "wma_cross_alerts_revalidation.prom"
+
+    _export("normal", "ok", path)
+    normal_success = _read_previous(path)[LAST_SUCCESS_METRIC]
+
+    # Misma ruta configurada: el modo elige el fichero
+    _export("revalidation", "ok", path)
+    _export("normal", "error", path)
+
+    # El fallo normal conserva su ultimo exito; la revalidacion no lo toca
+    assert _read_previous(path)[LAST_SUCCESS_METRIC] == normal_success
+    assert _read_previous(path)["wma_cross_alerts_run_success"] == 0
+    assert revalidation.exists()
+    assert 'mode="revalidation"' in revalidation.read_text(encoding="utf-8")
+    assert 'mode="revalidation"' not in path.read_text(encoding="utf-8")
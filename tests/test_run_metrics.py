@@ -0,0 +1,24 @@
+from wma_cross_alerts.utils.run_metrics import RunMetrics, make_run_id
+
+
+def test_run_id_keeps_modes_apart():
+    assert make_run_id("2026-02-13", "normal") == "2026-02-13"
+    assert make_run_id("2026-02-13", "revalidation") == "2026-02-13_revalidation"
+
+
+def test_stage_units_and_per_symbol_latency():
+    metrics = RunMetrics("r", "normal")
+    metrics.record("wma", 0.2, "AAA")
+    metrics.record("wma", 0.4, "BBB")
+    metrics.record("fetch", 1.0, ["AAA", "BBB", "CCC", "DDD"])
+    metrics.record("fetch", 3.0, ["EEE", "FFF"])
+    metrics.record("download", 0.5)
+
+    stages = metrics.manifest()["stages"]
+
+    assert stages["wma"]["unit"] == "symbol"
+    assert stages["download"]["unit"] == "call"
+    assert stages["fetch"]["unit"] == "batch"
+    assert stages["fetch"]["symbols"] == 6
+    assert stages["fetch"]["p50_secs"] == 2.0
+    assert stages["fetch"]["per_symbol_p50_secs"] == (0.25 + 1.5) / 2
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from wma_cross_alerts.core.scan import (
+    evaluate_batch_matrix,
+    evaluate_batch_matrix_range,
+    evaluate_symbol,
+    evaluate_symbol_range,
+)
+from wma_cross_alerts.core.settings import WmaPair
+
+
+PAIRS = [WmaPair(5, 20, "golden_cross_5_20"), WmaPair(10, 40, "golden_cross_10_40")]
+LAST = pd.Timestamp("2025-06-30")
+
+
+def _prices() -> dict[str, pd.Series]:
+    rng = np.random.default_rng(7)
+    prices = {}
+
+    for i in range(40):
+        values = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+        index = pd.bdate_range(end=LAST, periods=len(values), name="Date")
+        prices[f"S{i:02d}"] = pd.Series(values, index=index, name="Close")
+
+    # Historico insuficiente para cualquier par y ultimo cierre atrasado
+    prices["SHORT"] = prices["S00"].iloc[-15:]
+    prices["STALE"] = prices["S01"].iloc[:-3]
+    return prices
+
+
+def _crosses(results: list[dict]) -> dict[tuple, tuple[float, float]]:
+    return {
+        (c["symbol"], c["signal"], c["date"]): (c["wma_short"], c["wma_long"])
+        for result in results
+        for c in result.get("crosses", [])
+    }
+
+
+@pytest.mark.parametrize("mode", ["normal", "revalidation"])
+def test_matrix_engine_matches_symbol_engine(mode):
+    prices = _prices()
+    batch = list(prices)
+    exec_date = LAST.strftime("%Y-%m-%d")
+    kwargs = {"exec_date": exec_date, "pairs": PAIRS, "mode": mode}
+
+    by_symbol = [evaluate_symbol(s, "US", prices[s], **kwargs) for s in batch]
+    by_matrix = evaluate_batch_matrix(batch, "US", prices, **kwargs)
+
+    assert [r["status"] for r in by_matrix] == [r["status"] for r in by_symbol]
+    assert {"cross", "no_cross", "invalid", "stale"} <= {r["status"] for r in by_symbol}
+
+    expected = _crosses(by_symbol)
+    actual = _crosses(by_matrix)
+    assert actual.keys() == expected.keys()
+    for key, values in expected.items():
+        assert actual[key] == pytest.approx(values, rel=1e-9)
+
+
+def test_matrix_range_engine_matches_prefix_sum_engine():
+    prices = _prices()
+    batch = list(prices)
+    dates = [d.strftime("%Y-%m-%d") for d in pd.date_range("2025-01-01", LAST)]
+    kwargs = {"dates": dates, "pairs": PAIRS}
+
+    by_symbol = [evaluate_symbol_range(s, "US", prices[s], **kwargs) for s in batch]
+    by_matrix = evaluate_batch_matrix_range(batch, "US", prices, **kwargs)
+
+    assert [r["status"] for r in by_matrix] == [r["status"] for r in by_symbol]
+
+    expected = _crosses(by_symbol)
+    actual = _crosses(by_matrix)
+    assert len(expected) > 20
+    assert actual.keys() == expected.keys()
+    for key, values in expected.items():
+        assert actual[key] == pytest.approx(values, rel=1e-9)
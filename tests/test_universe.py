@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta, timezone
+
+from wma_cross_alerts.core import universe
+
+
+def _cached(hours_ago: float) -> dict:
+    fetched = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    return {"symbols": ["AAA"], "fetched_at_utc": fetched.isoformat()}
+
+
+def test_daily_run_revalidates_and_same_day_rerun_uses_cache(monkeypatch):
+    monkeypatch.setattr(universe, "DEFAULT_TTL_DAYS", 0.5)
+
+    assert universe._is_fresh(_cached(1))
+    # La ejecucion del dia siguiente, aunque empiece antes que la anterior
+    assert not universe._is_fresh(_cached(23.9))
+
+
+def test_zero_ttl_always_revalidates(monkeypatch):
+    monkeypatch.setattr(universe, "DEFAULT_TTL_DAYS", 0.0)
+
+    assert not universe._is_fresh(_cached(0))
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from wma_cross_alerts.indicators.wma import wma_many_values, wma_values
+from wma_cross_alerts.indicators.wma_state import advance
+
+
+PERIODS = [5, 30, 50, 200]
+
+# Diferencia maxima de wma_many_values respecto al mayor cierre (ver su docstring)
+TOLERANCE = 1e-10
+
+
+def _closes(seed: int, n: int = 2600) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_prefix_sums_match_convolution(seed):
+    values = _closes(seed)
+    values[700:705] = np.nan
+    many = wma_many_values(values, PERIODS)
+
+    for period in PERIODS:
+        expected = wma_values(values, period)
+        np.testing.assert_array_equal(np.isnan(many[period]), np.isnan(expected))
+        np.testing.assert_allclose(many[period], expected, rtol=0, atol=TOLERANCE * np.nanmax(values))
+
+
+def test_matrix_columns_match_single_series():
+    matrix = np.column_stack([_closes(seed, 1500) for seed in range(4)])
+    many = wma_many_values(matrix, PERIODS)
+
+    for j in range(matrix.shape[1]):
+        single = wma_many_values(matrix[:, j], PERIODS)
+        for period in PERIODS:
+            np.testing.assert_array_equal(many[period][:, j], single[period])
+
+
+def test_prefix_sums_match_incremental_state():
+    values = _closes(7, 1200)
+    close = pd.Series(values, index=pd.bdate_range("2020-01-01", periods=len(values)))
+    many = wma_many_values(values, PERIODS)
+    atol = TOLERANCE * values.max()
+
+    states = {}
+    # Barra a barra, como la ejecucion diaria con el estado guardado
+    for end in range(1000, len(values) + 1):
+        for period in PERIODS:
+            prev, curr, states[period] = advance(states.get(period), close.iloc[:end], period)
+            assert curr == pytest.approx(many[period][end - 1], rel=0, abs=atol)
+            assert prev == pytest.approx(many[period][end - 2], rel=0, abs=atol)